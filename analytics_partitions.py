@@ -0,0 +1,437 @@
+"""
+Analytics Partitions
+Analytics events are stored in one table per calendar month
+(``analytics_YYYYMM``), listed in ``analytics_partitions``. The
+``analytics`` view is the UNION ALL of every live partition, so queries
+over the whole history keep working unchanged. Each new partition
+continues the id sequence of the previous one, so ids stay unique across
+the view. Event types, IP addresses and user agents are stored as ids into
+the lookup tables (see lookups.py) and the view joins the strings back.
+
+Partitions older than the retention period are archived: their rows are
+written to a gzip-compressed JSON Lines file, the table is dropped and the
+freed pages are returned to the filesystem with incremental VACUUM.
+
+Usage::
+
+    python analytics_partitions.py status
+    python analytics_partitions.py archive [--retention-months 12] [--archive-dir analytics_archive]
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set
+
+import database
+import lookups
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('id', 'event_type', 'event_data', 'ip_address', 'user_agent', 'timestamp')
+
+# String columns stored as lookup ids
+ENCODED_COLUMNS = (
+    (lookups.EVENT_TYPES, 'event_type'),
+    (lookups.IP_ADDRESSES, 'ip_address'),
+    (lookups.USER_AGENTS, 'user_agent')
+)
+
+MONTH_PATTERN = re.compile(r'\d{4}-\d{2}')
+
+CREATE_REGISTRY = '''
+    CREATE TABLE IF NOT EXISTS analytics_partitions (
+        month TEXT PRIMARY KEY,
+        table_name TEXT NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        archived_at DATETIME,
+        archive_path TEXT,
+        archived_rows INTEGER
+    )
+'''
+
+CREATE_PARTITION = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_type_id INTEGER NOT NULL,
+        event_data TEXT,
+        ip_address_id INTEGER,
+        user_agent_id INTEGER,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+CREATE_PARTITION_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS idx_{table}_timestamp ON {table} (timestamp, event_type_id)',
+    'CREATE INDEX IF NOT EXISTS idx_{table}_event_type ON {table} (event_type_id, timestamp)'
+)
+
+# A partition's rows with the strings joined back, in COLUMNS order
+SELECT_PARTITION = '''
+    SELECT p.id, e.value AS event_type, p.event_data, i.value AS ip_address,
+           u.value AS user_agent, p.timestamp
+    FROM {table} p
+    JOIN event_types e ON e.id = p.event_type_id
+    LEFT JOIN ip_addresses i ON i.id = p.ip_address_id
+    LEFT JOIN user_agents u ON u.id = p.user_agent_id
+'''
+
+# Late events for an earlier month must not reuse ids handed out by a
+# newer partition, so the target partition's sequence is moved up to the
+# highest one before inserting
+SYNC_SEQUENCE = '''
+    UPDATE sqlite_sequence
+    SET seq = (SELECT MAX(seq) FROM sqlite_sequence WHERE name LIKE 'analytics\\_%' ESCAPE '\\')
+    WHERE name = ?
+'''
+
+INSERT_EVENT = '''
+    INSERT INTO {table} (event_type_id, event_data, ip_address_id, user_agent_id, timestamp)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+SELECT_LIVE_PARTITIONS = '''
+    SELECT month, table_name FROM analytics_partitions
+    WHERE archived_at IS NULL
+    ORDER BY month
+'''
+
+REGISTER_PARTITION = '''
+    INSERT INTO analytics_partitions (month, table_name) VALUES (?, ?)
+    ON CONFLICT (month) DO UPDATE SET archived_at = NULL
+'''
+
+MARK_ARCHIVED = '''
+    UPDATE analytics_partitions
+    SET archived_at = CURRENT_TIMESTAMP, archive_path = ?, archived_rows = ?
+    WHERE month = ?
+'''
+
+# The view over an empty partition list
+EMPTY_VIEW = ('SELECT CAST(NULL AS INTEGER) AS id, NULL AS event_type, NULL AS event_data, '
+              'NULL AS ip_address, NULL AS user_agent, NULL AS timestamp WHERE 0')
+
+# Partition tables this process knows to exist and to be committed
+_known: Set[str] = set()
+_known_lock = threading.Lock()
+
+
+def month_of(timestamp: str) -> str:
+    """'YYYY-MM' of a 'YYYY-MM-DD HH:MM:SS' timestamp."""
+    return timestamp[:7]
+
+
+def table_for(month: str) -> str:
+    if not MONTH_PATTERN.fullmatch(month):
+        raise ValueError(f"Invalid partition month: {month!r}")
+    return f"analytics_{month.replace('-', '')}"
+
+
+def _table_exists(conn: sqlite3.Connection, name: str, kind: str = 'table') -> bool:
+    return conn.execute(
+        'SELECT 1 FROM sqlite_master WHERE type = ? AND name = ?', (kind, name)
+    ).fetchone() is not None
+
+
+def _next_id(conn: sqlite3.Connection) -> int:
+    """Highest id used by any partition."""
+    if not _table_exists(conn, 'sqlite_sequence'):
+        return 0
+    row = conn.execute(
+        "SELECT MAX(seq) FROM sqlite_sequence WHERE name LIKE 'analytics\\_%' ESCAPE '\\'"
+    ).fetchone()
+    return row[0] or 0
+
+
+def rebuild_view(conn: sqlite3.Connection):
+    """Point the ``analytics`` view at the live partitions."""
+    tables = [row[1] for row in conn.execute(SELECT_LIVE_PARTITIONS)]
+    body = ' UNION ALL '.join(SELECT_PARTITION.format(table=table) for table in tables) or EMPTY_VIEW
+    conn.execute('DROP VIEW IF EXISTS analytics')
+    conn.execute(f'CREATE VIEW analytics AS {body}')
+
+
+def create_partition(conn: sqlite3.Connection, month: str, update_view: bool = True) -> str:
+    """Create the partition for ``month`` inside the caller's transaction."""
+    table = table_for(month)
+    if not _table_exists(conn, table):
+        next_id = _next_id(conn)
+        conn.execute(CREATE_PARTITION.format(table=table))
+        for statement in CREATE_PARTITION_INDEXES:
+            conn.execute(statement.format(table=table))
+        if next_id:
+            conn.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)', (table, next_id))
+        conn.execute(REGISTER_PARTITION, (month, table))
+        if update_view:
+            rebuild_view(conn)
+        logger.info(f"Created analytics partition {table}")
+    return table
+
+
+def ensure_partition(conn: sqlite3.Connection, month: str) -> str:
+    """Partition table for ``month``, creating it if needed.
+
+    A new partition is created in its own transaction, or in the caller's
+    if one is already open. Only a partition known to be committed is
+    cached: one created in the caller's transaction is gone again if that
+    transaction rolls back.
+    """
+    table = table_for(month)
+    with _known_lock:
+        if table in _known:
+            return table
+
+    if conn.in_transaction:
+        return create_partition(conn, month)
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        create_partition(conn, month)
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    with _known_lock:
+        _known.add(table)
+    return table
+
+
+def forget_partitions():
+    """Drop the cache of known partitions, e.g. after one was archived."""
+    with _known_lock:
+        _known.clear()
+
+
+def insert_events(conn: sqlite3.Connection, events: Sequence[Sequence[Any]]):
+    """Insert ``(event_type, event_data, ip_address, user_agent, timestamp)`` rows
+    into their monthly partitions, creating partitions as needed.
+    """
+    # Strings are resolved first, while no transaction is open, so that ids
+    # of committed lookup rows can be cached
+    rows = zip(
+        lookups.EVENT_TYPES.ids(conn, (event[0] for event in events)),
+        (event[1] for event in events),
+        lookups.IP_ADDRESSES.ids(conn, (event[2] for event in events)),
+        lookups.USER_AGENTS.ids(conn, (event[3] for event in events)),
+        (event[4] for event in events)
+    )
+    by_month: Dict[str, List[Sequence[Any]]] = {}
+    for row in rows:
+        by_month.setdefault(month_of(row[4]), []).append(row)
+    for month, rows in by_month.items():
+        table = ensure_partition(conn, month)
+        conn.execute(SYNC_SEQUENCE, (table,))
+        conn.executemany(INSERT_EVENT.format(table=table), rows)
+
+
+def partition_legacy_table(conn: sqlite3.Connection):
+    """Move rows of the original ``analytics`` table into monthly partitions.
+
+    Runs as a migration step inside the caller's transaction. Row ids are
+    kept.
+    """
+    conn.execute(CREATE_REGISTRY)
+    lookups.create_tables(conn)
+    if _table_exists(conn, 'analytics'):
+        months = [row[0] for row in conn.execute(
+            "SELECT DISTINCT substr(timestamp, 1, 7) FROM analytics WHERE timestamp IS NOT NULL ORDER BY 1"
+        )]
+        _populate_lookups(conn, 'analytics')
+        for month in months:
+            table = create_partition(conn, month, update_view=False)
+            _copy_encoded(conn, 'analytics', table, 'substr(timestamp, 1, 7) = ?', (month,))
+        # The view takes over the name
+        conn.execute('DROP TABLE analytics')
+    rebuild_view(conn)
+
+
+def encode_partition_strings(conn: sqlite3.Connection):
+    """Rewrite partitions that still store strings to use lookup ids.
+
+    Runs as a migration step inside the caller's transaction.
+    """
+    lookups.create_tables(conn)
+    conn.execute('DROP VIEW IF EXISTS analytics')
+    for partition in live_partitions(conn):
+        table = partition['table']
+        columns = [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+        if 'event_type' not in columns:
+            continue
+        # The indexes keep their names when the table is renamed
+        for index in (f'idx_{table}_timestamp', f'idx_{table}_event_type'):
+            conn.execute(f'DROP INDEX IF EXISTS {index}')
+        conn.execute(f'ALTER TABLE {table} RENAME TO {table}_strings')
+        _populate_lookups(conn, f'{table}_strings')
+        create_partition(conn, partition['month'], update_view=False)
+        _copy_encoded(conn, f'{table}_strings', table)
+        conn.execute(f'DROP TABLE {table}_strings')
+    rebuild_view(conn)
+
+
+def _populate_lookups(conn: sqlite3.Connection, source: str):
+    for lookup, column in ENCODED_COLUMNS:
+        lookup.populate(conn, source, column)
+
+
+def _copy_encoded(conn: sqlite3.Connection, source: str, table: str,
+                  where: str = '1', params: tuple = ()):
+    """Copy rows that store strings from ``source`` into partition ``table``."""
+    conn.execute(f'''
+        INSERT INTO {table} (id, event_type_id, event_data, ip_address_id, user_agent_id, timestamp)
+        SELECT id, {lookups.EVENT_TYPES.id_of('event_type')}, event_data,
+               {lookups.IP_ADDRESSES.id_of('ip_address')}, {lookups.USER_AGENTS.id_of('user_agent')},
+               timestamp
+        FROM {source} WHERE {where}
+    ''', params)
+
+
+def is_partitioned(conn: sqlite3.Connection) -> bool:
+    """Whether the monthly partitions have replaced the ``analytics`` table."""
+    return _table_exists(conn, 'analytics_partitions')
+
+
+def live_partitions(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+    return [{'month': month, 'table': table} for month, table in conn.execute(SELECT_LIVE_PARTITIONS)]
+
+
+def expired_months(conn: sqlite3.Connection, retention_months: int,
+                   now: Optional[datetime] = None) -> List[str]:
+    """Live partitions entirely older than the last ``retention_months`` months."""
+    now = now or datetime.utcnow()
+    index = now.year * 12 + now.month - 1 - retention_months
+    cutoff = f"{index // 12:04d}-{index % 12 + 1:02d}"
+    return [partition['month'] for partition in live_partitions(conn) if partition['month'] <= cutoff]
+
+
+def _archive_path(archive_dir: str, table: str) -> str:
+    """Archive file for ``table``, never overwriting an earlier archive."""
+    path = os.path.join(archive_dir, f"{table}.jsonl.gz")
+    suffix = 1
+    while os.path.exists(path):
+        suffix += 1
+        path = os.path.join(archive_dir, f"{table}.{suffix}.jsonl.gz")
+    return path
+
+
+def export_partition(conn: sqlite3.Connection, table: str, path: str) -> int:
+    """Write every row of ``table`` to a gzip JSON Lines file; returns the row count."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    rows = 0
+    try:
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=9) as f:
+            cursor = conn.execute(SELECT_PARTITION.format(table=table) + ' ORDER BY p.id')
+            for row in cursor:
+                f.write(json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + '\n')
+                rows += 1
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return rows
+
+
+def read_archive(path: str) -> Iterator[Dict[str, Any]]:
+    """Rows of an archive file, as written by ``export_partition``."""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def archive_partition(conn: sqlite3.Connection, month: str, archive_dir: str) -> Dict[str, Any]:
+    """Archive one partition to disk, then drop it."""
+    table = table_for(month)
+    path = _archive_path(archive_dir, table)
+    # Exported before the write lock is taken; the month is over, so its
+    # rows no longer change
+    rows = export_partition(conn, table, path)
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        count = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+        if count != rows:
+            raise RuntimeError(f"{table} changed while it was archived ({rows} exported, {count} now)")
+        conn.execute(MARK_ARCHIVED, (path, rows, month))
+        rebuild_view(conn)
+        conn.execute(f'DROP TABLE {table}')
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        os.unlink(path)
+        raise
+    forget_partitions()
+    logger.info(f"Archived {rows} analytics events from {table} to {path}")
+    return {'month': month, 'table': table, 'rows': rows, 'path': path}
+
+
+def reclaim_space(conn: sqlite3.Connection, max_pages: int = 0) -> int:
+    """Return free pages to the filesystem; returns how many were freed.
+
+    Databases created before incremental auto-vacuum was enabled need one
+    full VACUUM to switch over, which rewrites the whole file.
+    """
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+        logger.info("Enabling incremental auto-vacuum (one-time full VACUUM)")
+        before = conn.execute('PRAGMA page_count').fetchone()[0]
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+        return before - conn.execute('PRAGMA page_count').fetchone()[0]
+
+    free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    # Frees one page per step; execute() stops after the first step, while
+    # executescript() runs the statement to completion
+    conn.executescript(f'PRAGMA incremental_vacuum({int(max_pages)})')
+    return free_pages - conn.execute('PRAGMA freelist_count').fetchone()[0]
+
+
+def archive_expired(conn: sqlite3.Connection, retention_months: int, archive_dir: str,
+                    vacuum_pages: int = 0, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Archive and drop every expired partition, then reclaim the space."""
+    archived = [archive_partition(conn, month, archive_dir)
+                for month in expired_months(conn, retention_months, now)]
+    if archived:
+        freed = reclaim_space(conn, vacuum_pages)
+        logger.info(f"Reclaimed {freed} pages after archiving {len(archived)} partitions")
+    return archived
+
+
+if __name__ == '__main__':
+    import migrations
+
+    parser = argparse.ArgumentParser(description='Manage monthly analytics partitions.')
+    parser.add_argument('command', choices=['status', 'archive'])
+    parser.add_argument('--retention-months', type=int,
+                        default=int(os.getenv('ANALYTICS_RETENTION_MONTHS', '12')),
+                        help='months of events kept in the database (default: %(default)s)')
+    parser.add_argument('--archive-dir', default=os.getenv('ANALYTICS_ARCHIVE_DIR', 'analytics_archive'))
+    parser.add_argument('--vacuum-pages', type=int, default=0,
+                        help='limit on pages freed per run; 0 frees all (default: %(default)s)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    connection = database.connect(isolation_level=None)
+    try:
+        migrations.migrate(connection)
+        if args.command == 'status':
+            expired = set(expired_months(connection, args.retention_months))
+            for partition in live_partitions(connection):
+                count = connection.execute(f"SELECT COUNT(*) FROM {partition['table']}").fetchone()[0]
+                state = 'expired' if partition['month'] in expired else 'live'
+                print(f"{partition['month']}  {partition['table']:<18} {count:>10} rows  {state}")
+            for month, path, rows in connection.execute(
+                'SELECT month, archive_path, archived_rows FROM analytics_partitions '
+                'WHERE archived_at IS NOT NULL ORDER BY month'
+            ):
+                print(f"{month}  archived: {rows} rows in {path}")
+        else:
+            archived = archive_expired(connection, args.retention_months, args.archive_dir, args.vacuum_pages)
+            print(f"Archived {len(archived)} partitions")
+    finally:
+        connection.close()
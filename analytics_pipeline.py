@@ -0,0 +1,155 @@
+"""
+Analytics Ingestion Pipeline
+Buffers analytics events in memory and writes them to SQLite in batches.
+Request handlers only enqueue; a single flusher thread drains the queue
+with ``executemany`` in one transaction every ``batch_size`` events or
+``flush_interval`` seconds, whichever comes first, and updates the hourly
+rollups in the same transaction. Events go to their monthly partition
+(see analytics_partitions.py).
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import analytics_partitions
+import database
+import rollups
+
+logger = logging.getLogger(__name__)
+
+# (event_type, event_data_json, ip_address, user_agent, timestamp)
+AnalyticsEvent = Tuple[str, Optional[str], Optional[str], str, str]
+
+
+class AnalyticsBuffer:
+    """Bounded in-process queue of analytics events with a background flusher.
+
+    When the queue is full new events are rejected and counted as dropped,
+    so a burst of traffic never blocks a request thread on the database.
+    """
+
+    def __init__(self, max_queue: int = 10000, batch_size: int = 200,
+                 flush_interval: float = 0.5):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue: 'queue.Queue[AnalyticsEvent]' = queue.Queue(maxsize=max_queue)
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._counters = {
+            'accepted': 0,
+            'dropped': 0,
+            'written': 0,
+            'batches': 0,
+            'failed': 0
+        }
+
+    def submit(self, event: AnalyticsEvent) -> bool:
+        """Queue one event. Returns False if the buffer is full."""
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('accepted')
+        return True
+
+    def submit_many(self, events: Iterable[AnalyticsEvent]) -> int:
+        """Queue several events, returning how many were accepted."""
+        accepted = 0
+        for event in events:
+            if not self.submit(event):
+                break
+            accepted += 1
+        return accepted
+
+    def depth(self) -> int:
+        """Number of events waiting to be written."""
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, int]:
+        """Return buffer counters."""
+        with self._lock:
+            stats = dict(self._counters)
+        stats['queued'] = self.depth()
+        return stats
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def start(self):
+        """Start the flusher thread."""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='analytics-flusher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the flusher after writing everything still queued."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        conn = database.connect()
+        try:
+            while not self._stopping.is_set():
+                batch = self._collect()
+                if batch:
+                    self._write(conn, batch)
+
+            # Drain whatever arrived before shutdown
+            while True:
+                batch = self._drain(self.batch_size)
+                if not batch:
+                    break
+                self._write(conn, batch)
+        finally:
+            conn.close()
+
+    def _collect(self) -> List[AnalyticsEvent]:
+        """Wait for the first event, then gather more until the batch or interval fills."""
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self, limit: int) -> List[AnalyticsEvent]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, conn, batch: List[AnalyticsEvent]):
+        try:
+            with conn:
+                analytics_partitions.insert_events(conn, batch)
+                rollups.record_analytics_events(conn, batch)
+        except Exception as e:
+            self._count('failed', len(batch))
+            logger.error(f"Failed to write {len(batch)} analytics events: {str(e)}")
+            return
+        self._count('written', len(batch))
+        self._count('batches')
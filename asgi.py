@@ -0,0 +1,364 @@
+"""
+ASGI Application
+Async entry point for the API routes: /api/contact, /api/analytics,
+/api/analytics/batch, /api/newsletter/subscribe, /api/stats and /health.
+The handlers share their implementation with the Flask views in
+server.py. Database work runs on a bounded thread pool, so a request
+waiting on SQLite holds a pool slot instead of a server thread and one
+process can keep thousands of requests in flight. Queued mail is sent
+with aiosmtplib on the event loop when it is installed.
+
+Responses match the Flask app's byte for byte, CORS, HEAD, OPTIONS and
+405 responses included; tests/test_asgi_parity.py checks every route.
+
+Usage::
+
+    uvicorn asgi:app --port 5000      # or: python asgi.py serve
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from flask_cors.core import get_cors_headers, get_cors_options
+from limits import parse_many
+from werkzeug.datastructures import Headers, HeaderSet
+from werkzeug.exceptions import MethodNotAllowed
+
+import rate_limits
+import server
+from sampling_profiler import ActiveRequest
+
+try:
+    import aiosmtplib
+except ImportError:
+    aiosmtplib = None
+
+logger = logging.getLogger(__name__)
+
+ASGI_CONFIG = {
+    'db_workers': int(os.getenv('ASGI_DB_WORKERS', '16')),
+    'max_pending': int(os.getenv('ASGI_MAX_PENDING', '1000')),
+    'max_body_size': int(os.getenv('ASGI_MAX_BODY_SIZE', str(1024 * 1024)))
+}
+
+JSON_HEADERS = [(b'content-type', b'application/json')]
+
+
+# Profile of the request being handled, so work on pool threads is
+# sampled into it
+current_profile: ContextVar[Optional[ActiveRequest]] = ContextVar('current_profile', default=None)
+
+
+class BoundedExecutor:
+    """Thread pool for blocking work with a cap on queued calls.
+
+    Callers beyond ``max_pending`` wait on the event loop instead of
+    growing the pool's queue without bound.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='asgi-db')
+        self._slots = asyncio.Semaphore(max_pending)
+
+    async def run(self, func: Callable, *args) -> Any:
+        profile = current_profile.get()
+        if profile is not None:
+            args = (profile, func, *args)
+            func = server.profiler.call
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+class ASGIRequest:
+    """The parts of an HTTP request the API handlers need."""
+
+    def __init__(self, scope: Dict[str, Any], body: bytes):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.headers = {
+            name.decode('latin-1').lower(): value.decode('latin-1')
+            for name, value in scope.get('headers', [])
+        }
+        self.body = body
+        client = scope.get('client')
+        self.client = server.ClientInfo(
+            client[0] if client else None,
+            self.headers.get('user-agent', ''),
+            self.headers.get('referer', ''),
+            self.headers.get('idempotency-key')
+        )
+
+    def json(self) -> Any:
+        """The decoded JSON body, or None if it is missing, invalid or not sent as JSON.
+
+        Like Flask's ``request.get_json(silent=True)``, only bodies declared
+        as ``application/json`` or ``application/*+json`` are parsed.
+        """
+        mimetype = self.headers.get('content-type', '').split(';', 1)[0].strip().lower()
+        if not (mimetype == 'application/json'
+                or (mimetype.startswith('application/') and mimetype.endswith('+json'))):
+            return None
+        try:
+            return json.loads(self.body) if self.body else None
+        except ValueError:
+            return None
+
+
+Handler = Callable[[ASGIRequest, BoundedExecutor], Awaitable[Tuple[int, bytes, List[Tuple[bytes, bytes]]]]]
+
+
+def json_body(payload: Dict[str, Any]) -> bytes:
+    # Byte for byte what jsonify() sends outside debug mode: compact, with a trailing newline
+    return f"{server.app.json.dumps(payload, separators=(',', ':'))}\n".encode('utf-8')
+
+
+def error(status: int, message: str) -> Tuple[int, bytes, List[Tuple[bytes, bytes]]]:
+    return status, json_body({'success': False, 'message': message}), JSON_HEADERS
+
+
+def json_route(process: Callable[[Any, server.ClientInfo], Tuple[Dict[str, Any], int]]) -> Handler:
+    """Handler running one of server.py's ``process_*`` functions on the executor."""
+    async def handle(request: ASGIRequest, executor: BoundedExecutor):
+        payload, status = await executor.run(process, request.json(), request.client)
+        return status, json_body(payload), JSON_HEADERS
+    return handle
+
+
+def cached_route(key: str, ttl_setting: str, build: Callable[[], Tuple[Dict[str, Any], int]]) -> Handler:
+    """Handler serving a cached JSON response with ETag revalidation."""
+    async def handle(request: ASGIRequest, executor: BoundedExecutor):
+        entry, payload, status = await executor.run(
+            server.load_cached_json, key, server.CACHE_CONFIG[ttl_setting], build
+        )
+        if entry is None:
+            return status, json_body(payload), JSON_HEADERS
+
+        body, etag = entry
+        headers = [(b'etag', f'"{etag}"'.encode('ascii')), (b'cache-control', b'no-cache')]
+        if_none_match = request.headers.get('if-none-match', '')
+        if if_none_match.strip() == '*' or f'"{etag}"' in if_none_match:
+            return 304, b'', headers
+        return 200, body, JSON_HEADERS + headers
+    return handle
+
+
+# path -> (method, endpoint name used for rate limits, handler)
+ROUTES: Dict[str, Tuple[str, str, Handler]] = {
+    '/health': ('GET', 'health_check', cached_route('health', 'health_ttl', server.build_health)),
+    '/api/stats': ('GET', 'get_stats', cached_route('stats', 'stats_ttl', server.build_stats)),
+    '/api/contact': ('POST', 'handle_contact_form', json_route(server.process_contact_submission)),
+    '/api/analytics': ('POST', 'track_analytics', json_route(server.process_analytics_event)),
+    '/api/analytics/batch': ('POST', 'track_analytics_batch', json_route(server.process_analytics_batch)),
+    '/api/newsletter/subscribe': ('POST', 'subscribe_newsletter',
+                                  json_route(server.process_newsletter_subscription))
+}
+
+# Flask-CORS options of the Flask app, so both apps send the same CORS headers
+CORS_OPTIONS = get_cors_options(server.app, {'origins': server.CORS_ORIGINS})
+
+
+def cors_headers(scope: Dict[str, Any]) -> List[Tuple[bytes, bytes]]:
+    """The CORS headers Flask-CORS adds to the Flask app's response to a request."""
+    request_headers = Headers([(name.decode('latin-1'), value.decode('latin-1'))
+                               for name, value in scope.get('headers', [])])
+    headers = get_cors_headers(CORS_OPTIONS, request_headers, scope['method'])
+    return [(name.lower().encode('latin-1'), str(value).encode('latin-1'))
+            for name, value in headers.items(multi=True)]
+
+
+def allowed_methods(path: str, method: str) -> bytes:
+    """The Allow header of the Flask app's 405 response."""
+    try:
+        server.app.url_map.bind('localhost').match(path, method)
+    except MethodNotAllowed as e:
+        return ', '.join(e.valid_methods or []).encode('ascii')
+    return b''
+
+
+def options_response(path: str) -> Tuple[int, bytes, List[Tuple[bytes, bytes]]]:
+    """Flask's automatic OPTIONS response: the methods the path allows."""
+    allowed = HeaderSet(server.app.url_map.bind('localhost').allowed_methods(path))
+    return 200, b'', [(b'content-type', b'text/html; charset=utf-8'),
+                      (b'allow', allowed.to_header().encode('ascii'))]
+
+
+ROUTE_RATE_LIMITS = {
+    endpoint: parse_many(limit) for endpoint, limit in server.API_RATE_LIMITS.items()
+}
+
+
+def within_rate_limits(endpoint: str, client: server.ClientInfo) -> bool:
+    """Charge the route's limits (or the defaults) against the shared storage."""
+    if not server.limiter.enabled:
+        return True
+    items = ROUTE_RATE_LIMITS.get(endpoint, server.DEFAULT_RATE_LIMITS)
+    identifiers = server.rate_limit_identifiers(endpoint, client.ip_address)
+    return rate_limits.hit_all(server.limiter.limiter, items, identifiers) is None
+
+
+async def deliver_emails_async(messages: List[Dict[str, Any]]) -> List[Optional[str]]:
+    """Deliver a batch of queued emails over one aiosmtplib session."""
+    config = server.EMAIL_CONFIG
+    smtp = aiosmtplib.SMTP(hostname=config['smtp_server'], port=config['smtp_port'],
+                           start_tls=config['use_tls'], timeout=30)
+    try:
+        await smtp.connect()
+        # Same rule as SMTPConnectionPool: log in only if the server offers AUTH
+        if config['password'] and smtp.supports_extension('auth'):
+            await smtp.login(config['email'], config['password'])
+    except (aiosmtplib.SMTPException, OSError) as e:
+        return [str(e)] * len(messages)
+
+    results = []
+    try:
+        for message in messages:
+            try:
+                await smtp.send_message(server.build_mime_message(message))
+                results.append(None)
+            except aiosmtplib.SMTPException as e:
+                results.append(str(e))
+    finally:
+        try:
+            await smtp.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            pass
+    return results
+
+
+class PortfolioASGI:
+    """ASGI callable for the API routes."""
+
+    def __init__(self):
+        self.executor: Optional[BoundedExecutor] = None
+        self._mail_task: Optional[asyncio.Task] = None
+        self._startup_lock = asyncio.Lock()
+
+    async def startup(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, server.init_database)
+        self.executor = BoundedExecutor(ASGI_CONFIG['db_workers'], ASGI_CONFIG['max_pending'])
+        server.analytics_buffer.start()
+        if server.PROFILER_CONFIG['enabled']:
+            server.profiler.start()
+        if aiosmtplib is not None:
+            self._mail_task = asyncio.create_task(server.mail_queue.run_async(deliver_emails_async))
+        else:
+            server.mail_queue.start()
+
+    async def shutdown(self):
+        server.mail_queue.stop()
+        if self._mail_task is not None:
+            await self._mail_task
+            self._mail_task = None
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        await asyncio.get_running_loop().run_in_executor(None, server.stop_background_services)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await self.startup()
+                except Exception as e:
+                    logger.error(f"ASGI startup failed: {str(e)}")
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_body(self, receive) -> Optional[bytes]:
+        """Request body, or None if it exceeds the size limit."""
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > ASGI_CONFIG['max_body_size']:
+                return None
+            chunks.append(chunk)
+            if not message.get('more_body', False):
+                break
+        return b''.join(chunks)
+
+    async def _http(self, scope, receive, send):
+        if self.executor is None:
+            # Servers without lifespan support
+            async with self._startup_lock:
+                if self.executor is None:
+                    await self.startup()
+
+        status, body, headers = await self._respond(scope, receive)
+        headers = headers + cors_headers(scope) + [(b'content-length', str(len(body)).encode('ascii'))]
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        # HEAD responses carry the GET response's headers without its body
+        await send({'type': 'http.response.body', 'body': b'' if scope['method'] == 'HEAD' else body})
+
+    async def _respond(self, scope, receive) -> Tuple[int, bytes, List[Tuple[bytes, bytes]]]:
+        route = ROUTES.get(scope['path'])
+        if route is None:
+            return error(404, 'Endpoint not found')
+        method, endpoint, handler = route
+        if scope['method'] == 'OPTIONS':
+            return options_response(scope['path'])
+        if scope['method'] != method and not (scope['method'] == 'HEAD' and method == 'GET'):
+            status, body, headers = error(405, 'Method not allowed')
+            return status, body, headers + [(b'allow', allowed_methods(scope['path'], scope['method']))]
+
+        body = await self._read_body(receive)
+        if body is None:
+            return error(413, 'Request body too large')
+        request = ASGIRequest(scope, body)
+        # One profile for the whole request, however many pool calls it makes
+        profile = server.profiler.open(f"{method} {request.path}", request.path)
+        current_profile.set(profile)
+
+        try:
+            if not await self.executor.run(within_rate_limits, endpoint, request.client):
+                logger.info(f"Rate limit exceeded at endpoint: {endpoint}")
+                return error(429, 'Rate limit exceeded. Please try again later.')
+            return await handler(request, self.executor)
+        except Exception as e:
+            logger.error(f"ASGI handler error on {request.path}: {str(e)}")
+            return error(500, 'Internal server error')
+        finally:
+            server.profiler.close(profile)
+
+
+app = PortfolioASGI()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the ASGI API app.')
+    parser.add_argument('command', choices=['serve'])
+    parser.add_argument('--host', default=os.getenv('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', 5000)))
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        parser.exit(1, 'uvicorn is not installed (pip install ".[asgi]")\n')
+    uvicorn.run(app, host=args.host, port=args.port)
@@ -0,0 +1,125 @@
+"""
+Lookup Storage
+Compares analytics storage with the strings inline in every row against
+the lookup-id layout: database size per row, batch insert time and a
+GROUP BY over event types. The events repeat a small set of user agents,
+IP addresses and event types, as real traffic does.
+
+Usage::
+
+    python benchmarks/lookup_storage.py [--events 200000] [--batch-size 500]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics_partitions
+import database
+import lookups
+
+INLINE_TABLE = '''
+    CREATE TABLE analytics_inline (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_type TEXT NOT NULL,
+        event_data TEXT,
+        ip_address TEXT,
+        user_agent TEXT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+USER_AGENTS = [
+    f'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    f'Chrome/{version}.0.0.0 Safari/537.36' for version in range(100, 140)
+] + [
+    f'Mozilla/5.0 (iPhone; CPU iPhone OS 17_{minor} like Mac OS X) AppleWebKit/605.1.15 '
+    f'(KHTML, like Gecko) Version/17.{minor} Mobile/15E148 Safari/604.1' for minor in range(10)
+]
+
+EVENT_TYPES = ['page_view', 'section_view', 'project_click', 'video_play', 'contact_form_open',
+               'contact_form_submission', 'scroll_depth', 'gallery_open']
+
+
+def make_events(count):
+    rng = random.Random(42)
+    ips = [f'203.0.{rng.randrange(256)}.{rng.randrange(256)}' for _ in range(2000)]
+    return [(
+        rng.choice(EVENT_TYPES),
+        None,
+        rng.choice(ips),
+        rng.choice(USER_AGENTS),
+        f'2026-10-{1 + i * 28 // count:02d} 12:00:00'
+    ) for i in range(count)]
+
+
+def db_bytes(conn):
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    return conn.execute('PRAGMA page_count').fetchone()[0] * conn.execute('PRAGMA page_size').fetchone()[0]
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def run(path, events, batch_size, encoded):
+    conn = database.connect(path)
+    batches = [events[i:i + batch_size] for i in range(0, len(events), batch_size)]
+    if encoded:
+        conn.execute(analytics_partitions.CREATE_REGISTRY)
+        lookups.create_tables(conn)
+        conn.commit()
+        for table in lookups.TABLES:
+            table.clear_cache()
+        analytics_partitions.forget_partitions()
+
+        def insert():
+            for batch in batches:
+                with conn:
+                    analytics_partitions.insert_events(conn, batch)
+        # Grouped on ids, as rollups.py does, with the names joined per group
+        group_by = '''
+            SELECT e.value, c.count
+            FROM (SELECT event_type_id, COUNT(*) AS count FROM analytics_202610 GROUP BY 1) c
+            JOIN event_types e ON e.id = c.event_type_id
+        '''
+    else:
+        conn.execute(INLINE_TABLE)
+        conn.execute('CREATE INDEX idx_inline_event_type ON analytics_inline (event_type, timestamp)')
+
+        def insert():
+            for batch in batches:
+                with conn:
+                    conn.executemany(
+                        'INSERT INTO analytics_inline (event_type, event_data, ip_address, user_agent, timestamp) '
+                        'VALUES (?, ?, ?, ?, ?)', batch)
+        group_by = 'SELECT event_type, COUNT(*) FROM analytics_inline GROUP BY event_type'
+
+    insert_seconds = timed(insert)
+    size = db_bytes(conn)
+    group_seconds = min(timed(lambda: conn.execute(group_by).fetchall()) for _ in range(5))
+    conn.close()
+    return insert_seconds, size, group_seconds
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark lookup-id storage of analytics events.')
+    parser.add_argument('--events', type=int, default=200000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    events = make_events(args.events)
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, encoded in (('inline strings', False), ('lookup ids', True)):
+            insert_seconds, size, group_seconds = run(os.path.join(tmp, f'{encoded}.db'), events,
+                                                      args.batch_size, encoded)
+            print(f"{label:<16} {size / args.events:7.1f} bytes/event   "
+                  f"insert {args.events / insert_seconds:9.0f} events/s   "
+                  f"GROUP BY event_type {group_seconds * 1000:7.1f} ms")
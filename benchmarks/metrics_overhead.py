@@ -0,0 +1,101 @@
+"""
+Metrics Overhead
+Measures the time request instrumentation adds: the recording primitives
+on their own, the before/after request hooks with and without the access
+log line, and full requests through the Flask app with metrics switched
+on and off.
+
+Usage::
+
+    python benchmarks/metrics_overhead.py [--requests 20000]
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def report(name, samples):
+    print(f"{name:<44} mean {statistics.mean(samples) * 1e6:8.2f} us"
+          f"   p50 {percentile(samples, 0.5) * 1e6:8.2f} us"
+          f"   p99 {percentile(samples, 0.99) * 1e6:8.2f} us")
+
+
+def time_calls(func, count):
+    samples = []
+    for i in range(count):
+        start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_primitives(count):
+    registry = metrics.Registry()
+    histogram = registry.histogram('bench_seconds', 'bench', ['method', 'route'])
+    counter = registry.counter('bench_total', 'bench', ['method', 'route', 'status'])
+    phases = registry.histogram('bench_phase_seconds', 'bench', ['phase'])
+
+    report('Histogram.observe', time_calls(lambda i: histogram.observe(0.003, ('GET', '/health')), count))
+    report('Counter.inc', time_calls(lambda i: counter.inc(('GET', '/health', '200')), count))
+    timer = metrics.PhaseTimer(phases)
+    report('PhaseTimer.lap', time_calls(lambda i: timer.lap('validation'), count))
+
+
+def bench_hooks(count):
+    """The per-request hooks, run inside a request context."""
+    os.environ.setdefault('RATE_LIMIT_STORAGE_URI', 'memory://')
+    import server
+
+    response = server.app.response_class('{}', mimetype='application/json')
+    with server.app.test_request_context('/api/contact', method='POST', data='{"a": 1}',
+                                         content_type='application/json'):
+        from flask import request
+        request.url_rule = server.app.url_map.bind('localhost').match(
+            '/api/contact', method='POST', return_rule=True)[0]
+
+        def hooks(i):
+            server.start_request_timer()
+            server.record_request_metrics(response)
+
+        for access_log in (False, True):
+            server.access_logger.setLevel(logging.INFO if access_log else logging.WARNING)
+            report(f"request hooks, access log {'on' if access_log else 'off'}", time_calls(hooks, count))
+        server.access_logger.setLevel(logging.NOTSET)
+
+
+def bench_requests(count):
+    """Full /health requests with and without instrumentation."""
+    import server
+
+    server.limiter.enabled = False
+    client = server.app.test_client()
+    results = {}
+    for enabled in (False, True, False, True):
+        server.METRICS_CONFIG['enabled'] = enabled
+        results.setdefault(enabled, []).extend(time_calls(lambda i: client.get('/health'), count // 2))
+    for enabled in (False, True):
+        report(f"GET /health, metrics {'on' if enabled else 'off'}", results[enabled])
+    print(f"{'difference in mean':<44} {(statistics.mean(results[True]) - statistics.mean(results[False])) * 1e6:8.2f} us")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark request instrumentation overhead.')
+    parser.add_argument('--requests', type=int, default=20000)
+    args = parser.parse_args()
+
+    bench_primitives(args.requests)
+    bench_hooks(args.requests)
+    bench_requests(args.requests)
@@ -0,0 +1,146 @@
+"""
+Profiler Overhead
+Measures what the sampling profiler costs: one sample against a growing
+number of busy request threads, and request throughput and latency
+through the Flask app from several client threads with the profiler off
+and on. With the profiler on it also reports the share of wall-clock time
+spent sampling and the interval the overhead budget settled on.
+
+Results use the benchmark suite's format; ``--output`` writes them as a
+suite results file, which ``suite.py --compare`` can read.
+
+Usage::
+
+    python benchmarks/profiler_overhead.py [--requests 5000] [--threads 8] [--output FILE]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sampling_profiler import SamplingProfiler
+from suite import print_result, save_results, summarize
+
+
+def nested(depth, stop):
+    if depth:
+        return nested(depth - 1, stop)
+    while not stop.wait(0.001):
+        pass
+
+
+def bench_sample_cost(count):
+    """One sample with N request threads, each 40 frames deep."""
+    results = {}
+    for threads in (1, 8, 32):
+        # Started only so that begin() registers threads; it never wakes
+        profiler = SamplingProfiler(interval=3600)
+        profiler.start()
+        stop = threading.Event()
+        workers = []
+        for i in range(threads):
+            thread = threading.Thread(target=lambda: (profiler.begin('GET /bench', '/bench'), nested(40, stop)))
+            thread.start()
+            workers.append(thread)
+        time.sleep(0.05)
+
+        own_ident = threading.get_ident()
+        samples = []
+        started = time.perf_counter()
+        for i in range(count):
+            start = time.perf_counter()
+            profiler._sample(own_ident)
+            samples.append(time.perf_counter() - start)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        for thread in workers:
+            thread.join()
+        profiler.stop()
+        name = f"profiler.sample.{threads}_threads"
+        results[name] = summarize(samples, elapsed)
+        print_result(name, results[name])
+    return results
+
+
+def load(client, count, threads):
+    """Send ``count`` requests from ``threads`` threads; latencies and wall time."""
+    latencies = []
+
+    def worker():
+        own = []
+        for i in range(count // threads):
+            start = time.perf_counter()
+            client.get('/api/stats')
+            own.append(time.perf_counter() - start)
+        latencies.extend(own)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return latencies, time.perf_counter() - started
+
+
+def bench_requests(count, threads):
+    """GET /api/stats under concurrent load, profiler off and on."""
+    os.environ.setdefault('RATE_LIMIT_STORAGE_URI', 'memory://')
+    # Registers the request hooks; they return at once while the sampler is stopped
+    os.environ['PROFILER_ENABLED'] = 'true'
+    import server
+
+    server.init_database()
+    server.limiter.enabled = False
+    server.access_logger.setLevel(logging.WARNING)
+    server.CACHE_CONFIG['stats_ttl'] = 0
+    client = server.app.test_client()
+    load(client, count // 10, threads)
+
+    # Alternate the settings so drift in the machine's load is shared
+    latencies, elapsed, stats = {}, {}, {}
+    for interval in (None, 0.01, 0.001) * 2:
+        if interval is not None:
+            server.profiler.interval = interval
+            server.profiler.start()
+        run_latencies, run_elapsed = load(client, count // 2, threads)
+        latencies.setdefault(interval, []).extend(run_latencies)
+        elapsed[interval] = elapsed.get(interval, 0.0) + run_elapsed
+        if interval is not None:
+            stats[interval] = server.profiler.stats()
+            server.profiler.stop()
+
+    results = {}
+    baseline = summarize(latencies[None], elapsed[None])
+    results['profiler.stats.off'] = baseline
+    print_result('profiler.stats.off', baseline)
+    for interval in (0.01, 0.001):
+        name = f"profiler.stats.every_{interval * 1000:g}ms"
+        result = summarize(latencies[interval], elapsed[interval])
+        result['sampling_overhead'] = stats[interval]['overhead']
+        result['effective_interval_ms'] = stats[interval]['effective_interval_ms']
+        results[name] = result
+        print_result(name, result)
+        print(f"{'  throughput change':<34} {(result['throughput'] / baseline['throughput'] - 1) * 100:+11.1f}%"
+              f"   sampling {result['sampling_overhead'] * 100:.2f} %"
+              f" of budget {stats[interval]['max_overhead'] * 100:g} %"
+              f"   interval {result['effective_interval_ms']:g} ms")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark sampling profiler overhead.')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--output', help='also write the results as a suite results file')
+    args = parser.parse_args()
+
+    results = bench_sample_cost(1000)
+    results.update(bench_requests(args.requests, args.threads))
+    if args.output:
+        save_results(results, {'requests': args.requests, 'threads': args.threads}, args.output)
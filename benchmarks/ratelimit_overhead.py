@@ -0,0 +1,85 @@
+"""
+Rate Limiter Overhead
+Measures the time the rate limiter adds to each request: the storage
+operations on their own and full requests through the Flask app, for the
+in-process memory storage and the shared SQLite storage.
+
+Usage::
+
+    python benchmarks/ratelimit_overhead.py [--requests 2000]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from limits import parse_many
+from limits.storage import storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+
+import rate_limits
+
+DEFAULT_LIMITS = '200 per day; 50 per hour'
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def report(name, samples):
+    print(f"{name:<44} mean {statistics.mean(samples) * 1e6:8.1f} us"
+          f"   p50 {percentile(samples, 0.5) * 1e6:8.1f} us"
+          f"   p99 {percentile(samples, 0.99) * 1e6:8.1f} us")
+
+
+def time_calls(func, count):
+    samples = []
+    for i in range(count):
+        start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_storage(uri, count):
+    """Per-request cost of checking the default limit pair."""
+    strategy = SlidingWindowCounterRateLimiter(storage_from_string(uri))
+    items = parse_many(DEFAULT_LIMITS)
+    # A distinct client per call keeps every check under its limit
+    report(f"{uri.split('://')[0]}: one hit per limit",
+           time_calls(lambda i: [strategy.hit(item, f"client{i}", 'bench') for item in items], count))
+    report(f"{uri.split('://')[0]}: hit_all (one check)",
+           time_calls(lambda i: rate_limits.hit_all(strategy, items, [f"other{i}", 'bench']), count))
+
+
+def bench_requests(uri, count):
+    """Full /health requests with and without the limiter."""
+    os.environ['RATE_LIMIT_STORAGE_URI'] = uri
+    import server
+
+    client = server.app.test_client()
+    for enabled in (False, True):
+        server.limiter.enabled = enabled
+        samples = time_calls(
+            lambda i: client.get('/health', environ_base={'REMOTE_ADDR': f"10.0.{i // 250}.{i % 250}"}),
+            count
+        )
+        report(f"{uri.split('://')[0]}: GET /health, limiter {'on' if enabled else 'off'}", samples)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark rate limiter overhead per request.')
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_uri = f"sqlite:///{os.path.join(tmp, 'ratelimits.db')}"
+        for uri in ('memory://', sqlite_uri):
+            bench_storage(uri, args.requests)
+        bench_requests(sqlite_uri, args.requests)
@@ -0,0 +1,384 @@
+"""
+Benchmark Suite
+Micro-benchmarks of the request helpers and load scenarios against a real
+waitress instance, all local: the server runs on a loopback port with a
+throwaway database and delivers mail to an in-process SMTP sink.
+
+Micro-benchmarks: ``sanitize_input``, ``validate_email`` and building the
+JSON responses. Load scenarios: contact form submissions (including mail
+delivery), analytics bursts, stats polling and static asset fetches.
+
+Every result reports p50/p95/p99 latency and throughput, and the whole run
+is written as JSON. Comparing a run with an earlier one flags regressions
+and exits non-zero.
+
+Usage::
+
+    python benchmarks/suite.py [micro|load|all] [--duration 5] [--concurrency 8]
+    python benchmarks/suite.py all --compare benchmarks/results/<earlier run>.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from smtp_sink import SMTPSink
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+CONTACT_PAYLOAD = {
+    'name': 'Load Test',
+    'email': 'load.test@example.com',
+    'company': 'Benchmarks <b>Inc</b>',
+    'projectType': 'web-development',
+    'budget': '5k-10k',
+    'timeline': '1-month',
+    'message': 'Hello! ' * 40,
+    'newsletter': False
+}
+
+STATIC_PATHS = [
+    '/',
+    '/styles/main.css',
+    '/styles/animations.css',
+    '/js/main.js',
+    '/js/gallery.js',
+    '/data/projects.js'
+]
+
+
+def summarize(samples: List[float], elapsed: float, errors: int = 0) -> Dict[str, float]:
+    """Latency percentiles in milliseconds and throughput per second."""
+    ordered = sorted(samples)
+
+    def percentile(fraction):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+    return {
+        'count': len(ordered),
+        'errors': errors,
+        'throughput': len(ordered) / elapsed if elapsed else 0.0,
+        'mean_ms': statistics.mean(ordered) * 1000,
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'max_ms': ordered[-1] * 1000
+    }
+
+
+def print_result(name: str, result: Dict[str, float]):
+    unit = 'us' if result['p99_ms'] < 1 else 'ms'
+    scale = 1000 if unit == 'us' else 1
+    errors = f"   errors {result['errors']}" if result['errors'] else ''
+    print(f"{name:<34} {result['throughput']:>11.0f}/s"
+          f"   p50 {result['p50_ms'] * scale:8.2f} {unit}"
+          f"   p95 {result['p95_ms'] * scale:8.2f} {unit}"
+          f"   p99 {result['p99_ms'] * scale:8.2f} {unit}{errors}")
+
+
+# Micro-benchmarks
+
+def time_batches(func: Callable[[], Any], duration: float, batch: int = 100) -> Dict[str, float]:
+    """Run ``func`` in batches for ``duration`` seconds; samples are per-call batch means."""
+    samples = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        batch_start = time.perf_counter()
+        for _ in range(batch):
+            func()
+        samples.append((time.perf_counter() - batch_start) / batch)
+    elapsed = time.perf_counter() - start
+    result = summarize(samples, elapsed)
+    result['count'] = len(samples) * batch
+    result['throughput'] = result['count'] / elapsed
+    return result
+
+
+def run_micro(duration: float) -> Dict[str, Dict[str, float]]:
+    import server
+
+    tagged = '<script>alert(1)</script>' + 'Plain text with <b>markup</b> and javascript:links. ' * 30
+    cases = {
+        'sanitize_input.short': lambda: server.sanitize_input('Jane Doe', 100),
+        'sanitize_input.long_markup': lambda: server.sanitize_input(tagged, 2000),
+        'validate_email.valid': lambda: server.validate_email('jane.doe+portfolio@example.co.uk'),
+        'validate_email.invalid': lambda: server.validate_email('jane.doe@@example'),
+    }
+
+    success = {
+        'success': True,
+        'message': 'Your message has been sent successfully! I\'ll get back to you within 2 hours.',
+        'submission_id': '2f1b6a9e-4a8e-4d8c-9a57-0c7d1c3f5e21'
+    }
+    stats = {
+        'success': True,
+        'stats': {
+            'total_submissions': 1234,
+            'recent_submissions': 56,
+            'newsletter_subscribers': 789,
+            'popular_project_types': [{'type': f'type-{i}', 'count': 100 - i} for i in range(5)],
+            'recent_analytics_events': 45678,
+            'last_updated': datetime.utcnow().isoformat()
+        }
+    }
+    with server.app.app_context():
+        cases['jsonify.contact_success'] = lambda: server.jsonify(success)
+        cases['jsonify.stats'] = lambda: server.jsonify(stats)
+        cases['json_dumps.stats'] = lambda: server.app.json.dumps(stats)
+
+        results = {}
+        for name, func in cases.items():
+            results[name] = time_batches(func, duration)
+            print_result(name, results[name])
+    return results
+
+
+# Load scenarios
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class ServerProcess:
+    """server.py under waitress on a loopback port with a scratch database."""
+
+    def __init__(self, workdir: str, smtp_port: int):
+        self.port = free_port()
+        self.env = dict(
+            os.environ,
+            HOST='127.0.0.1',
+            PORT=str(self.port),
+            DATABASE_PATH=os.path.join(workdir, 'portfolio.db'),
+            IMAGE_CACHE_DIR=os.path.join(workdir, 'image_cache'),
+            RATE_LIMIT_STORAGE_URI='memory://',
+            RATE_LIMIT_ENABLED='false',
+            SMTP_SERVER='127.0.0.1',
+            SMTP_PORT=str(smtp_port),
+            SMTP_USE_TLS='false',
+            EMAIL_PASSWORD='benchmark'
+        )
+        self.process: Optional[subprocess.Popen] = None
+
+    def start(self, timeout: float = 30.0):
+        self.process = subprocess.Popen([sys.executable, 'server.py'], cwd=ROOT, env=self.env,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {self.process.returncode}")
+            try:
+                status, _ = request_once(self.port, 'GET', '/health')
+                if status == 200:
+                    return
+            except OSError:
+                time.sleep(0.1)
+        raise RuntimeError('Server did not start in time')
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+
+def request_once(port: int, method: str, path: str) -> Tuple[int, bytes]:
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    try:
+        conn.request(method, path)
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+
+# A request is (method, path, body, headers)
+Request = Tuple[str, str, Optional[bytes], Dict[str, str]]
+
+
+def drive(port: int, make_request: Callable[[int], Request], duration: float,
+          concurrency: int) -> Dict[str, float]:
+    """Send requests from ``concurrency`` keep-alive clients for ``duration`` seconds."""
+    samples: List[List[float]] = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    start_barrier = threading.Barrier(concurrency + 1)
+    deadline = [0.0]
+
+    def client(index: int):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        start_barrier.wait()
+        sequence = index
+        while time.perf_counter() < deadline[0]:
+            method, path, body, headers = make_request(sequence)
+            sequence += concurrency
+            started = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    errors[index] += 1
+                if response.will_close:
+                    conn.close()
+            except (OSError, http.client.HTTPException):
+                errors[index] += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            samples[index].append(time.perf_counter() - started)
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(index,), daemon=True) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    deadline[0] = time.perf_counter() + duration
+    started = time.perf_counter()
+    start_barrier.wait()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return summarize([sample for client_samples in samples for sample in client_samples],
+                     elapsed, sum(errors))
+
+
+def json_request(method: str, path: str, payload: Any) -> Request:
+    return method, path, json.dumps(payload).encode('utf-8'), {'Content-Type': 'application/json'}
+
+
+def run_load(duration: float, concurrency: int) -> Dict[str, Dict[str, float]]:
+    sink = SMTPSink()
+    sink.start()
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        server = ServerProcess(workdir, sink.port)
+        server.start()
+        try:
+            scenarios = {
+                # A distinct message per request: repeats would be deduplicated
+                'load.contact': lambda i: json_request('POST', '/api/contact', {
+                    **CONTACT_PAYLOAD, 'message': f"{CONTACT_PAYLOAD['message']}#{i}"
+                }),
+                'load.analytics_burst': lambda i: json_request('POST', '/api/analytics', {
+                    'event_type': 'page_view',
+                    'event_data': {'page': f'/section-{i % 10}', 'sequence': i}
+                }),
+                'load.stats_polling': lambda i: ('GET', '/api/stats', None, {}),
+                'load.static_assets': lambda i: ('GET', STATIC_PATHS[i % len(STATIC_PATHS)], None,
+                                                 {'Accept-Encoding': 'br, gzip'})
+            }
+            for name, make_request in scenarios.items():
+                results[name] = drive(server.port, make_request, duration, concurrency)
+                print_result(name, results[name])
+
+            # Mail is delivered in the background; give the queue time to drain
+            expected = 2 * results['load.contact']['count']
+            deadline = time.monotonic() + 30
+            while sink.messages < expected and time.monotonic() < deadline:
+                time.sleep(0.2)
+            results['load.contact']['mail_delivered'] = sink.messages
+            print(f"{'mail delivered to the SMTP sink':<34} {sink.messages} of {expected}")
+        finally:
+            server.stop()
+            sink.stop()
+    return results
+
+
+# Results
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(results: Dict[str, Dict[str, float]], parameters: Dict[str, Any],
+                 output: Optional[str] = None) -> Dict[str, Any]:
+    """Write a run's results as JSON, by default to benchmarks/results/<time>-<commit>.json."""
+    run = {
+        'commit': git_commit(),
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': parameters,
+        'results': results
+    }
+    output = output or os.path.join(
+        RESULTS_DIR, f"{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}-{run['commit'] or 'unknown'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(run, f, indent=2)
+    print(f"\nResults written to {output}")
+    return run
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Benchmarks whose p50 latency or throughput got worse by more than ``threshold``.
+
+    p99 changes are shown but not counted: on a shared machine they vary
+    too much between runs to fail on.
+    """
+    regressions = []
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} from {baseline.get('timestamp')}:")
+    for name, result in current['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        p50 = result['p50_ms'] / previous['p50_ms'] - 1 if previous['p50_ms'] else 0.0
+        p99 = result['p99_ms'] / previous['p99_ms'] - 1 if previous['p99_ms'] else 0.0
+        throughput = result['throughput'] / previous['throughput'] - 1 if previous['throughput'] else 0.0
+        worse = p50 > threshold or -throughput > threshold
+        print(f"{name:<34} p50 {p50:+7.1%}   p99 {p99:+7.1%}"
+              f"   throughput {throughput:+7.1%}{'   REGRESSION' if worse else ''}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the micro-benchmarks and load scenarios.')
+    parser.add_argument('suite', nargs='?', choices=['micro', 'load', 'all'], default='all')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per benchmark (default: %(default)s)')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent load clients (default: %(default)s)')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<time>-<commit>.json)')
+    parser.add_argument('--compare', metavar='BASELINE', help='earlier results file to compare with')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='relative change counted as a regression (default: %(default)s)')
+    args = parser.parse_args()
+
+    results = {}
+    if args.suite in ('micro', 'all'):
+        # The micro-benchmarks import server.py; keep it away from the real database
+        with tempfile.TemporaryDirectory() as scratch:
+            os.environ.setdefault('DATABASE_PATH', os.path.join(scratch, 'portfolio.db'))
+            os.environ.setdefault('RATE_LIMIT_STORAGE_URI', 'memory://')
+            results.update(run_micro(args.duration))
+    if args.suite in ('load', 'all'):
+        results.update(run_load(args.duration, args.concurrency))
+
+    run = save_results(results, {'duration': args.duration, 'concurrency': args.concurrency}, args.output)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(run, json.load(f), args.threshold)
+        if regressions:
+            sys.exit(f"Regressions: {', '.join(regressions)}")
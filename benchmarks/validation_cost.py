@@ -0,0 +1,105 @@
+"""
+Validation Cost
+Per-request cost of validating and sanitising the contact, newsletter and
+analytics payloads: the schemas in validation.py against the field-by-field
+``re.sub``/``re.match`` calls the handlers used before them, reproduced
+below as the baseline. Timings use the benchmark suite's batching and
+report format.
+
+Usage::
+
+    python benchmarks/validation_cost.py [--duration 2]
+"""
+
+import argparse
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import validation
+from suite import print_result, time_batches
+
+CONTACT = {
+    'name': 'Jane Doe',
+    'email': 'jane.doe+portfolio@example.co.uk',
+    'company': 'Example <b>Studio</b>',
+    'projectType': 'web-development',
+    'budget': '5k-10k',
+    'timeline': '1-month',
+    'message': 'Hi! I would like to talk about a new project: ' + 'details ' * 60,
+    'newsletter': True
+}
+
+NEWSLETTER = {'email': 'jane.doe@example.com', 'name': 'Jane'}
+
+ANALYTICS = {'event_type': 'page_view', 'event_data': {'page': '/projects'}}
+
+
+# Baseline: the previous per-field implementation
+
+def legacy_validate_email(email):
+    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    return re.match(pattern, email) is not None
+
+
+def legacy_sanitize_input(text, max_length=None):
+    if not text:
+        return ""
+    text = re.sub(r'<[^>]*>', '', text)
+    text = re.sub(r'javascript:', '', text, flags=re.IGNORECASE)
+    text = text.strip()
+    if max_length and len(text) > max_length:
+        text = text[:max_length]
+    return text
+
+
+def legacy_contact(data):
+    for field in ['name', 'email', 'message']:
+        if not data.get(field):
+            return None
+    if not legacy_validate_email(data['email']):
+        return None
+    return {
+        'name': legacy_sanitize_input(data['name'], 100),
+        'email': legacy_sanitize_input(data['email'], 255),
+        'company': legacy_sanitize_input(data.get('company', ''), 100),
+        'project_type': legacy_sanitize_input(data.get('projectType', ''), 50),
+        'budget': legacy_sanitize_input(data.get('budget', ''), 50),
+        'timeline': legacy_sanitize_input(data.get('timeline', ''), 50),
+        'message': legacy_sanitize_input(data['message'], 2000),
+        'newsletter': bool(data.get('newsletter', False))
+    }
+
+
+def legacy_newsletter(data):
+    if not data or not data.get('email'):
+        return None
+    email = legacy_sanitize_input(data['email'], 255)
+    name = legacy_sanitize_input(data.get('name', ''), 100)
+    return (email, name) if legacy_validate_email(email) else None
+
+
+def legacy_analytics(data):
+    if not data or not data.get('event_type'):
+        return None
+    return legacy_sanitize_input(data['event_type'], 50), data.get('event_data', {})
+
+
+def compare(name, legacy, schema, payload, duration):
+    before = time_batches(lambda: legacy(payload), duration)
+    after = time_batches(lambda: schema.validate(payload), duration)
+    print_result(f"{name}: previous", before)
+    print_result(f"{name}: schema", after)
+    print(f"{name + ': speed-up':<34} {before['mean_ms'] / after['mean_ms']:>11.2f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark payload validation per request.')
+    parser.add_argument('--duration', type=float, default=2.0, help='seconds per benchmark (default: %(default)s)')
+    args = parser.parse_args()
+
+    compare('contact', legacy_contact, validation.CONTACT_SCHEMA, CONTACT, args.duration)
+    compare('newsletter', legacy_newsletter, validation.NEWSLETTER_SCHEMA, NEWSLETTER, args.duration)
+    compare('analytics', legacy_analytics, validation.ANALYTICS_EVENT_SCHEMA, ANALYTICS, args.duration)
@@ -0,0 +1,132 @@
+"""
+Static Asset Build
+Fingerprints and precompresses the frontend assets so the server can hand
+out compressed bytes without compressing per request and let browsers
+cache them forever.
+
+For every file under styles/, js/ and data/ this writes
+``build/<dir>/<name>.<hash>.<ext>`` plus ``.gz`` and (when the optional
+``brotli`` package is installed) ``.br`` variants, a ``manifest.json``
+mapping source paths to hashed paths, and a copy of index.html with the
+content sections prerendered and the data modules inlined (see
+content.py) and its references rewritten to the hashed names.
+
+Usage::
+
+    python build_assets.py [--out build]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+from typing import Dict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+import content
+
+logger = logging.getLogger(__name__)
+
+SOURCE_DIRS = ['styles', 'js', 'data']
+INDEX_FILE = 'index.html'
+BUILD_DIR = os.getenv('BUILD_DIR', 'build')
+MANIFEST_NAME = 'manifest.json'
+
+# Precompressed variants, in server preference order
+ENCODINGS = {'br': '.br', 'gzip': '.gz'}
+
+HASH_LENGTH = 10
+
+
+def fingerprint(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(path: str, digest: str) -> str:
+    """styles/main.css -> styles/main.<digest>.css"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{digest}{ext}"
+
+
+def write_variants(out_path: str, data: bytes):
+    """Write a file along with its gzip and brotli variants."""
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    with open(out_path, 'wb') as f:
+        f.write(data)
+
+    # mtime=0 keeps the gzip output byte-for-byte reproducible
+    with open(out_path + ENCODINGS['gzip'], 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+
+    if brotli is not None:
+        with open(out_path + ENCODINGS['br'], 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+
+
+def rewrite_references(html: str, manifest: Dict[str, str]) -> str:
+    """Point href/src attributes at the hashed asset names."""
+    def replace(match):
+        path = match.group(3)
+        if path not in manifest:
+            return match.group(0)
+        return f'{match.group(1)}="{match.group(2) or ""}{manifest[path]}"'
+
+    return re.sub(r'\b(href|src)="(\./|/)?([^"#?]+)"', replace, html)
+
+
+def build(root: str = '.', out_dir: str = BUILD_DIR) -> Dict[str, str]:
+    """Build every asset and return the manifest."""
+    out_root = os.path.join(root, out_dir)
+    if os.path.isdir(out_root):
+        shutil.rmtree(out_root)
+
+    manifest = {}
+    for source_dir in SOURCE_DIRS:
+        for dirpath, _, filenames in os.walk(os.path.join(root, source_dir)):
+            for filename in sorted(filenames):
+                full_path = os.path.join(dirpath, filename)
+                rel_path = os.path.relpath(full_path, root).replace(os.sep, '/')
+                with open(full_path, 'rb') as f:
+                    data = f.read()
+
+                target = hashed_name(rel_path, fingerprint(data))
+                write_variants(os.path.join(out_root, target), data)
+                manifest[rel_path] = target
+
+    with open(os.path.join(root, INDEX_FILE), encoding='utf-8') as f:
+        html = content.render_index(f.read(), content.load(root))
+    html = rewrite_references(html, manifest)
+    write_variants(os.path.join(out_root, INDEX_FILE), html.encode('utf-8'))
+
+    with open(os.path.join(out_root, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    logger.info(f"Built {len(manifest)} assets into {out_root}"
+                f"{'' if brotli else ' (brotli not installed, gzip only)'}")
+    return manifest
+
+
+def load_manifest(out_dir: str = BUILD_DIR) -> Dict[str, str]:
+    """Load a previously built manifest, or an empty one if there is none."""
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fingerprint and precompress static assets.')
+    parser.add_argument('--out', default=BUILD_DIR, help='output directory (default: %(default)s)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    build(out_dir=args.out)
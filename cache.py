@@ -0,0 +1,152 @@
+"""
+Response Cache
+A small TTL cache for rendered JSON responses. The default backend is an
+in-process LRU; the SQLite backend stores entries in portfolio.db so that
+several server processes share one cache and see each other's
+invalidations.
+
+Each key also has a generation that ``invalidate`` bumps. A caller that
+rebuilds an entry reads the generation first and passes it to ``set``,
+which drops the entry if an invalidation happened during the rebuild, so
+a write can never be hidden behind a response built just before it.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import database
+
+# (body, etag)
+CacheEntry = Tuple[bytes, str]
+
+
+class MemoryBackend:
+    """Thread-safe LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[float, CacheEntry]]' = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, entry = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def generation(self, key: str) -> int:
+        with self._lock:
+            return self._generations.get(key, 0)
+
+    def set(self, key: str, entry: CacheEntry, ttl: float, generation: Optional[int] = None) -> bool:
+        with self._lock:
+            if generation is not None and self._generations.get(key, 0) != generation:
+                return False
+            self._entries[key] = (time.monotonic() + ttl, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+
+class SQLiteBackend:
+    """Cache entries in the ``response_cache`` table, shared by all processes."""
+
+    def __init__(self, purge_every: int = 100):
+        self.purge_every = purge_every
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        row = database.get_connection().execute(
+            database.SELECT_CACHE_ENTRY, (key, time.time())
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def generation(self, key: str) -> int:
+        row = database.get_connection().execute(
+            database.SELECT_CACHE_GENERATION, (key,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def set(self, key: str, entry: CacheEntry, ttl: float, generation: Optional[int] = None) -> bool:
+        now = time.time()
+        with database.transaction() as cursor:
+            if generation is None:
+                cursor.execute(database.UPSERT_CACHE_ENTRY, (key, entry[0], entry[1], now + ttl))
+            else:
+                # The generation check and the write are one statement, so an
+                # invalidation from another process cannot slip in between
+                cursor.execute(
+                    database.UPSERT_CACHE_ENTRY_IF_GENERATION,
+                    (key, entry[0], entry[1], now + ttl, key, generation)
+                )
+            stored = cursor.rowcount > 0
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                cursor.execute(database.PURGE_EXPIRED_CACHE_ENTRIES, (now,))
+        return stored
+
+    def delete(self, *keys: str):
+        with database.transaction() as cursor:
+            cursor.executemany(database.DELETE_CACHE_ENTRY, [(key,) for key in keys])
+            cursor.executemany(database.BUMP_CACHE_GENERATION, [(key,) for key in keys])
+
+
+class ResponseCache:
+    """Cache of rendered responses keyed by name, with hit/miss counters."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self.backend.get(key)
+        with self._lock:
+            self._counters['hits' if entry is not None else 'misses'] += 1
+        return entry
+
+    def generation(self, key: str) -> int:
+        """Current generation of ``key``; read it before building an entry."""
+        return self.backend.generation(key)
+
+    def set(self, key: str, entry: CacheEntry, ttl: float, generation: Optional[int] = None) -> bool:
+        """Store ``entry``, unless ``key`` was invalidated since ``generation``.
+
+        Returns whether the entry was stored.
+        """
+        return self.backend.set(key, entry, ttl, generation)
+
+    def invalidate(self, *keys: str):
+        """Drop entries whose underlying data has changed and bump their generation."""
+        self.backend.delete(*keys)
+        with self._lock:
+            self._counters['invalidations'] += len(keys)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+
+def create_cache(backend: str = 'memory', max_entries: int = 256) -> ResponseCache:
+    """Build a cache for the configured backend name ('memory' or 'sqlite')."""
+    if backend == 'sqlite':
+        return ResponseCache(SQLiteBackend())
+    if backend == 'memory':
+        return ResponseCache(MemoryBackend(max_entries))
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -0,0 +1,468 @@
+"""
+Content Datasets
+The projects, quotes, achievements and gallery data that the frontend
+keeps in data/*.js, parsed once on the server. The datasets are served
+as compact JSON, combined or one at a time, and are rendered into
+index.html: the projects grid, the achievement badges and the first
+quote are already in the markup, and the data modules are inlined, so
+the page shows content without four extra script requests.
+
+The data files stay the source of truth. Each one is a plain script of
+``const name = <literal>;`` declarations, which ``parse_module`` reads
+with a small JavaScript literal parser (objects, arrays, strings,
+numbers, true/false/null, comments and trailing commas). Any other
+statement, such as achievementHelpers, is kept as source text.
+"""
+
+import hashlib
+import html
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# In the order index.html loads them
+CONTENT_SOURCES = ['data/projects.js', 'data/quotes.js', 'data/achievements.js', 'data/galleryData.js']
+
+# API dataset name -> global declared by the data modules
+DATASETS = {
+    'projects': 'projectsData',
+    'quotes': 'quotesData',
+    'achievements': 'achievementsData',
+    'gallery': 'galleryData'
+}
+
+VERSION_LENGTH = 10
+
+_DECLARATION = re.compile(r'(const|let|var)\s+([A-Za-z_$][\w$]*)\s*=')
+_IDENTIFIER = re.compile(r'[A-Za-z_$][\w$]*')
+_NUMBER = re.compile(r'-?(?:0[xX][0-9a-fA-F]+|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)')
+_STRING_CHARS = re.compile(r'[^\\\'"\r\n]+')
+_KEYWORDS = {'true': True, 'false': False, 'null': None}
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0'}
+
+
+class LiteralError(ValueError):
+    """Source that is not a plain JavaScript literal."""
+
+
+class Statement(NamedTuple):
+    """A top-level statement of a data module."""
+    source: str
+    # Set for a declaration whose value is a literal
+    kind: Optional[str] = None
+    name: Optional[str] = None
+    value: Any = None
+
+
+class _Reader:
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+
+    def peek(self) -> str:
+        """Next character after whitespace and comments, '' at the end."""
+        text = self.text
+        while self.pos < len(text):
+            if text[self.pos].isspace():
+                self.pos += 1
+            elif text.startswith('//', self.pos):
+                end = text.find('\n', self.pos)
+                self.pos = len(text) if end < 0 else end + 1
+            elif text.startswith('/*', self.pos):
+                end = text.find('*/', self.pos + 2)
+                if end < 0:
+                    raise LiteralError('Unterminated comment')
+                self.pos = end + 2
+            else:
+                break
+        return text[self.pos:self.pos + 1]
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise LiteralError(f"Expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        char = self.peek()
+        if char == '{':
+            return self._object()
+        if char == '[':
+            return self._array()
+        if char in ('"', "'"):
+            return self._string()
+
+        match = _NUMBER.match(self.text, self.pos)
+        if match:
+            self.pos = match.end()
+            return _number(match.group())
+        match = _IDENTIFIER.match(self.text, self.pos)
+        if match and match.group() in _KEYWORDS:
+            self.pos = match.end()
+            return _KEYWORDS[match.group()]
+        raise LiteralError(f"Not a literal at offset {self.pos}")
+
+    def _object(self) -> Dict[str, Any]:
+        self.pos += 1
+        result = {}
+        while self.peek() != '}':
+            if self.peek() in ('"', "'"):
+                key = self._string()
+            else:
+                match = _IDENTIFIER.match(self.text, self.pos) or _NUMBER.match(self.text, self.pos)
+                if not match:
+                    raise LiteralError(f"Expected a property name at offset {self.pos}")
+                key = match.group()
+                self.pos = match.end()
+            self.expect(':')
+            result[key] = self.value()
+            if self.peek() != ',':
+                break
+            self.pos += 1
+        self.expect('}')
+        return result
+
+    def _array(self) -> List[Any]:
+        self.pos += 1
+        result = []
+        while self.peek() != ']':
+            result.append(self.value())
+            if self.peek() != ',':
+                break
+            self.pos += 1
+        self.expect(']')
+        return result
+
+    def _string(self) -> str:
+        text = self.text
+        quote = text[self.pos]
+        self.pos += 1
+        parts = []
+        while True:
+            match = _STRING_CHARS.match(text, self.pos)
+            if match:
+                parts.append(match.group())
+                self.pos = match.end()
+            char = text[self.pos:self.pos + 1]
+            if char == quote:
+                self.pos += 1
+                # Joins surrogate pairs written as two \u escapes
+                return ''.join(parts).encode('utf-16', 'surrogatepass').decode('utf-16')
+            if char in ('"', "'"):
+                parts.append(char)
+                self.pos += 1
+            elif char == '\\':
+                parts.append(self._escape())
+            else:
+                raise LiteralError(f"Unterminated string at offset {self.pos}")
+
+    def _escape(self) -> str:
+        text = self.text
+        char = text[self.pos + 1:self.pos + 2]
+        self.pos += 2
+        if char == 'u' and text.startswith('{', self.pos):
+            end = text.find('}', self.pos)
+            code, self.pos = text[self.pos + 1:end], end + 1
+        elif char in ('u', 'x'):
+            length = 4 if char == 'u' else 2
+            code, self.pos = text[self.pos:self.pos + length], self.pos + length
+        elif char == '\r' or char == '\n':
+            # Line continuation
+            if char == '\r' and text.startswith('\n', self.pos):
+                self.pos += 1
+            return ''
+        else:
+            return _ESCAPES.get(char, char)
+        try:
+            return chr(int(code, 16))
+        except ValueError:
+            raise LiteralError(f"Invalid escape \\{char}{code}")
+
+
+def _number(text: str):
+    if text.lstrip('-')[:2] in ('0x', '0X'):
+        return int(text, 16)
+    if any(char in text for char in '.eE'):
+        return float(text)
+    return int(text)
+
+
+def _statement_end(text: str, pos: int) -> int:
+    """Offset just past the statement starting at ``pos``: its ';' at depth 0 or the end."""
+    depth = 0
+    while pos < len(text):
+        char = text[pos]
+        if char in ('"', "'", '`'):
+            pos += 1
+            while pos < len(text) and text[pos] != char:
+                pos += 2 if text[pos] == '\\' else 1
+        elif text.startswith('//', pos):
+            end = text.find('\n', pos)
+            pos = len(text) if end < 0 else end
+        elif text.startswith('/*', pos):
+            end = text.find('*/', pos + 2)
+            pos = len(text) if end < 0 else end + 1
+        elif char in '([{':
+            depth += 1
+        elif char in ')]}':
+            depth -= 1
+        elif char == ';' and depth == 0:
+            return pos + 1
+        pos += 1
+    return pos
+
+
+def parse_module(text: str) -> List[Statement]:
+    """Split a data module into statements, parsing literal declarations."""
+    reader = _Reader(text)
+    statements = []
+    while reader.peek():
+        start = reader.pos
+        match = _DECLARATION.match(text, start)
+        if match:
+            reader.pos = match.end()
+            try:
+                value = reader.value()
+                if reader.peek() not in (';', ''):
+                    raise LiteralError(f"Expected ';' at offset {reader.pos}")
+                reader.pos += 1
+                statements.append(Statement(text[start:reader.pos], match.group(1), match.group(2), value))
+                continue
+            except LiteralError:
+                reader.pos = start
+        reader.pos = _statement_end(text, start)
+        statements.append(Statement(text[start:reader.pos]))
+    return statements
+
+
+def script_json(value: Any) -> str:
+    """Compact JSON that is safe to inline in a <script> element."""
+    return (json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+            .replace('</', '<\\/').replace('\u2028', '\\u2028').replace('\u2029', '\\u2029'))
+
+
+def module_script(statements: List[Statement]) -> str:
+    """The module as script source, with literal declarations written as compact JSON."""
+    return '\n'.join(
+        f"{statement.kind} {statement.name} = {script_json(statement.value)};" if statement.name
+        else statement.source
+        for statement in statements
+    )
+
+
+class Content(NamedTuple):
+    # Hash of the source files, changes whenever any of them does
+    version: str
+    # source path -> statements
+    modules: Dict[str, List[Statement]]
+    # declared name -> literal value
+    values: Dict[str, Any]
+
+    def dataset(self, name: str) -> List[Any]:
+        """Items of a dataset; KeyError if its module did not declare it as a literal."""
+        return self.values[DATASETS[name]]
+
+    def available(self) -> List[str]:
+        """Datasets that parsed; the rest are only served as their data modules."""
+        return [name for name, declared in DATASETS.items() if declared in self.values]
+
+    def inlinable(self, path: str) -> bool:
+        """Whether a module can be inlined: it declares a dataset as a literal.
+
+        A module that does not (one with a syntax error, say) keeps its own
+        script tag, so it cannot break the inline script of the others.
+        """
+        return any(statement.name in DATASETS.values() for statement in self.modules[path])
+
+
+def load(root: str = '.', sources: List[str] = CONTENT_SOURCES) -> Content:
+    """Parse the data modules; datasets that are not literals are logged and left out."""
+    digest = hashlib.sha256()
+    modules = {}
+    values = {}
+    for path in sources:
+        with open(os.path.join(root, path), 'rb') as f:
+            data = f.read()
+        digest.update(data)
+        modules[path] = parse_module(data.decode('utf-8'))
+        values.update((statement.name, statement.value) for statement in modules[path] if statement.name)
+
+    missing = [name for name in DATASETS.values() if name not in values]
+    if missing:
+        logger.warning(f"Content datasets not declared as literals: {', '.join(missing)}")
+    return Content(digest.hexdigest()[:VERSION_LENGTH], modules, values)
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, bool) or value is None:
+        return json.dumps(value)
+    return str(value)
+
+
+def filter_items(items: List[Any], filters: Dict[str, str]) -> List[Any]:
+    """Items whose fields equal every filter value; a list field matches if any element does.
+
+    Values compare case-insensitively as text, booleans and null as in JSON.
+    """
+    def matches(item: Any, field: str, wanted: str) -> bool:
+        value = item.get(field) if isinstance(item, dict) else None
+        return any(_text(element).casefold() == wanted.casefold()
+                   for element in (value if isinstance(value, list) else [value]))
+
+    return [item for item in items if all(matches(item, field, wanted) for field, wanted in filters.items())]
+
+
+# Section markup, matching what js/main.js and js/quotes.js render
+
+def _escape(value: Any) -> str:
+    return html.escape(str(value))
+
+
+def project_card(project: Dict[str, Any]) -> str:
+    links = ''.join(
+        f'<a href="{_escape(project[key])}" class="project-link" target="_blank"><i class="{icon}"></i></a>'
+        for key, icon in (('liveUrl', 'fas fa-external-link-alt'), ('githubUrl', 'fab fa-github'))
+        if project.get(key)
+    )
+    technologies = ''.join(f'<span class="tech-stack-tag">{_escape(tech)}</span>'
+                           for tech in project.get('technologies', []))
+    return (
+        f'<div class="project-card {_escape(project.get("category", ""))}">'
+        f'<div class="project-image"><i class="{_escape(project.get("icon", ""))}"></i>'
+        f'<div class="project-overlay"><div class="project-links">{links}</div></div></div>'
+        f'<div class="project-content">'
+        f'<h3 class="project-title">{_escape(project.get("title", ""))}</h3>'
+        f'<p class="project-description">{_escape(project.get("description", ""))}</p>'
+        f'<div class="project-tech">{technologies}</div>'
+        f'<div class="project-stats">'
+        f'<span><i class="fas fa-calendar"></i> {_escape(project.get("year", ""))}</span>'
+        f'<span><i class="fas fa-code"></i> {_escape(project.get("linesOfCode", ""))}+ LOC</span>'
+        f'</div></div></div>'
+    )
+
+
+def achievement_badge(achievement: Dict[str, Any]) -> str:
+    state = 'unlocked' if achievement.get('unlocked') else 'locked'
+    return (
+        f'<div class="achievement-badge {state}">'
+        f'<div class="achievement-icon">{_escape(achievement.get("icon", ""))}</div>'
+        f'<h4 class="achievement-title">{_escape(achievement.get("title", ""))}</h4>'
+        f'<p class="achievement-description">{_escape(achievement.get("description", ""))}</p>'
+        f'</div>'
+    )
+
+
+def _fill(page: str, element_id: str, inner: str) -> str:
+    """Replace the placeholder content of the empty container ``element_id``."""
+    pattern = re.compile(rf'(<div\b[^>]*\bid="{element_id}"[^>]*>)(.*?)(</div>)', re.DOTALL)
+    match = pattern.search(page)
+    if match is None or '<' in re.sub(r'<!--.*?-->', '', match.group(2), flags=re.DOTALL):
+        return page
+    return page[:match.start(2)] + inner + page[match.end(2):]
+
+
+def render_index(page: str, content: Content) -> str:
+    """index.html with the content sections rendered and the data modules inlined."""
+    available = content.available()
+    if 'projects' in available:
+        page = _fill(page, 'projects-grid',
+                     ''.join(project_card(project) for project in content.dataset('projects')))
+    if 'achievements' in available:
+        page = _fill(page, 'achievements-grid',
+                     ''.join(achievement_badge(achievement) for achievement in content.dataset('achievements')))
+
+    quotes = content.dataset('quotes') if 'quotes' in available else []
+    if quotes:
+        page = page.replace('<div class="quote-text"></div>',
+                            f'<div class="quote-text active">"{_escape(quotes[0]["text"])}"</div>', 1)
+        page = page.replace('<div class="quote-author"></div>',
+                            f'<div class="quote-author active">— {_escape(quotes[0]["author"])}</div>', 1)
+
+    # The first data script tag becomes one inline script, the others are dropped
+    inlined = []
+
+    def inline(match):
+        if match.group(2) not in content.modules or not content.inlinable(match.group(2)):
+            return match.group(0)
+        inlined.append(match.group(2))
+        if len(inlined) > 1:
+            return ''
+        script = '\n'.join(module_script(statements) for path, statements in content.modules.items()
+                           if content.inlinable(path))
+        return f'{match.group(1)}<script>\n{script}\n</script>'
+
+    return re.sub(r'(\n?[ \t]*)<script src="(?:\./|/)?([^"]+)"></script>', inline, page)
+
+
+class ContentStore:
+    """Parsed content and the prerendered index.html, reloaded when a source changes.
+
+    Source files are checked on access, at most every ``check_interval``
+    seconds. If a changed file does not parse, the previous content is kept.
+    """
+
+    def __init__(self, root: str = '.', sources: List[str] = CONTENT_SOURCES,
+                 index_file: str = 'index.html', check_interval: float = 2.0):
+        self.root = root
+        self.sources = sources
+        self.index_file = index_file
+        self.check_interval = check_interval
+
+        self._content: Optional[Content] = None
+        self._index: Optional[Tuple[bytes, str]] = None
+        self._stats: Optional[List[Tuple[float, int]]] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def _stat(self) -> List[Tuple[float, int]]:
+        stats = []
+        for path in [*self.sources, self.index_file]:
+            try:
+                stat = os.stat(os.path.join(self.root, path))
+                stats.append((stat.st_mtime, stat.st_size))
+            except OSError:
+                stats.append((0.0, -1))
+        return stats
+
+    def _refresh(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._content is not None and now - self._checked < self.check_interval:
+                return
+            self._checked = now
+            stats = self._stat()
+            if stats == self._stats:
+                return
+
+            try:
+                content = load(self.root, self.sources)
+            except (OSError, ValueError) as e:
+                if self._content is None:
+                    raise
+                self._stats = stats
+                logger.error(f"Content reload failed, keeping version {self._content.version}: {str(e)}")
+                return
+
+            try:
+                with open(os.path.join(self.root, self.index_file), encoding='utf-8') as f:
+                    body = render_index(f.read(), content).encode('utf-8')
+                self._index = (body, hashlib.sha1(body).hexdigest())
+            except OSError:
+                self._index = None
+            self._content = content
+            self._stats = stats
+        logger.info(f"Loaded content version {content.version}")
+
+    def current(self) -> Content:
+        self._refresh()
+        return self._content
+
+    def index(self) -> Optional[Tuple[bytes, str]]:
+        """Prerendered index.html and its ETag, None without an index file."""
+        self._refresh()
+        return self._index
@@ -9,4 +9,8 @@ const galleryData = [
         "year": '2025',
         "status": 'Completed'
     }
-];
\ No newline at end of file
+];
+
+// Widths the gallery requests from /images/gallery; `python images.py prewarm`
+// renders these ahead of time
+const galleryImageSizes = [320, 640, 960, 1280];
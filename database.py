@@ -0,0 +1,271 @@
+"""
+Database Access Layer
+Shared SQLite connection handling for the portfolio backend. Each server
+thread keeps one long-lived, tuned connection instead of opening a new one
+per query, and all SQL used on the request path is defined here so every
+call site shares the same statement text and hits the connection's
+prepared-statement cache.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+DATABASE_PATH = os.getenv('DATABASE_PATH', 'portfolio.db')
+
+# Applied to every new connection. journal_mode=WAL lets readers proceed
+# while a writer commits, and synchronous=NORMAL is durable under WAL
+# without an fsync on every commit. auto_vacuum only takes effect on a new
+# database (existing ones switch on their next VACUUM) and lets space
+# freed by archiving be reclaimed incrementally.
+PRAGMAS = {
+    'auto_vacuum': 'INCREMENTAL',
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.getenv('DB_BUSY_TIMEOUT_MS', '5000')),
+    'mmap_size': int(os.getenv('DB_MMAP_SIZE', str(256 * 1024 * 1024))),
+    'temp_store': 'MEMORY'
+}
+
+# Number of prepared statements kept per connection
+STATEMENT_CACHE_SIZE = 256
+
+_local = threading.local()
+_connections: List[sqlite3.Connection] = []
+_connections_lock = threading.Lock()
+
+
+def connect(path: Optional[str] = None, **kwargs) -> sqlite3.Connection:
+    """Open a new connection with the standard pragmas applied."""
+    conn = sqlite3.connect(
+        path or DATABASE_PATH,
+        timeout=PRAGMAS['busy_timeout'] / 1000,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        **kwargs
+    )
+    for name, value in PRAGMAS.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+    return conn
+
+
+def get_connection() -> sqlite3.Connection:
+    """Return this thread's connection, opening it on first use."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = connect(check_same_thread=False)
+        _local.conn = conn
+        with _connections_lock:
+            _connections.append(conn)
+    return conn
+
+
+@contextmanager
+def transaction() -> Iterator[sqlite3.Cursor]:
+    """Run a block of statements in one transaction on this thread's connection."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        yield cursor
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def open_connection_count() -> int:
+    """Number of thread connections currently open."""
+    with _connections_lock:
+        return len(_connections)
+
+
+def close_connections():
+    """Close every thread connection, e.g. at shutdown."""
+    with _connections_lock:
+        connections = list(_connections)
+        _connections.clear()
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    _local.__dict__.pop('conn', None)
+
+
+# Statements
+
+INSERT_CONTACT_SUBMISSION = '''
+    INSERT INTO contact_submissions (
+        submission_id, name, email, company, project_type, budget,
+        timeline, message, newsletter_signup, ip_address_id, user_agent_id, referrer_id
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_NEWSLETTER_SUBSCRIBER = '''
+    INSERT INTO newsletter_subscribers (email, name, unsubscribe_token)
+    VALUES (?, ?, ?)
+    ON CONFLICT(email) DO NOTHING
+'''
+
+INSERT_OR_IGNORE_NEWSLETTER_SUBSCRIBER = '''
+    INSERT OR IGNORE INTO newsletter_subscribers (email, name, unsubscribe_token)
+    VALUES (?, ?, ?)
+'''
+
+# Idempotency keys
+
+SELECT_IDEMPOTENCY_KEY = '''
+    SELECT fingerprint, response, status, expires_at FROM idempotency_keys
+    WHERE key = ? AND expires_at > ?
+'''
+
+# An existing row is only replaced once it has expired
+INSERT_IDEMPOTENCY_KEY = '''
+    INSERT INTO idempotency_keys (key, fingerprint, response, status, expires_at)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(key) DO UPDATE SET
+        fingerprint = excluded.fingerprint, response = excluded.response,
+        status = excluded.status, expires_at = excluded.expires_at
+    WHERE idempotency_keys.expires_at <= ?
+'''
+
+PURGE_EXPIRED_IDEMPOTENCY_KEYS = 'DELETE FROM idempotency_keys WHERE expires_at <= ?'
+
+# Mail queue
+
+INSERT_MAIL = '''
+    INSERT INTO mail_queue (submission_id, kind, recipient, subject, body, next_attempt_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+SELECT_DUE_MAIL = '''
+    SELECT * FROM mail_queue
+    WHERE status IN ('pending', 'sending') AND next_attempt_at <= ?
+    ORDER BY next_attempt_at
+    LIMIT ?
+'''
+
+LEASE_MAIL = '''
+    UPDATE mail_queue
+    SET status = 'sending', attempts = attempts + 1, next_attempt_at = ?
+    WHERE id = ?
+'''
+
+MARK_MAIL_SENT = '''
+    UPDATE mail_queue
+    SET status = 'sent', sent_at = CURRENT_TIMESTAMP, last_error = NULL
+    WHERE id = ?
+'''
+
+MARK_RESPONSE_SENT = '''
+    UPDATE contact_submissions SET response_sent = TRUE
+    WHERE submission_id = ? AND NOT EXISTS (
+        SELECT 1 FROM mail_queue
+        WHERE submission_id = ? AND status != 'sent'
+    )
+'''
+
+COUNT_QUEUED_MAIL = "SELECT status, COUNT(*) FROM mail_queue WHERE status IN ('pending', 'sending') GROUP BY status"
+
+MARK_MAIL_FAILED = '''
+    UPDATE mail_queue SET status = ?, next_attempt_at = ?, last_error = ?
+    WHERE id = ?
+'''
+
+# Rollups and counters
+
+UPSERT_COUNTER = '''
+    INSERT INTO stats_counters (name, value) VALUES (?, ?)
+    ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+'''
+
+UPSERT_SUBMISSIONS_DAILY = '''
+    INSERT INTO submission_rollups_daily (day, project_type, count) VALUES (?, ?, ?)
+    ON CONFLICT(day, project_type) DO UPDATE SET count = count + excluded.count
+'''
+
+UPSERT_PROJECT_TYPE_COUNT = '''
+    INSERT INTO project_type_counts (project_type, count) VALUES (?, ?)
+    ON CONFLICT(project_type) DO UPDATE SET count = count + excluded.count
+'''
+
+UPSERT_ANALYTICS_HOURLY = '''
+    INSERT INTO analytics_rollups_hourly (hour, event_type, count) VALUES (?, ?, ?)
+    ON CONFLICT(hour, event_type) DO UPDATE SET count = count + excluded.count
+'''
+
+SELECT_COUNTER = 'SELECT value FROM stats_counters WHERE name = ?'
+
+SUM_RECENT_SUBMISSIONS = '''
+    SELECT COALESCE(SUM(count), 0) FROM submission_rollups_daily
+    WHERE day > date('now', '-30 days')
+'''
+
+SELECT_TOP_PROJECT_TYPES = '''
+    SELECT project_type, count FROM project_type_counts
+    ORDER BY count DESC, project_type
+    LIMIT 5
+'''
+
+SUM_RECENT_ANALYTICS_EVENTS = '''
+    SELECT COALESCE(SUM(count), 0) FROM analytics_rollups_hourly
+    WHERE hour > strftime('%Y-%m-%d %H:00:00', 'now', '-7 days')
+'''
+
+# Response cache
+
+SELECT_CACHE_ENTRY = 'SELECT body, etag FROM response_cache WHERE key = ? AND expires_at > ?'
+
+UPSERT_CACHE_ENTRY = '''
+    INSERT INTO response_cache (key, body, etag, expires_at) VALUES (?, ?, ?, ?)
+    ON CONFLICT(key) DO UPDATE SET
+        body = excluded.body, etag = excluded.etag, expires_at = excluded.expires_at
+'''
+
+# The WHERE clause also keeps the SELECT from swallowing ON CONFLICT
+UPSERT_CACHE_ENTRY_IF_GENERATION = '''
+    INSERT INTO response_cache (key, body, etag, expires_at)
+    SELECT ?, ?, ?, ?
+    WHERE COALESCE((SELECT generation FROM response_cache_generations WHERE key = ?), 0) = ?
+    ON CONFLICT(key) DO UPDATE SET
+        body = excluded.body, etag = excluded.etag, expires_at = excluded.expires_at
+'''
+
+DELETE_CACHE_ENTRY = 'DELETE FROM response_cache WHERE key = ?'
+
+SELECT_CACHE_GENERATION = 'SELECT generation FROM response_cache_generations WHERE key = ?'
+
+BUMP_CACHE_GENERATION = '''
+    INSERT INTO response_cache_generations (key, generation) VALUES (?, 1)
+    ON CONFLICT(key) DO UPDATE SET generation = generation + 1
+'''
+
+PURGE_EXPIRED_CACHE_ENTRIES = 'DELETE FROM response_cache WHERE expires_at <= ?'
+
+# Admin reads, keyset-paginated on id: parameters (after_id, limit)
+
+SELECT_SUBMISSIONS_PAGE = '''
+    SELECT id, submission_id, name, email, company, project_type, budget, timeline, message,
+           newsletter_signup, ip_address, user_agent, referrer, timestamp, status, response_sent
+    FROM contact_submission_details
+    WHERE id > ?
+    ORDER BY id
+    LIMIT ?
+'''
+
+SELECT_SUBSCRIBERS_PAGE = '''
+    SELECT id, email, name, subscribed_at, status FROM newsletter_subscribers
+    WHERE id > ?
+    ORDER BY id
+    LIMIT ?
+'''
+
+SELECT_ANALYTICS_PAGE = '''
+    SELECT id, event_type, event_data, ip_address, user_agent, timestamp FROM analytics
+    WHERE id > ?
+    ORDER BY id
+    LIMIT ?
+'''
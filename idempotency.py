@@ -0,0 +1,138 @@
+"""
+Idempotent Submissions
+Repeated contact and newsletter requests (double-clicks, client retries)
+are recognised by an idempotency key: the client's ``Idempotency-Key``
+header or, without one, a hash of the validated payload. The first
+request stores its response under the key in ``idempotency_keys``, in the
+same transaction as the submission itself; repeats within the TTL get
+that response back without further writes, emails or analytics events.
+Recent keys are also kept in a bounded in-memory index, so most repeats
+are answered without a query.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import database
+
+IDEMPOTENCY_CONFIG = {
+    'ttl': int(os.getenv('IDEMPOTENCY_TTL_SECONDS', str(24 * 3600))),
+    'max_entries': int(os.getenv('IDEMPOTENCY_MAX_ENTRIES', '10000')),
+    # Expired rows are deleted on every Nth stored key
+    'purge_every': 100
+}
+
+MAX_KEY_LENGTH = 255
+
+Response = Tuple[Dict[str, Any], int]
+
+
+class RequestKey(NamedTuple):
+    key: str
+    # Hash of the validated payload, to detect a key reused for a different request
+    fingerprint: str
+
+
+class StoredResponse(NamedTuple):
+    fingerprint: str
+    payload: Dict[str, Any]
+    status: int
+    expires_at: float
+
+
+class DuplicateRequest(Exception):
+    """A concurrent request with the same key was stored first."""
+
+
+def request_key(kind: str, client_key: Optional[str], values: Dict[str, Any]) -> RequestKey:
+    """Key for a request of ``kind``; raises ValueError for an unusable client key."""
+    fingerprint = hashlib.sha256(
+        f"{kind}:{json.dumps(values, sort_keys=True, default=str)}".encode('utf-8')
+    ).hexdigest()
+    if not client_key:
+        return RequestKey(f"{kind}:{fingerprint}", fingerprint)
+    if len(client_key) > MAX_KEY_LENGTH or not client_key.isprintable():
+        raise ValueError(f"Idempotency-Key must be at most {MAX_KEY_LENGTH} printable characters")
+    return RequestKey(f"{kind}:key:{client_key}", fingerprint)
+
+
+class DedupIndex:
+    """Stored responses by idempotency key: an LRU in front of the table."""
+
+    def __init__(self, ttl: float = IDEMPOTENCY_CONFIG['ttl'],
+                 max_entries: int = IDEMPOTENCY_CONFIG['max_entries'],
+                 purge_every: int = IDEMPOTENCY_CONFIG['purge_every']):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.purge_every = purge_every
+        self._entries: 'OrderedDict[str, StoredResponse]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._claims = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get(self, conn: sqlite3.Connection, key: str) -> Optional[StoredResponse]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    return entry
+                del self._entries[key]
+
+        row = conn.execute(database.SELECT_IDEMPOTENCY_KEY, (key, now)).fetchone()
+        if row is None:
+            return None
+        entry = StoredResponse(row[0], json.loads(row[1]), row[2], row[3])
+        self.remember(key, entry)
+        return entry
+
+    def replay(self, conn: sqlite3.Connection, key: RequestKey) -> Optional[Response]:
+        """The response to send instead of processing the request, if any."""
+        entry = self._get(conn, key.key)
+        if entry is None:
+            return None
+        if entry.fingerprint != key.fingerprint:
+            return {
+                'success': False,
+                'message': 'Idempotency-Key was already used for a different request'
+            }, 422
+        return entry.payload, entry.status
+
+    def claim(self, cursor: sqlite3.Cursor, key: RequestKey, payload: Dict[str, Any],
+              status: int) -> StoredResponse:
+        """Store the response for ``key`` in the caller's transaction.
+
+        Runs before the request's own writes: if another request with the
+        same key committed first, DuplicateRequest is raised so the caller
+        rolls back and replays that request's response instead.
+        """
+        now = time.time()
+        entry = StoredResponse(key.fingerprint, payload, status, now + self.ttl)
+        cursor.execute(database.INSERT_IDEMPOTENCY_KEY,
+                       (key.key, key.fingerprint, json.dumps(payload), status, entry.expires_at, now))
+        if cursor.rowcount == 0:
+            raise DuplicateRequest(key.key)
+
+        with self._lock:
+            self._claims += 1
+            purge = self._claims % self.purge_every == 0
+        if purge:
+            cursor.execute(database.PURGE_EXPIRED_IDEMPOTENCY_KEYS, (now,))
+        return entry
+
+    def remember(self, key: str, entry: StoredResponse):
+        """Add a committed response to the in-memory index."""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -0,0 +1,413 @@
+"""
+Responsive Gallery Images
+Resized WebP/AVIF/JPEG derivatives of the gallery originals. Each variant
+is rendered once per key in a process pool (concurrent requests for the
+same key wait on the same render), stored in a content-addressed disk
+cache whose total size is bounded by LRU eviction, and served with a
+strong ETag equal to its cache key.
+
+Widths are rounded up to a fixed ladder (the ``galleryImageSizes`` of
+the gallery data file plus the full width) and quality is one of a few
+presets, so clients cannot request an unbounded number of distinct
+renders.
+
+Requires the optional ``Pillow`` package; without it the originals are
+served unchanged. Pillow is imported, and its codecs probed, on the first
+image request rather than at server start.
+
+Usage::
+
+    python images.py prewarm   # render the sizes listed in data/galleryData.js
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from werkzeug.security import safe_join
+
+PILLOW_INSTALLED = importlib.util.find_spec('PIL') is not None
+
+logger = logging.getLogger(__name__)
+
+GALLERY_DIR = 'assets/images/gallery'
+GALLERY_DATA = 'data/galleryData.js'
+
+# format name -> (Pillow format, file extension, mimetype)
+FORMATS = {
+    'webp': ('WEBP', '.webp', 'image/webp'),
+    'avif': ('AVIF', '.avif', 'image/avif'),
+    'jpeg': ('JPEG', '.jpg', 'image/jpeg')
+}
+
+MAX_WIDTH = 2560
+# Used when the gallery data file lists no sizes
+DEFAULT_WIDTHS = (320, 640, 960, 1280, 1920, MAX_WIDTH)
+
+QUALITY_PRESETS = {
+    'low': 50,
+    'medium': 65,
+    'high': 80
+}
+DEFAULT_QUALITY = QUALITY_PRESETS['high']
+
+# A cache hit refreshes the file's mtime (the LRU order across restarts)
+# at most this often
+TOUCH_INTERVAL = 3600
+
+
+def available_formats() -> List[str]:
+    """Output formats the installed Pillow can encode, in preference order."""
+    if not PILLOW_INSTALLED:
+        return []
+    from PIL import features
+
+    formats = []
+    for name in ('avif', 'webp'):
+        try:
+            if features.check(name):
+                formats.append(name)
+        except ValueError:
+            # Unknown feature name on older Pillow releases
+            continue
+    formats.append('jpeg')
+    return formats
+
+
+class ImageVariant(NamedTuple):
+    path: str
+    etag: str
+    mimetype: str
+
+
+def render_variant(source: str, destination: str, width: int, fmt: str, quality: int):
+    """Resize ``source`` to at most ``width`` pixels wide and save it.
+
+    Runs in a worker process. The output is written to a temporary file and
+    renamed into place so readers never see a partial image.
+    """
+    from PIL import Image, ImageOps
+
+    pil_format, _, _ = FORMATS[fmt]
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+        if pil_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        elif image.mode not in ('RGB', 'RGBA', 'L'):
+            image = image.convert('RGBA')
+
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(destination), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                image.save(f, pil_format, quality=quality, optimize=pil_format == 'JPEG')
+            os.replace(tmp_path, destination)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+
+class ImageService:
+    """Renders, caches and looks up gallery image variants."""
+
+    def __init__(self, source_dir: str = GALLERY_DIR, cache_dir: str = 'image_cache',
+                 max_cache_bytes: int = 256 * 1024 * 1024, workers: int = 2,
+                 data_file: str = GALLERY_DATA):
+        self.source_dir = source_dir
+        self.cache_dir = cache_dir
+        self.data_file = data_file
+        self.max_cache_bytes = max_cache_bytes
+        self.workers = workers
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, Future] = {}
+        self._digests: Dict[str, Tuple[int, int, str]] = {}
+        self._entries: 'OrderedDict[str, int]' = OrderedDict()
+        # path -> when its mtime was last set
+        self._touched: Dict[str, float] = {}
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        self._scanned = False
+        self._formats: Optional[List[str]] = None
+        self._widths: Optional[List[int]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return PILLOW_INSTALLED
+
+    @property
+    def formats(self) -> List[str]:
+        """Encodable output formats, probed on first use."""
+        if self._formats is None:
+            self._formats = available_formats()
+        return self._formats
+
+    @property
+    def widths(self) -> List[int]:
+        """Widths variants are rendered at, read from the gallery data on first use."""
+        if self._widths is None:
+            self._widths = variant_widths(self.data_file)
+        return self._widths
+
+    def negotiate_format(self, requested: Optional[str], accept) -> Optional[str]:
+        """Pick an output format from the ``fmt`` parameter or the Accept header.
+
+        AVIF and WebP are only chosen when the client names them: browsers
+        without support still send ``image/*`` or ``*/*``, which would
+        otherwise match every format.
+        """
+        if requested and requested != 'auto':
+            return requested if requested in self.formats else None
+        named = {value.lower() for value, quality in accept if quality > 0}
+        for fmt in self.formats:
+            if FORMATS[fmt][2] in named:
+                return fmt
+        return 'jpeg'
+
+    def _source_digest(self, source: str) -> str:
+        """Content hash of an original, recomputed only when it changes."""
+        stat = os.stat(source)
+        with self._lock:
+            known = self._digests.get(source)
+            if known and known[:2] == (stat.st_mtime_ns, stat.st_size):
+                return known[2]
+
+        hasher = hashlib.sha256()
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                hasher.update(block)
+        digest = hasher.hexdigest()
+        with self._lock:
+            self._digests[source] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    def _scan(self):
+        """Index the existing cache directory, oldest first."""
+        files = []
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                if filename.endswith('.tmp'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, path, stat.st_size))
+
+        for mtime, path, size in sorted(files):
+            self._entries[path] = size
+            self._touched[path] = mtime
+            self._cache_bytes += size
+        self._scanned = True
+
+    def _touch(self, path: str) -> bool:
+        """Mark a cached variant as recently used. False if it is missing."""
+        with self._lock:
+            if not self._scanned:
+                self._scan()
+            if path not in self._entries:
+                return False
+            self._entries.move_to_end(path)
+            now = time.time()
+            if now - self._touched.get(path, 0.0) < TOUCH_INTERVAL:
+                return True
+            self._touched[path] = now
+        try:
+            # The mtime keeps the LRU order across restarts
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._cache_bytes -= self._entries.pop(path, 0)
+                self._touched.pop(path, None)
+            return False
+        return True
+
+    def _add(self, path: str):
+        size = os.path.getsize(path)
+        evicted = []
+        with self._lock:
+            self._cache_bytes += size - self._entries.pop(path, 0)
+            self._entries[path] = size
+            self._touched[path] = time.time()
+            while self._cache_bytes > self.max_cache_bytes and len(self._entries) > 1:
+                old_path, old_size = self._entries.popitem(last=False)
+                self._touched.pop(old_path, None)
+                self._cache_bytes -= old_size
+                evicted.append(old_path)
+
+        for old_path in evicted:
+            try:
+                os.unlink(old_path)
+            except OSError:
+                pass
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} image variants from the cache")
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def get(self, filename: str, width: int, fmt: str, quality: int) -> Optional[ImageVariant]:
+        """Cached variant of a gallery image, rendering it if needed.
+
+        Returns None if the original does not exist.
+        """
+        source = safe_join(self.source_dir, filename)
+        if source is None or not os.path.isfile(source):
+            return None
+
+        key = hashlib.sha256(
+            f"{self._source_digest(source)}:{width}:{fmt}:{quality}".encode('ascii')
+        ).hexdigest()
+        _, extension, mimetype = FORMATS[fmt]
+        path = os.path.join(self.cache_dir, key[:2], key + extension)
+        if self._touch(path):
+            return ImageVariant(path, key, mimetype)
+        if os.path.isfile(path):
+            # Rendered by another process sharing the cache directory
+            self._add(path)
+            return ImageVariant(path, key, mimetype)
+
+        # Single flight: concurrent requests for one key share one render
+        with self._lock:
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._pending[key] = future
+
+        if owner:
+            try:
+                self._executor().submit(render_variant, source, path, width, fmt, quality).result()
+                self._add(path)
+                future.set_result(path)
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._pending.pop(key, None)
+
+        future.result()
+        return ImageVariant(path, key, mimetype)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'cached_variants': len(self._entries),
+                'cache_bytes': self._cache_bytes,
+                'renders_in_flight': len(self._pending)
+            }
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+def parse_variant_args(args, widths: List[int],
+                       default_quality: int = DEFAULT_QUALITY) -> Tuple[Optional[Tuple[int, int]], str]:
+    """Validate the ``w`` and ``q`` query parameters.
+
+    The width is rounded up to the next of ``widths`` (the largest if it is
+    wider). The quality is a preset name, or a number snapped to the
+    nearest preset. Returns ((width, quality), '') or (None, error message).
+    """
+    try:
+        width = int(args.get('w', widths[-1]))
+    except ValueError:
+        return None, 'Width must be an integer'
+    if width < 1:
+        return None, 'Width must be positive'
+    width = next((step for step in widths if step >= width), widths[-1])
+
+    requested = args.get('q')
+    if requested is None:
+        quality = default_quality
+    elif requested in QUALITY_PRESETS:
+        quality = QUALITY_PRESETS[requested]
+    else:
+        try:
+            number = int(requested)
+        except ValueError:
+            return None, f"Quality must be one of: {', '.join(QUALITY_PRESETS)}"
+        quality = min(QUALITY_PRESETS.values(), key=lambda preset: abs(preset - number))
+    return (width, quality), ''
+
+
+def variant_widths(data_file: str = GALLERY_DATA) -> List[int]:
+    """The width ladder: the gallery's listed sizes and the full width."""
+    try:
+        _, widths = gallery_prewarm_targets(data_file)
+    except OSError:
+        widths = []
+    if not widths:
+        return list(DEFAULT_WIDTHS)
+    return sorted({width for width in widths if 0 < width <= MAX_WIDTH} | {MAX_WIDTH})
+
+
+def gallery_prewarm_targets(data_file: str = GALLERY_DATA) -> Tuple[List[str], List[int]]:
+    """Image filenames and widths listed in the gallery data file."""
+    with open(data_file, encoding='utf-8') as f:
+        source = f.read()
+
+    prefix = GALLERY_DIR + '/'
+    filenames = [
+        src[len(prefix):] for src in re.findall(r'"src"\s*:\s*[\'"]([^\'"]+)[\'"]', source)
+        if src.startswith(prefix)
+    ]
+    sizes = re.search(r'galleryImageSizes\s*=\s*\[([^\]]*)\]', source)
+    widths = [int(width) for width in re.findall(r'\d+', sizes.group(1))] if sizes else []
+    return filenames, widths
+
+
+def prewarm(service: ImageService, data_file: str = GALLERY_DATA,
+            quality: int = DEFAULT_QUALITY) -> int:
+    """Render every listed size of every gallery image in every format."""
+    filenames, widths = gallery_prewarm_targets(data_file)
+    rendered = 0
+    for filename in filenames:
+        if not os.path.isfile(os.path.join(service.source_dir, filename)):
+            logger.warning(f"Gallery image not found: {filename}")
+            continue
+        for width in widths:
+            for fmt in service.formats:
+                service.get(filename, width, fmt, quality)
+                rendered += 1
+    return rendered
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Manage responsive gallery image variants.')
+    parser.add_argument('command', choices=['prewarm'])
+    parser.add_argument('--cache-dir', default=os.getenv('IMAGE_CACHE_DIR', 'image_cache'))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if not PILLOW_INSTALLED:
+        parser.exit(1, 'Pillow is not installed\n')
+
+    image_service = ImageService(
+        cache_dir=args.cache_dir,
+        max_cache_bytes=int(os.getenv('IMAGE_CACHE_MAX_BYTES', str(256 * 1024 * 1024))),
+        workers=int(os.getenv('IMAGE_WORKERS', '2'))
+    )
+    try:
+        print(f"Prewarmed {prewarm(image_service)} image variants")
+    finally:
+        image_service.close()
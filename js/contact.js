@@ -6,6 +6,9 @@ class ContactForm {
         this.isSubmitting = false;
         this.validationRules = {};
         this.errors = {};
+        // Sent with every attempt to submit the same form contents, so the
+        // server recognises retries and answers them with the original result
+        this.idempotencyKey = null;
         
         this.init();
     }
@@ -100,11 +103,12 @@ class ContactForm {
             }
         });
 
-        // Auto-save form data
+        // Auto-save form data; edited contents are a new submission
         Object.keys(this.fields).forEach(fieldName => {
             const field = this.fields[fieldName];
             if (field) {
                 field.addEventListener('input', () => {
+                    this.idempotencyKey = null;
                     this.saveFormData();
                 });
             }
@@ -231,9 +235,11 @@ class ContactForm {
 
         try {
             const formData = this.getFormData();
+            this.idempotencyKey = this.idempotencyKey || this.createIdempotencyKey();
             const response = await this.submitForm(formData);
 
             if (response.success) {
+                this.idempotencyKey = null;
                 this.showSuccessMessage();
                 this.clearForm();
                 this.clearSavedData();
@@ -292,18 +298,31 @@ class ContactForm {
         return formData;
     }
 
+    createIdempotencyKey() {
+        if (window.crypto && window.crypto.randomUUID) {
+            return window.crypto.randomUUID();
+        }
+        return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}${Math.random().toString(36).slice(2)}`;
+    }
+
     async submitForm(formData) {
         // Submit to server
         const response = await fetch('/api/contact', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
+                'Idempotency-Key': this.idempotencyKey
             },
             body: JSON.stringify(formData)
         });
 
         if (!response.ok) {
             const errorData = await response.json().catch(() => ({}));
+            // The server reports every invalid field at once
+            Object.entries(errorData.errors || {}).forEach(([fieldName, message]) => {
+                this.showFieldError(fieldName, message);
+                this.errors[fieldName] = message;
+            });
             throw new Error(errorData.message || `HTTP ${response.status}: ${response.statusText}`);
         }
 
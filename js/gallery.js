@@ -96,7 +96,9 @@ class GalleryManager {
 
         galleryItem.innerHTML = `
             <div class="gallery-image">
-                <img src="${item.src}" alt="${item.title}">
+                <img src="${item.src}" srcset="${this.buildSrcset(item.src)}"
+                     sizes="(max-width: 768px) 100vw, (max-width: 1200px) 50vw, 33vw"
+                     alt="${item.title}" loading="lazy" decoding="async">
                 <div class="gallery-overlay">
                     <div class="overlay-content">
                         <button class="view-btn" data-action="view">
@@ -155,6 +157,19 @@ class GalleryManager {
         return galleryItem;
     }
 
+    buildSrcset(src) {
+        // Resized variants are served from /images/gallery/<name>?w=<width>
+        const prefix = 'assets/images/gallery/';
+        if (typeof galleryImageSizes === 'undefined' || !src.startsWith(prefix)) {
+            return '';
+        }
+
+        const name = encodeURI(src.slice(prefix.length));
+        return galleryImageSizes
+            .map(width => `/images/gallery/${name}?w=${width} ${width}w`)
+            .join(', ');
+    }
+
     animateGalleryItems() {
         const items = this.galleryGrid.querySelectorAll('.gallery-item');
         
@@ -296,6 +296,10 @@ class GamificationSystem {
         actionData.count++;
         actionData.totalXP += xp;
         actionData.lastOccurrence = timestamp;
+
+        if (window.analyticsQueue) {
+            window.analyticsQueue.track('gamification_action', { action, xp });
+        }
     }
 
     showXPGain(amount, reason) {
@@ -107,6 +107,13 @@ class PortfolioApp {
         // Handle window load events
         this.initializeScrollReveal();
         this.setupStatsCounter();
+
+        if (window.analyticsQueue) {
+            window.analyticsQueue.track('page_view', {
+                path: window.location.pathname,
+                referrer: document.referrer
+            });
+        }
     }
 
     handleScroll() {
@@ -319,6 +326,14 @@ class PortfolioApp {
             }
         });
 
+        // Record each newly viewed section once per change
+        if (currentSection && currentSection !== this.lastTrackedSection) {
+            this.lastTrackedSection = currentSection;
+            if (window.analyticsQueue) {
+                window.analyticsQueue.track('section_view', { section: currentSection });
+            }
+        }
+
         // Update navigation links
         navLinks.forEach(link => {
             link.classList.remove('active');
@@ -838,6 +853,60 @@ class PortfolioApp {
     }
 }
 
+// Batches analytics events and sends them in a single POST
+class AnalyticsQueue {
+    constructor(endpoint = '/api/analytics/batch', maxBatch = 20, flushInterval = 5000) {
+        this.endpoint = endpoint;
+        this.maxBatch = maxBatch;
+        this.flushInterval = flushInterval;
+        this.events = [];
+        this.timer = null;
+
+        // Send whatever is left when the page is hidden or closed
+        document.addEventListener('visibilitychange', () => {
+            if (document.visibilityState === 'hidden') {
+                this.flush(true);
+            }
+        });
+        window.addEventListener('pagehide', () => this.flush(true));
+    }
+
+    track(eventType, eventData = {}) {
+        this.events.push({ event_type: eventType, event_data: eventData });
+
+        if (this.events.length >= this.maxBatch) {
+            this.flush();
+        } else if (!this.timer) {
+            this.timer = setTimeout(() => this.flush(), this.flushInterval);
+        }
+    }
+
+    flush(useBeacon = false) {
+        if (this.timer) {
+            clearTimeout(this.timer);
+            this.timer = null;
+        }
+        if (this.events.length === 0) return;
+
+        const body = JSON.stringify({ events: this.events.splice(0, this.maxBatch) });
+
+        if (useBeacon && navigator.sendBeacon) {
+            navigator.sendBeacon(this.endpoint, new Blob([body], { type: 'application/json' }));
+        } else {
+            fetch(this.endpoint, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body,
+                keepalive: true
+            }).catch(error => console.warn('Failed to send analytics:', error));
+        }
+
+        if (this.events.length > 0) {
+            this.flush(useBeacon);
+        }
+    }
+}
+
 // Global utility functions
 window.scrollToSection = function(sectionId) {
     const section = document.getElementById(sectionId);
@@ -851,6 +920,7 @@ window.scrollToSection = function(sectionId) {
 };
 
 // Initialize the application
+window.analyticsQueue = new AnalyticsQueue();
 const portfolioApp = new PortfolioApp();
 
 // Export for other modules
@@ -0,0 +1,306 @@
+"""
+Production Launcher
+Runs the portfolio backend as several waitress worker processes that
+share one listening socket, so requests are spread over every core
+instead of a single interpreter's GIL.
+
+The supervisor applies database migrations once, binds the socket and
+starts each worker as a fresh interpreter that inherits the socket. On
+SIGHUP it re-applies migrations and replaces the workers one at a time:
+a new worker must report ready before the old one is asked to finish its
+in-flight requests and exit, so the socket is never left unserved. SIGTERM
+or SIGINT stop every worker gracefully. Workers that die are restarted.
+
+Usage::
+
+    python launcher.py [--workers N] [--threads N] [--graceful-timeout SECONDS]
+
+POSIX only; on other platforms run ``python server.py``.
+"""
+
+import _thread
+import argparse
+import logging
+import os
+import select
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+LAUNCHER_CONFIG = {
+    'host': os.getenv('HOST', '0.0.0.0'),
+    'port': int(os.getenv('PORT', 5000)),
+    'workers': int(os.getenv('WEB_CONCURRENCY', str(os.cpu_count() or 1))),
+    'threads': int(os.getenv('WAITRESS_THREADS', '4')),
+    'graceful_timeout': float(os.getenv('GRACEFUL_TIMEOUT', '30')),
+    'ready_timeout': float(os.getenv('WORKER_READY_TIMEOUT', '30')),
+    'backlog': int(os.getenv('LISTEN_BACKLOG', '1024'))
+}
+
+# A worker that exits sooner than this after starting is restarted only
+# after a pause, so a broken deploy does not spin the CPU
+MIN_WORKER_LIFETIME = 1.0
+
+
+class Worker:
+    """A worker process and the pipe it reports readiness on."""
+
+    def __init__(self, process: subprocess.Popen, ready_fd: int):
+        self.process = process
+        self.ready_fd = ready_fd
+        self.started_at = time.monotonic()
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+    def wait_ready(self, timeout: float) -> bool:
+        """Block until the worker is serving; False if it failed or timed out."""
+        try:
+            readable, _, _ = select.select([self.ready_fd], [], [], timeout)
+            return bool(readable) and os.read(self.ready_fd, 1) == b'1'
+        finally:
+            os.close(self.ready_fd)
+            self.ready_fd = -1
+
+    def stop(self, timeout: float):
+        """Ask the worker to drain and exit, killing it after ``timeout``."""
+        if self.process.poll() is not None:
+            return
+        self.process.send_signal(signal.SIGTERM)
+        try:
+            # Workers allow themselves ``timeout`` to drain; give them a moment more to exit
+            self.process.wait(timeout + 5)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"Worker {self.pid} did not exit in time, killing it")
+            self.process.kill()
+            self.process.wait()
+
+
+class Supervisor:
+    """Keeps ``workers`` worker processes serving the shared socket."""
+
+    def __init__(self, host: str, port: int, workers: int, threads: int,
+                 graceful_timeout: float, ready_timeout: float, backlog: int):
+        self.host = host
+        self.port = port
+        self.worker_count = max(1, workers)
+        self.threads = threads
+        self.graceful_timeout = graceful_timeout
+        self.ready_timeout = ready_timeout
+        self.backlog = backlog
+
+        self.socket: Optional[socket.socket] = None
+        self.workers: List[Worker] = []
+        self._reload = threading.Event()
+        self._stopping = threading.Event()
+
+    def spawn(self) -> Worker:
+        read_fd, write_fd = os.pipe()
+        command = [
+            sys.executable, os.path.abspath(__file__), 'worker',
+            '--fd', str(self.socket.fileno()),
+            '--ready-fd', str(write_fd),
+            '--threads', str(self.threads),
+            '--graceful-timeout', str(self.graceful_timeout)
+        ]
+        try:
+            process = subprocess.Popen(command, pass_fds=(self.socket.fileno(), write_fd))
+        finally:
+            os.close(write_fd)
+        logger.info(f"Started worker {process.pid}")
+        return Worker(process, read_fd)
+
+    def spawn_ready(self) -> Optional[Worker]:
+        worker = self.spawn()
+        if worker.wait_ready(self.ready_timeout):
+            return worker
+        logger.error(f"Worker {worker.pid} failed to become ready")
+        worker.stop(0)
+        return None
+
+    def migrate(self) -> bool:
+        """Apply migrations from the current code in a fresh interpreter."""
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), 'migrate'])
+        return result.returncode == 0
+
+    def reload(self):
+        """Replace every worker with one running the current code, one at a time."""
+        logger.info("Reloading workers")
+        if not self.migrate():
+            logger.error("Migrations failed, keeping the current workers")
+            return
+
+        for index, old in enumerate(list(self.workers)):
+            if self._stopping.is_set():
+                return
+            new = self.spawn_ready()
+            if new is None:
+                logger.error("Reload aborted, keeping the remaining workers")
+                return
+            self.workers[index] = new
+            old.stop(self.graceful_timeout)
+            logger.info(f"Replaced worker {old.pid} with {new.pid}")
+        logger.info("Reload complete")
+
+    def reap(self):
+        """Restart workers that exited on their own.
+
+        A replacement that does not report ready is stopped and the slot is
+        retried on the next pass.
+        """
+        for index, worker in enumerate(self.workers):
+            code = worker.process.poll()
+            if code is None or self._stopping.is_set():
+                continue
+            logger.warning(f"Worker {worker.pid} exited with code {code}, restarting it")
+            if time.monotonic() - worker.started_at < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            new = self.spawn_ready()
+            if new is None:
+                # Counted as a worker that died at once, so the retry pauses too
+                worker.started_at = time.monotonic()
+                continue
+            self.workers[index] = new
+
+    def run(self):
+        import server
+
+        # Migrations run here once, never in the workers
+        server.init_database()
+
+        self.socket = socket.create_server((self.host, self.port), backlog=self.backlog)
+        logger.info(f"Listening on {self.host}:{self.port} with {self.worker_count} workers "
+                    f"x {self.threads} threads")
+
+        signal.signal(signal.SIGHUP, lambda signum, frame: self._reload.set())
+        signal.signal(signal.SIGTERM, lambda signum, frame: self._stopping.set())
+        signal.signal(signal.SIGINT, lambda signum, frame: self._stopping.set())
+
+        try:
+            for _ in range(self.worker_count):
+                worker = self.spawn_ready()
+                if worker is None:
+                    raise RuntimeError('Worker failed to start')
+                self.workers.append(worker)
+
+            while not self._stopping.is_set():
+                if self._reload.is_set():
+                    self._reload.clear()
+                    self.reload()
+                self.reap()
+                self._stopping.wait(0.5)
+        finally:
+            logger.info("Stopping workers")
+            for worker in self.workers:
+                if worker.process.poll() is None:
+                    worker.process.send_signal(signal.SIGTERM)
+            for worker in self.workers:
+                worker.stop(self.graceful_timeout)
+            self.socket.close()
+
+
+def drain(wsgi_server, timeout: float, drained: threading.Event):
+    """Stop accepting, let in-flight requests finish, then stop the worker."""
+    wsgi_server.accepting = False
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            channels = list(wsgi_server.active_channels.values())
+        except RuntimeError:
+            # Channel map changed while copying; look again
+            continue
+        if not channels:
+            break
+        for channel in channels:
+            if not channel.requests:
+                # Idle keep-alive connection
+                channel.will_close = True
+        wsgi_server.pull_trigger()
+        time.sleep(0.1)
+    # Re-enter the SIGTERM handler on the main thread, which now exits the
+    # serving loop; waitress.run() shuts its task threads down on SystemExit
+    drained.set()
+    _thread.interrupt_main(signal.SIGTERM)
+    wsgi_server.pull_trigger()
+
+
+def run_worker(fd: int, ready_fd: int, threads: int, graceful_timeout: float):
+    from waitress.server import create_server
+
+    import server
+
+    listener = socket.socket(fileno=fd)
+    wsgi_server = create_server(server.app, sockets=[listener], threads=threads)
+
+    draining = threading.Event()
+    drained = threading.Event()
+
+    def handle_term(signum, frame):
+        if drained.is_set():
+            raise SystemExit(0)
+        if not draining.is_set():
+            draining.set()
+            threading.Thread(target=drain, args=(wsgi_server, graceful_timeout, drained),
+                             name='drain', daemon=True).start()
+
+    signal.signal(signal.SIGTERM, handle_term)
+    # Ctrl-C reaches the whole process group; the supervisor coordinates shutdown
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    server.start_background_services()
+    try:
+        os.write(ready_fd, b'1')
+        os.close(ready_fd)
+        wsgi_server.run()
+    finally:
+        server.stop_background_services()
+        logger.info(f"Worker {os.getpid()} stopped")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the portfolio backend with pre-forked workers.')
+    subcommand = parser.add_subparsers(dest='command')
+
+    worker_parser = subcommand.add_parser('worker', help=argparse.SUPPRESS)
+    worker_parser.add_argument('--fd', type=int, required=True)
+    worker_parser.add_argument('--ready-fd', type=int, required=True)
+    worker_parser.add_argument('--threads', type=int, required=True)
+    worker_parser.add_argument('--graceful-timeout', type=float, required=True)
+
+    subcommand.add_parser('migrate', help=argparse.SUPPRESS)
+
+    parser.add_argument('--host', default=LAUNCHER_CONFIG['host'])
+    parser.add_argument('--port', type=int, default=LAUNCHER_CONFIG['port'])
+    parser.add_argument('--workers', type=int, default=LAUNCHER_CONFIG['workers'],
+                        help='worker processes (default: WEB_CONCURRENCY or the CPU count)')
+    parser.add_argument('--threads', type=int, default=LAUNCHER_CONFIG['threads'],
+                        help='waitress threads per worker (default: %(default)s)')
+    parser.add_argument('--graceful-timeout', type=float, default=LAUNCHER_CONFIG['graceful_timeout'],
+                        help='seconds a worker may spend finishing requests (default: %(default)s)')
+    args = parser.parse_args()
+
+    if os.name != 'posix':
+        parser.error('launcher.py needs a POSIX platform; run server.py instead')
+
+    if args.command == 'worker':
+        run_worker(args.fd, args.ready_fd, args.threads, args.graceful_timeout)
+    elif args.command == 'migrate':
+        import server
+        server.init_database()
+    else:
+        Supervisor(
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            threads=args.threads,
+            graceful_timeout=args.graceful_timeout,
+            ready_timeout=LAUNCHER_CONFIG['ready_timeout'],
+            backlog=LAUNCHER_CONFIG['backlog']
+        ).run()
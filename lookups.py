@@ -0,0 +1,107 @@
+"""
+String Lookup Tables
+Strings that repeat across many rows (event types, IP addresses, user
+agents, referrers) are stored once in a lookup table and referenced by
+integer id. Each table has an in-process LRU mapping strings to ids, so
+ingestion only queries the database for strings it has not seen recently.
+Views join the strings back for readers.
+
+An id is cached only once its row is known to be committed: a lookup made
+inside an open transaction may see a row that transaction inserted and
+could still roll back.
+"""
+
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+LOOKUP_CONFIG = {
+    'cache_size': int(os.getenv('LOOKUP_CACHE_SIZE', '10000'))
+}
+
+
+class LookupTable:
+    """One lookup table and its string -> id LRU."""
+
+    def __init__(self, table: str, max_entries: int = LOOKUP_CONFIG['cache_size']):
+        self.table = table
+        self.max_entries = max_entries
+        self.create_sql = f'CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, value TEXT NOT NULL UNIQUE)'
+        self.select_sql = f'SELECT id FROM {table} WHERE value = ?'
+        self.insert_sql = f'INSERT INTO {table} (value) VALUES (?) ON CONFLICT (value) DO NOTHING'
+        self._entries: 'OrderedDict[str, int]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def create(self, conn: sqlite3.Connection):
+        conn.execute(self.create_sql)
+
+    def populate(self, conn: sqlite3.Connection, source: str, column: str):
+        """Add every distinct non-NULL value of ``source.column``."""
+        conn.execute(f'''
+            INSERT INTO {self.table} (value)
+            SELECT DISTINCT {column} FROM {source} WHERE {column} IS NOT NULL
+            ON CONFLICT (value) DO NOTHING
+        ''')
+
+    def id_of(self, column: str) -> str:
+        """SQL expression for the id of the string in ``column``."""
+        return f'(SELECT id FROM {self.table} WHERE value = {column})'
+
+    def id(self, conn: sqlite3.Connection, value: Optional[str]) -> Optional[int]:
+        """Id of ``value``, adding it to the table if it is new. None stays None."""
+        if value is None:
+            return None
+        with self._lock:
+            cached = self._entries.get(value)
+            if cached is not None:
+                self._entries.move_to_end(value)
+                return cached
+
+        committed = not conn.in_transaction
+        row = conn.execute(self.select_sql, (value,)).fetchone()
+        if row is None:
+            conn.execute(self.insert_sql, (value,))
+            return conn.execute(self.select_sql, (value,)).fetchone()[0]
+
+        if committed:
+            with self._lock:
+                self._entries[value] = row[0]
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return row[0]
+
+    def ids(self, conn: sqlite3.Connection, values: Iterable[Optional[str]]) -> List[Optional[int]]:
+        """Ids for a batch of values, resolving each distinct value once."""
+        values = list(values)
+        resolved: Dict[Optional[str], Optional[int]] = {None: None}
+        with self._lock:
+            for value in set(values):
+                cached = self._entries.get(value)
+                if cached is not None:
+                    self._entries.move_to_end(value)
+                    resolved[value] = cached
+        for value in set(values).difference(resolved):
+            resolved[value] = self.id(conn, value)
+        return [resolved[value] for value in values]
+
+    def clear_cache(self):
+        with self._lock:
+            self._entries.clear()
+
+
+EVENT_TYPES = LookupTable('event_types')
+IP_ADDRESSES = LookupTable('ip_addresses')
+USER_AGENTS = LookupTable('user_agents')
+REFERRERS = LookupTable('referrers')
+
+TABLES = (EVENT_TYPES, IP_ADDRESSES, USER_AGENTS, REFERRERS)
+
+
+def create_tables(conn: sqlite3.Connection):
+    for table in TABLES:
+        table.create(conn)
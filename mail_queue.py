@@ -0,0 +1,229 @@
+"""
+Outbound Mail Queue
+A durable, SQLite-backed queue for outbound email. Messages are written to
+the ``mail_queue`` table in the same transaction as the submission they
+belong to, and a small pool of worker threads delivers them in the
+background, retrying failures with exponential backoff. Each worker
+claims a batch of due messages so they can go out over a single SMTP
+session.
+"""
+
+import asyncio
+import logging
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import database
+
+logger = logging.getLogger(__name__)
+
+
+class MailQueue:
+    """Durable outbound mail queue drained by a pool of worker threads.
+
+    ``send_batch`` receives a list of message dicts (``recipient``,
+    ``subject``, ``body``, ``kind``) and returns one entry per message:
+    ``None`` when it was delivered or the error text. A message that is being
+    delivered is leased by pushing its ``next_attempt_at`` forward, so a
+    worker that dies mid-send only delays the message instead of losing it.
+    """
+
+    def __init__(self, db_path: str,
+                 send_batch: Callable[[List[Dict[str, Any]]], List[Optional[str]]],
+                 workers: int = 2, batch_size: int = 10,
+                 max_attempts: int = 5, base_delay: float = 30.0,
+                 max_delay: float = 3600.0, poll_interval: float = 5.0,
+                 lease: float = 300.0):
+        self.db_path = db_path
+        self.send_batch = send_batch
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.lease = lease
+
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def enqueue(self, cursor: sqlite3.Cursor, recipient: str, subject: str, body: str,
+                kind: str, submission_id: Optional[str] = None) -> int:
+        """Queue a message using the caller's cursor.
+
+        The insert joins the caller's transaction, so the message becomes
+        visible to workers only once the caller commits. Call ``wake()``
+        after committing to have it picked up immediately.
+        """
+        cursor.execute(database.INSERT_MAIL, (submission_id, kind, recipient, subject, body, time.time()))
+        return cursor.lastrowid
+
+    def depth(self, conn: sqlite3.Connection) -> Dict[str, int]:
+        """Number of undelivered messages by status ('pending', 'sending')."""
+        counts = {'pending': 0, 'sending': 0}
+        counts.update(conn.execute(database.COUNT_QUEUED_MAIL).fetchall())
+        return counts
+
+    def wake(self):
+        """Signal idle workers that new messages are waiting."""
+        self._wakeup.set()
+
+    def start(self):
+        """Start the worker pool."""
+        if self._threads:
+            return
+        self._stopping.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._run_worker,
+                name=f"mail-worker-{index}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Mail queue started with {self.workers} worker(s)")
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the worker pool, letting in-flight deliveries finish."""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = database.connect(self.db_path, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _run_worker(self):
+        conn = self._connect()
+        try:
+            while not self._stopping.is_set():
+                try:
+                    messages = self._claim(conn)
+                except sqlite3.Error as e:
+                    logger.error(f"Mail queue claim failed: {str(e)}")
+                    messages = []
+
+                if not messages:
+                    self._wakeup.wait(self.poll_interval)
+                    self._wakeup.clear()
+                    continue
+
+                self._deliver(conn, messages)
+        finally:
+            conn.close()
+
+    def _claim(self, conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+        """Atomically lease up to ``batch_size`` due messages."""
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(database.SELECT_DUE_MAIL, (now, self.batch_size)).fetchall()
+
+            conn.executemany(database.LEASE_MAIL, [(now + self.lease, row['id']) for row in rows])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        messages = [dict(row) for row in rows]
+        for message in messages:
+            message['attempts'] += 1
+        return messages
+
+    def _deliver(self, conn: sqlite3.Connection, messages: List[Dict[str, Any]]):
+        try:
+            results = self.send_batch(messages)
+        except Exception as e:
+            results = [str(e)] * len(messages)
+        self._record_results(conn, messages, results)
+
+    async def run_async(self, send_batch: Callable[[List[Dict[str, Any]]], Awaitable[List[Optional[str]]]]):
+        """Drain the queue from an asyncio event loop until ``stop()`` is called.
+
+        Used instead of ``start()`` when an async SMTP client is available:
+        ``send_batch`` is awaited on the loop, and only the queue bookkeeping
+        runs on a dedicated database thread.
+        """
+        loop = asyncio.get_running_loop()
+        db_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mail-queue-db')
+        self._stopping.clear()
+        conn = await loop.run_in_executor(db_thread, self._connect)
+        logger.info("Mail queue started on the event loop")
+        try:
+            while not self._stopping.is_set():
+                try:
+                    messages = await loop.run_in_executor(db_thread, self._claim, conn)
+                except sqlite3.Error as e:
+                    logger.error(f"Mail queue claim failed: {str(e)}")
+                    messages = []
+
+                if not messages:
+                    await loop.run_in_executor(db_thread, self._wakeup.wait, self.poll_interval)
+                    self._wakeup.clear()
+                    continue
+
+                try:
+                    results = await send_batch(messages)
+                except Exception as e:
+                    results = [str(e)] * len(messages)
+                await loop.run_in_executor(db_thread, self._record_results, conn, messages, results)
+        finally:
+            await loop.run_in_executor(db_thread, conn.close)
+            db_thread.shutdown()
+
+    def _record_results(self, conn: sqlite3.Connection, messages: List[Dict[str, Any]],
+                        results: List[Optional[str]]):
+        for message, error in zip(messages, results):
+            if error is not None:
+                self._mark_failed(conn, message, error)
+                continue
+            try:
+                self._mark_sent(conn, message)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to record delivery of mail {message['id']}: {str(e)}")
+
+    def _mark_sent(self, conn: sqlite3.Connection, message: Dict[str, Any]):
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(database.MARK_MAIL_SENT, (message['id'],))
+
+            # A submission has been responded to once all of its mail is out
+            if message['submission_id']:
+                conn.execute(
+                    database.MARK_RESPONSE_SENT,
+                    (message['submission_id'], message['submission_id'])
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        logger.info(f"Sent {message['kind']} mail {message['id']} to {message['recipient']}")
+
+    def _mark_failed(self, conn: sqlite3.Connection, message: Dict[str, Any], error: str):
+        if message['attempts'] >= self.max_attempts:
+            status, next_attempt_at = 'failed', time.time()
+            logger.error(f"Giving up on {message['kind']} mail {message['id']} "
+                         f"after {message['attempts']} attempts: {error}")
+        else:
+            status, next_attempt_at = 'pending', time.time() + self._backoff(message['attempts'])
+            logger.warning(f"Delivery of {message['kind']} mail {message['id']} failed "
+                           f"(attempt {message['attempts']}), retrying: {error}")
+
+        try:
+            conn.execute(database.MARK_MAIL_FAILED, (status, next_attempt_at, error, message['id']))
+        except sqlite3.Error as e:
+            logger.error(f"Failed to record delivery failure of mail {message['id']}: {str(e)}")
+
+    def _backoff(self, attempts: int) -> float:
+        """Exponential backoff with jitter, capped at ``max_delay``."""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.8, 1.2)
@@ -0,0 +1,218 @@
+"""
+Media Streaming
+Serves the audio track and gallery media with HTTP range support: single
+ranges, multipart/byteranges responses and If-Range, streamed in chunks
+from a memory-mapped file. The number of concurrent range streams per
+client is capped so a few listeners cannot occupy every server thread.
+"""
+
+import mimetypes
+import mmap
+import os
+import threading
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from flask import Response, jsonify
+from werkzeug.http import http_date
+from werkzeug.security import safe_join
+from werkzeug.wsgi import ClosingIterator, wrap_file
+
+# A request asking for more ranges than this is served in full instead
+MAX_RANGES = 16
+
+
+class StreamLimiter:
+    """Counts open media streams per client."""
+
+    def __init__(self, max_per_client: int):
+        self.max_per_client = max_per_client
+        self._open: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def acquire(self, client: str) -> bool:
+        with self._lock:
+            if self._open[client] >= self.max_per_client:
+                return False
+            self._open[client] += 1
+            return True
+
+    def release(self, client: str):
+        with self._lock:
+            self._open[client] -= 1
+            if self._open[client] <= 0:
+                del self._open[client]
+
+    def open_streams(self) -> int:
+        with self._lock:
+            return sum(self._open.values())
+
+
+class MediaStreamer:
+    """Range-aware file responses for large media files."""
+
+    def __init__(self, chunk_size: int = 64 * 1024, max_streams_per_client: int = 2,
+                 max_age: int = 86400):
+        self.chunk_size = chunk_size
+        self.max_age = max_age
+        self.limiter = StreamLimiter(max_streams_per_client)
+
+    def send(self, request, directory: str, filename: str) -> Response:
+        path = safe_join(directory, filename)
+        if path is None or not os.path.isfile(path):
+            return jsonify({'success': False, 'message': 'Endpoint not found'}), 404
+
+        stat = os.stat(path)
+        size = stat.st_size
+        etag = f"{stat.st_mtime_ns:x}-{size:x}"
+        last_modified = datetime.fromtimestamp(int(stat.st_mtime), timezone.utc)
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+        if self._not_modified(request, etag, last_modified):
+            response = Response(status=304)
+            return self._with_validators(response, etag, last_modified)
+
+        ranges = self._requested_ranges(request, etag, last_modified, size)
+        if ranges == []:
+            response = Response(status=416)
+            response.headers['Content-Range'] = f"bytes */{size}"
+            return response
+
+        if ranges is None:
+            # Whole files are handed to the server's wsgi.file_wrapper and do
+            # not hold a worker thread, so they do not count as streams
+            response = self._full_response(request, path, size, mimetype)
+            response.headers['Accept-Ranges'] = 'bytes'
+            return self._with_validators(response, etag, last_modified)
+
+        client = request.remote_addr or 'unknown'
+        if not self.limiter.acquire(client):
+            response = jsonify({
+                'success': False,
+                'message': 'Too many concurrent media streams. Please try again later.'
+            })
+            response.status_code = 429
+            response.headers['Retry-After'] = '5'
+            return response
+
+        # direct_passthrough responses skip call_on_close, so the stream is
+        # released when the server closes the body iterator
+        def release():
+            self.limiter.release(client)
+
+        try:
+            if len(ranges) == 1:
+                response = self._single_range_response(path, size, mimetype, ranges[0], release)
+            else:
+                response = self._multipart_response(path, size, mimetype, ranges, release)
+        except Exception:
+            release()
+            raise
+
+        response.headers['Accept-Ranges'] = 'bytes'
+        return self._with_validators(response, etag, last_modified)
+
+    def _with_validators(self, response: Response, etag: str, last_modified: datetime) -> Response:
+        response.set_etag(etag)
+        response.headers['Last-Modified'] = http_date(last_modified)
+        response.headers['Cache-Control'] = f"public, max-age={self.max_age}"
+        return response
+
+    @staticmethod
+    def _not_modified(request, etag: str, last_modified: datetime) -> bool:
+        if request.if_none_match:
+            return request.if_none_match.contains(etag)
+        return request.if_modified_since is not None and last_modified <= request.if_modified_since
+
+    @staticmethod
+    def _requested_ranges(request, etag: str, last_modified: datetime,
+                          size: int) -> Optional[List[Tuple[int, int]]]:
+        """Satisfiable (start, stop) byte ranges, None for a full response.
+
+        Returns an empty list when a range was requested but none of it
+        can be satisfied.
+        """
+        requested = request.range
+        if requested is None or requested.units != 'bytes' or len(requested.ranges) > MAX_RANGES:
+            return None
+
+        # If-Range: only honour the Range header if the client's copy is current;
+        # a date validator must match Last-Modified exactly (RFC 9110 §13.1.5)
+        if_range = request.if_range
+        if if_range.etag is not None and if_range.etag != etag:
+            return None
+        if if_range.date is not None and if_range.date != last_modified:
+            return None
+
+        ranges = []
+        for start, stop in requested.ranges:
+            if start < 0:
+                start, stop = max(size + start, 0), size
+            else:
+                stop = size if stop is None else min(stop, size)
+            if start < stop:
+                ranges.append((start, stop))
+        return ranges
+
+    def _full_response(self, request, path: str, size: int, mimetype: str) -> Response:
+        # Whole-file responses go through wsgi.file_wrapper
+        response = Response(
+            wrap_file(request.environ, open(path, 'rb'), self.chunk_size),
+            mimetype=mimetype,
+            direct_passthrough=True
+        )
+        response.content_length = size
+        return response
+
+    def _chunks(self, path: str, ranges: List[Tuple[int, int]],
+                parts: Optional[List[Tuple[bytes, bytes]]] = None) -> Iterator[bytes]:
+        """Yield the requested ranges from a memory map, with optional part framing."""
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for index, (start, stop) in enumerate(ranges):
+                if parts:
+                    yield parts[index][0]
+                for offset in range(start, stop, self.chunk_size):
+                    yield mapped[offset:min(offset + self.chunk_size, stop)]
+                if parts:
+                    yield parts[index][1]
+
+    def _single_range_response(self, path: str, size: int, mimetype: str,
+                               byte_range: Tuple[int, int], on_close: Callable[[], None]) -> Response:
+        start, stop = byte_range
+        response = Response(
+            ClosingIterator(self._chunks(path, [byte_range]), on_close),
+            status=206,
+            mimetype=mimetype,
+            direct_passthrough=True
+        )
+        response.headers['Content-Range'] = f"bytes {start}-{stop - 1}/{size}"
+        response.content_length = stop - start
+        return response
+
+    def _multipart_response(self, path: str, size: int, mimetype: str,
+                            ranges: List[Tuple[int, int]], on_close: Callable[[], None]) -> Response:
+        boundary = uuid.uuid4().hex
+        parts = []
+        for index, (start, stop) in enumerate(ranges):
+            delimiter = b'' if index == 0 else b'\r\n'
+            header = delimiter + (
+                f"--{boundary}\r\n"
+                f"Content-Type: {mimetype}\r\n"
+                f"Content-Range: bytes {start}-{stop - 1}/{size}\r\n\r\n"
+            ).encode('ascii')
+            trailer = f"\r\n--{boundary}--\r\n".encode('ascii') if index == len(ranges) - 1 else b''
+            parts.append((header, trailer))
+
+        length = sum(len(header) + len(trailer) for header, trailer in parts)
+        length += sum(stop - start for start, stop in ranges)
+
+        response = Response(
+            ClosingIterator(self._chunks(path, ranges, parts), on_close),
+            status=206,
+            content_type=f"multipart/byteranges; boundary={boundary}",
+            direct_passthrough=True
+        )
+        response.content_length = length
+        return response
@@ -0,0 +1,368 @@
+"""
+Schema Migrations
+Versioned schema changes for portfolio.db. Applied versions are recorded
+in the ``schema_version`` table and each pending migration runs in its own
+transaction. Migrations are additive (new tables, ``IF NOT EXISTS``
+indexes) and the database runs in WAL mode, so readers keep being served
+while a migration holds the write lock.
+
+Usage::
+
+    python migrations.py migrate       # apply pending migrations
+    python migrations.py status        # show applied and pending versions
+    python migrations.py check-plans   # fail if any query does a full table scan
+"""
+
+import argparse
+import logging
+import sqlite3
+import sys
+from typing import Callable, List, Tuple, Union
+
+import analytics_partitions
+import database
+import lookups
+import rollups
+
+logger = logging.getLogger(__name__)
+
+Step = Union[str, Callable[[sqlite3.Connection], None]]
+
+# (version, description, steps). Never edit a migration that has shipped;
+# add a new one instead.
+MIGRATIONS: List[Tuple[int, str, List[Step]]] = [
+    (1, 'Initial schema', [
+        '''
+        CREATE TABLE IF NOT EXISTS contact_submissions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            submission_id TEXT UNIQUE NOT NULL,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            company TEXT,
+            project_type TEXT,
+            budget TEXT,
+            timeline TEXT,
+            message TEXT NOT NULL,
+            newsletter_signup BOOLEAN DEFAULT FALSE,
+            ip_address TEXT,
+            user_agent TEXT,
+            referrer TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            status TEXT DEFAULT 'pending',
+            response_sent BOOLEAN DEFAULT FALSE
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS analytics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_type TEXT NOT NULL,
+            event_data TEXT,
+            ip_address TEXT,
+            user_agent TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS newsletter_subscribers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE NOT NULL,
+            name TEXT,
+            subscribed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            status TEXT DEFAULT 'active',
+            unsubscribe_token TEXT UNIQUE
+        )
+        '''
+    ]),
+    (2, 'Outbound mail queue', [
+        '''
+        CREATE TABLE IF NOT EXISTS mail_queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            submission_id TEXT,
+            kind TEXT NOT NULL,
+            recipient TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            status TEXT DEFAULT 'pending',
+            attempts INTEGER DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            sent_at DATETIME
+        )
+        '''
+    ]),
+    (3, 'Statistics rollups and counters', [
+        '''
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS submission_rollups_daily (
+            day TEXT NOT NULL,
+            project_type TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, project_type)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS project_type_counts (
+            project_type TEXT PRIMARY KEY,
+            count INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS analytics_rollups_hourly (
+            hour TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (hour, event_type)
+        )
+        ''',
+        rollups.rebuild_in_transaction
+    ]),
+    (4, 'Indexes for stats, maintenance and mail queue queries', [
+        'CREATE INDEX IF NOT EXISTS idx_analytics_timestamp ON analytics (timestamp, event_type)',
+        'CREATE INDEX IF NOT EXISTS idx_analytics_event_type ON analytics (event_type, timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_contact_submissions_timestamp ON contact_submissions (timestamp)',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_contact_submissions_project_type
+        ON contact_submissions (project_type, timestamp)
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_newsletter_subscribers_status ON newsletter_subscribers (status)',
+        'CREATE INDEX IF NOT EXISTS idx_mail_queue_due ON mail_queue (status, next_attempt_at)',
+        'CREATE INDEX IF NOT EXISTS idx_mail_queue_submission ON mail_queue (submission_id, status)',
+        'CREATE INDEX IF NOT EXISTS idx_project_type_counts_count ON project_type_counts (count DESC, project_type)',
+        'ANALYZE'
+    ]),
+    (5, 'Shared response cache', [
+        '''
+        CREATE TABLE IF NOT EXISTS response_cache (
+            key TEXT PRIMARY KEY,
+            body BLOB NOT NULL,
+            etag TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_response_cache_expires_at ON response_cache (expires_at)'
+    ]),
+    (6, 'Monthly analytics partitions behind the analytics view', [
+        analytics_partitions.partition_legacy_table
+    ]),
+    (7, 'Lookup tables for repeated strings', [
+        lookups.create_tables,
+        analytics_partitions.encode_partition_strings,
+        'ALTER TABLE contact_submissions ADD COLUMN ip_address_id INTEGER',
+        'ALTER TABLE contact_submissions ADD COLUMN user_agent_id INTEGER',
+        'ALTER TABLE contact_submissions ADD COLUMN referrer_id INTEGER',
+        '''
+        INSERT INTO ip_addresses (value)
+        SELECT DISTINCT ip_address FROM contact_submissions WHERE ip_address IS NOT NULL
+        ON CONFLICT (value) DO NOTHING
+        ''',
+        '''
+        INSERT INTO user_agents (value)
+        SELECT DISTINCT user_agent FROM contact_submissions WHERE user_agent IS NOT NULL
+        ON CONFLICT (value) DO NOTHING
+        ''',
+        '''
+        INSERT INTO referrers (value)
+        SELECT DISTINCT referrer FROM contact_submissions WHERE referrer IS NOT NULL
+        ON CONFLICT (value) DO NOTHING
+        ''',
+        '''
+        UPDATE contact_submissions SET
+            ip_address_id = (SELECT id FROM ip_addresses WHERE value = ip_address),
+            user_agent_id = (SELECT id FROM user_agents WHERE value = user_agent),
+            referrer_id = (SELECT id FROM referrers WHERE value = referrer)
+        ''',
+        'ALTER TABLE contact_submissions DROP COLUMN ip_address',
+        'ALTER TABLE contact_submissions DROP COLUMN user_agent',
+        'ALTER TABLE contact_submissions DROP COLUMN referrer',
+        '''
+        CREATE VIEW IF NOT EXISTS contact_submission_details AS
+        SELECT c.id, c.submission_id, c.name, c.email, c.company, c.project_type, c.budget,
+               c.timeline, c.message, c.newsletter_signup, i.value AS ip_address,
+               u.value AS user_agent, r.value AS referrer, c.timestamp, c.status, c.response_sent
+        FROM contact_submissions c
+        LEFT JOIN ip_addresses i ON i.id = c.ip_address_id
+        LEFT JOIN user_agents u ON u.id = c.user_agent_id
+        LEFT JOIN referrers r ON r.id = c.referrer_id
+        '''
+    ]),
+    (8, 'Idempotency keys for submissions', [
+        '''
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            key TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            response TEXT NOT NULL,
+            status INTEGER NOT NULL,
+            expires_at REAL NOT NULL
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys (expires_at)'
+    ]),
+    (9, 'Response cache generations', [
+        '''
+        CREATE TABLE IF NOT EXISTS response_cache_generations (
+            key TEXT PRIMARY KEY,
+            generation INTEGER NOT NULL
+        )
+        '''
+    ])
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    """Highest applied migration version, 0 for a new database."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply every pending migration. Returns the resulting schema version.
+
+    ``PRAGMA user_version`` mirrors the applied version, so an up-to-date
+    database is recognised from its header alone, without DDL or a write lock.
+    """
+    if conn.execute('PRAGMA user_version').fetchone()[0] == LATEST_VERSION:
+        return LATEST_VERSION
+
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        version = current_version(conn)
+        for target, description, steps in MIGRATIONS:
+            if target <= version:
+                continue
+
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for step in steps:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                conn.execute(
+                    'INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                    (target, description)
+                )
+                conn.execute(f'PRAGMA user_version = {target}')
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+            logger.info(f"Applied migration {target}: {description}")
+            version = target
+
+        # Databases migrated before user_version was kept in step
+        if conn.execute('PRAGMA user_version').fetchone()[0] != version:
+            conn.execute(f'PRAGMA user_version = {version}')
+        return version
+    finally:
+        conn.isolation_level = isolation_level
+
+
+# Partition the templated analytics statements are planned against; it is
+# created inside the check's transaction and rolled back
+PLAN_PARTITION_MONTH = '0001-01'
+
+
+def request_path_statements() -> List[Tuple[str, str]]:
+    """Queries run while serving requests, as (name, sql) pairs.
+
+    Every query defined in the database module (the rollup counters and
+    the admin export pages included), plus the statements the analytics
+    writer builds per batch: the partition insert, its sequence sync and
+    the lookup table reads and inserts. Not included: the rollup rebuild
+    and migration statements, which aggregate whole tables by design, and
+    partition creation, which runs once a month.
+    """
+    statements = [
+        (name, value) for name, value in vars(database).items()
+        if name.isupper() and isinstance(value, str)
+        and value.lstrip().split(None, 1)[0].upper() in ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
+    ]
+    partition = analytics_partitions.table_for(PLAN_PARTITION_MONTH)
+    statements += [
+        ('analytics_partitions.SYNC_SEQUENCE', analytics_partitions.SYNC_SEQUENCE),
+        ('analytics_partitions.INSERT_EVENT', analytics_partitions.INSERT_EVENT.format(table=partition))
+    ]
+    for table in lookups.TABLES:
+        statements += [
+            (f"lookups.{table.table}.select", table.select_sql),
+            (f"lookups.{table.table}.insert", table.insert_sql)
+        ]
+    return statements
+
+
+def find_full_scans(conn: sqlite3.Connection) -> List[Tuple[str, str]]:
+    """Run EXPLAIN QUERY PLAN for every query and report full table scans.
+
+    A ``SCAN`` step is acceptable only when it walks an index. Scans of a
+    view's co-routine or materialized subquery are skipped: the plan lists
+    the steps reading its underlying tables separately. So are scans of
+    ``sqlite_sequence``, which holds one row per AUTOINCREMENT table.
+
+    The queries are planned with a partition behind the ``analytics`` view,
+    created in a transaction that is rolled back afterwards.
+    """
+    violations = []
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    conn.execute('BEGIN')
+    try:
+        analytics_partitions.create_partition(conn, PLAN_PARTITION_MONTH)
+        for name, sql in request_path_statements():
+            params = [None] * sql.count('?')
+            plan = conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+            subqueries = {row[-1].split(' ', 1)[1] for row in plan
+                          if row[-1].startswith(('CO-ROUTINE ', 'MATERIALIZE '))}
+            for row in plan:
+                detail = row[-1]
+                if detail.startswith('SCAN ') and 'INDEX' not in detail and 'CONSTANT ROW' not in detail \
+                        and detail[5:] not in subqueries and detail != 'SCAN sqlite_sequence':
+                    violations.append((name, detail))
+    finally:
+        conn.execute('ROLLBACK')
+        conn.isolation_level = isolation_level
+    return violations
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Manage the portfolio.db schema.')
+    parser.add_argument('command', choices=['migrate', 'status', 'check-plans'])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    connection = database.connect()
+    try:
+        if args.command == 'migrate':
+            print(f"Schema version {migrate(connection)}")
+
+        elif args.command == 'status':
+            applied = current_version(connection)
+            for version, description, _ in MIGRATIONS:
+                state = 'applied' if version <= applied else 'pending'
+                print(f"{version:>4}  {state:<8} {description}")
+
+        elif args.command == 'check-plans':
+            migrate(connection)
+            scans = find_full_scans(connection)
+            for name, detail in scans:
+                print(f"FULL SCAN  {name}: {detail}")
+            if scans:
+                sys.exit(1)
+            print(f"OK: {len(request_path_statements())} queries use indexes")
+    finally:
+        connection.close()
@@ -0,0 +1,210 @@
+"""
+Shared Rate Limit Storage
+A ``limits`` storage backend kept in a SQLite database in WAL mode, so
+that every server process on the host counts against the same limits
+without an external service. Importing this module registers the
+``sqlite://`` scheme, e.g. ``sqlite:///ratelimits.db`` (relative path) or
+``sqlite:////var/lib/portfolio/ratelimits.db`` (absolute path).
+
+Besides the fixed window and sliding window counter operations used by
+Flask-Limiter, the storage can check and acquire several sliding windows
+in one transaction: either every limit is charged or none is.
+"""
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from math import floor
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from limits import RateLimitItem
+from limits.storage import Storage
+from limits.storage.base import SlidingWindowCounterSupport, TimestampedSlidingWindow
+from limits.strategies import RateLimiter, SlidingWindowCounterRateLimiter
+
+import database
+
+# (key, limit, expiry in seconds, amount)
+WindowEntry = Tuple[str, int, int, int]
+
+CREATE_TABLE = '''
+    CREATE TABLE IF NOT EXISTS rate_limits (
+        key TEXT PRIMARY KEY,
+        count INTEGER NOT NULL,
+        expires_at REAL NOT NULL
+    ) WITHOUT ROWID
+'''
+
+# A counter whose window has expired starts again from ``amount``
+INCREMENT = '''
+    INSERT INTO rate_limits (key, count, expires_at) VALUES (?, ?, ?)
+    ON CONFLICT (key) DO UPDATE SET
+        count = CASE WHEN expires_at <= ? THEN excluded.count ELSE count + excluded.count END,
+        expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END
+    RETURNING count
+'''
+
+SELECT_COUNT = 'SELECT count, expires_at FROM rate_limits WHERE key = ? AND expires_at > ?'
+
+SELECT_WINDOW_COUNTS = 'SELECT key, count FROM rate_limits WHERE key IN (?, ?) AND expires_at > ?'
+
+DELETE_KEY = 'DELETE FROM rate_limits WHERE key = ?'
+
+DELETE_ALL = 'DELETE FROM rate_limits'
+
+PURGE_EXPIRED = 'DELETE FROM rate_limits WHERE expires_at <= ?'
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """Rate limit counters in a SQLite table shared by all local processes."""
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, purge_every: int = 1000, **options):
+        self.path = uri.split('://', 1)[1][1:] or 'ratelimits.db'
+        self.purge_every = int(purge_every)
+        self._writes = 0
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        # The database is opened, and the table created, by the first rate limit check
+        self._table_ready = False
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit; multi-statement operations open their own transaction
+            conn = database.connect(self.path, isolation_level=None, check_same_thread=False)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+                if not self._table_ready:
+                    conn.execute(CREATE_TABLE)
+                    self._table_ready = True
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Hold the write lock for a read-check-write sequence."""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _increment(self, conn: sqlite3.Connection, key: str, expiry: float, amount: int, now: float) -> int:
+        count = conn.execute(INCREMENT, (key, amount, now + expiry, now, now)).fetchone()[0]
+        with self._lock:
+            self._writes += 1
+            purge = self._writes % self.purge_every == 0
+        if purge:
+            conn.execute(PURGE_EXPIRED, (now,))
+        return count
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        return self._increment(self._connection(), key, expiry, amount, time.time())
+
+    def get(self, key: str) -> int:
+        row = self._connection().execute(SELECT_COUNT, (key, time.time())).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str) -> float:
+        now = time.time()
+        row = self._connection().execute(SELECT_COUNT, (key, now)).fetchone()
+        return row[1] if row else now
+
+    def check(self) -> bool:
+        try:
+            self._connection().execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> Optional[int]:
+        return self._connection().execute(DELETE_ALL).rowcount
+
+    def clear(self, key: str) -> None:
+        self._connection().execute(DELETE_KEY, (key,))
+
+    def _sliding_window(self, conn: sqlite3.Connection, key: str, expiry: int,
+                        now: float) -> Tuple[int, float, int, float]:
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        counts = dict(conn.execute(SELECT_WINDOW_COUNTS, (previous_key, current_key, now)).fetchall())
+        previous_count = counts.get(previous_key, 0)
+        current_count = counts.get(current_key, 0)
+        previous_ttl = 0.0 if previous_count == 0 else (1 - (((now - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def get_sliding_window(self, key: str, expiry: int) -> Tuple[int, float, int, float]:
+        return self._sliding_window(self._connection(), key, expiry, time.time())
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        for window_key in self.sliding_window_keys(key, expiry, time.time()):
+            self.clear(window_key)
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        return self.acquire_sliding_window_entries([(key, limit, expiry, amount)]) is None
+
+    def acquire_sliding_window_entries(self, entries: Sequence[WindowEntry]) -> Optional[int]:
+        """Charge several sliding windows atomically.
+
+        Returns None if every entry was acquired, otherwise the index of the
+        first breached entry, in which case nothing is charged.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            for index, (key, limit, expiry, amount) in enumerate(entries):
+                previous_count, previous_ttl, current_count, _ = self._sliding_window(conn, key, expiry, now)
+                if floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+                    return index
+
+            for key, _, expiry, amount in entries:
+                # The current window is read as the previous one next period
+                _, current_key = self.sliding_window_keys(key, expiry, now)
+                self._increment(conn, current_key, 2 * expiry, amount, now)
+        return None
+
+    def close(self):
+        with self._lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local.__dict__.pop('conn', None)
+
+
+def hit_all(strategy: RateLimiter, items: Sequence[RateLimitItem], identifiers: Sequence[str],
+            cost: int = 1) -> Optional[RateLimitItem]:
+    """Charge every limit in ``items`` for one request, or none of them.
+
+    Returns the first breached limit, or None if the request is allowed.
+    Storages without an atomic multi-window operation are tested first and
+    then charged, which is atomic only within a single process.
+    """
+    storage = strategy.storage
+    if isinstance(strategy, SlidingWindowCounterRateLimiter) and isinstance(storage, SQLiteStorage):
+        breached = storage.acquire_sliding_window_entries([
+            (item.key_for(*identifiers), item.amount, item.get_expiry(), cost) for item in items
+        ])
+        return None if breached is None else items[breached]
+
+    for item in items:
+        if not strategy.test(item, *identifiers, cost=cost):
+            return item
+    for item in items:
+        if not strategy.hit(item, *identifiers, cost=cost):
+            return item
+    return None
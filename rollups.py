@@ -0,0 +1,170 @@
+"""
+Statistics Rollups
+Pre-aggregated counters and hourly/daily rollup tables behind /api/stats.
+Ingestion updates them incrementally in the same transaction as the raw
+rows, so reading statistics touches a handful of small rows regardless of
+how large the raw tables grow.
+
+Rebuild the rollups from the raw tables with::
+
+    python rollups.py backfill
+"""
+
+import argparse
+import logging
+import sqlite3
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+import analytics_partitions
+import database
+
+logger = logging.getLogger(__name__)
+
+# Counter names in stats_counters
+TOTAL_SUBMISSIONS = 'total_submissions'
+ACTIVE_SUBSCRIBERS = 'active_subscribers'
+TOTAL_ANALYTICS_EVENTS = 'total_analytics_events'
+
+
+def _day(timestamp: Optional[datetime] = None) -> str:
+    return (timestamp or datetime.utcnow()).strftime('%Y-%m-%d')
+
+
+def _hour(timestamp: str) -> str:
+    """Truncate a 'YYYY-MM-DD HH:MM:SS' timestamp to the hour."""
+    return f"{timestamp[:13]}:00:00"
+
+
+def record_submission(cursor: sqlite3.Cursor, project_type: str,
+                      timestamp: Optional[datetime] = None):
+    """Count a new contact submission."""
+    cursor.execute(database.UPSERT_COUNTER, (TOTAL_SUBMISSIONS, 1))
+    cursor.execute(database.UPSERT_SUBMISSIONS_DAILY, (_day(timestamp), project_type or '', 1))
+    if project_type:
+        cursor.execute(database.UPSERT_PROJECT_TYPE_COUNT, (project_type, 1))
+
+
+def record_subscribers(cursor: sqlite3.Cursor, added: int):
+    """Count newly added active newsletter subscribers."""
+    if added:
+        cursor.execute(database.UPSERT_COUNTER, (ACTIVE_SUBSCRIBERS, added))
+
+
+def record_analytics_events(cursor: sqlite3.Cursor, events: Iterable[Sequence[Any]]):
+    """Count a batch of analytics rows as written by the ingestion pipeline.
+
+    Each row is ``(event_type, event_data, ip_address, user_agent, timestamp)``.
+    """
+    buckets = Counter((_hour(event[4]), event[0]) for event in events)
+    if not buckets:
+        return
+    cursor.executemany(
+        database.UPSERT_ANALYTICS_HOURLY,
+        [(hour, event_type, count) for (hour, event_type), count in buckets.items()]
+    )
+    cursor.execute(database.UPSERT_COUNTER, (TOTAL_ANALYTICS_EVENTS, sum(buckets.values())))
+
+
+def read_stats(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """Read the /api/stats figures from the rollup tables."""
+    def counter(name: str) -> int:
+        row = conn.execute(database.SELECT_COUNTER, (name,)).fetchone()
+        return row[0] if row else 0
+
+    return {
+        'total_submissions': counter(TOTAL_SUBMISSIONS),
+        'recent_submissions': conn.execute(database.SUM_RECENT_SUBMISSIONS).fetchone()[0],
+        'newsletter_subscribers': counter(ACTIVE_SUBSCRIBERS),
+        'recent_analytics_events': conn.execute(database.SUM_RECENT_ANALYTICS_EVENTS).fetchone()[0],
+        'popular_project_types': [
+            {'type': row[0], 'count': row[1]}
+            for row in conn.execute(database.SELECT_TOP_PROJECT_TYPES)
+        ]
+    }
+
+
+def rebuild_in_transaction(conn: sqlite3.Connection):
+    """Recompute every rollup and counter inside the caller's transaction."""
+    conn.execute('DELETE FROM stats_counters')
+    conn.execute('DELETE FROM submission_rollups_daily')
+    conn.execute('DELETE FROM project_type_counts')
+    conn.execute('DELETE FROM analytics_rollups_hourly')
+
+    conn.execute('''
+        INSERT INTO stats_counters (name, value)
+        SELECT ?, COUNT(*) FROM contact_submissions
+    ''', (TOTAL_SUBMISSIONS,))
+    conn.execute('''
+        INSERT INTO stats_counters (name, value)
+        SELECT ?, COUNT(*) FROM newsletter_subscribers WHERE status = 'active'
+    ''', (ACTIVE_SUBSCRIBERS,))
+
+    conn.execute('''
+        INSERT INTO submission_rollups_daily (day, project_type, count)
+        SELECT date(timestamp), COALESCE(project_type, ''), COUNT(*)
+        FROM contact_submissions
+        GROUP BY date(timestamp), COALESCE(project_type, '')
+    ''')
+    conn.execute('''
+        INSERT INTO project_type_counts (project_type, count)
+        SELECT project_type, COUNT(*) FROM contact_submissions
+        WHERE project_type IS NOT NULL AND project_type != ''
+        GROUP BY project_type
+    ''')
+    if not analytics_partitions.is_partitioned(conn):
+        # Before the partitions migration events are in a plain table
+        conn.execute('''
+            INSERT INTO stats_counters (name, value)
+            SELECT ?, COUNT(*) FROM analytics
+        ''', (TOTAL_ANALYTICS_EVENTS,))
+        conn.execute('''
+            INSERT INTO analytics_rollups_hourly (hour, event_type, count)
+            SELECT strftime('%Y-%m-%d %H:00:00', timestamp), event_type, COUNT(*)
+            FROM analytics
+            GROUP BY strftime('%Y-%m-%d %H:00:00', timestamp), event_type
+        ''')
+        return
+
+    # Grouped on event type ids in each partition, with the names joined
+    # once per group rather than once per row through the analytics view.
+    # Partitions hold whole months, so their hours never overlap.
+    total = 0
+    for partition in analytics_partitions.live_partitions(conn):
+        table = partition['table']
+        total += conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+        conn.execute(f'''
+            INSERT INTO analytics_rollups_hourly (hour, event_type, count)
+            SELECT c.hour, e.value, c.count
+            FROM (
+                SELECT strftime('%Y-%m-%d %H:00:00', timestamp) AS hour, event_type_id, COUNT(*) AS count
+                FROM {table}
+                GROUP BY 1, 2
+            ) c
+            JOIN event_types e ON e.id = c.event_type_id
+        ''')
+    conn.execute(database.UPSERT_COUNTER, (TOTAL_ANALYTICS_EVENTS, total))
+
+
+def rebuild(conn: sqlite3.Connection):
+    """Recompute every rollup and counter from the raw tables."""
+    with conn:
+        rebuild_in_transaction(conn)
+    logger.info("Statistics rollups rebuilt from raw tables")
+
+
+if __name__ == '__main__':
+    import migrations
+
+    parser = argparse.ArgumentParser(description='Maintain the statistics rollup tables.')
+    parser.add_argument('command', choices=['backfill'], help='backfill: rebuild rollups from raw tables')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    connection = database.connect()
+    try:
+        migrations.migrate(connection)
+        rebuild(connection)
+    finally:
+        connection.close()
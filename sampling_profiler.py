@@ -0,0 +1,254 @@
+"""
+Sampling Profiler
+An opt-in profiler that can stay on in production. A background thread
+samples the stack of every thread that is handling a request and counts
+the stacks in collapsed form: one ``root;frame;...;leaf count`` line per
+distinct stack, rooted at the request's route. That is the input format
+of flamegraph.pl, speedscope and inferno.
+
+Each request also keeps its own samples. A request slower than
+``slow_request`` seconds keeps them as a trace; only the most recent
+``max_traces`` traces are held. A request handled on one thread is
+marked with ``begin``/``end``; one whose work hops between threads, as
+under ASGI, is opened once and each of its calls is run with ``call``,
+so the trace covers the whole request.
+
+The sampler times itself and stretches its interval so that sampling
+takes at most ``max_overhead`` of the wall clock. That bounds the GIL
+time taken from request threads however busy the server gets.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from types import FrameType
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional
+
+# Frames kept per stack, counted from the innermost
+MAX_DEPTH = 128
+
+TRUNCATED = '[truncated]'
+OTHER_STACKS = '[other stacks]'
+
+
+class ActiveRequest:
+    __slots__ = ('label', 'path', 'started', 'started_at', 'samples')
+
+    def __init__(self, label: str, path: str):
+        self.label = label
+        self.path = path
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.samples: Counter = Counter()
+
+
+class Trace(NamedTuple):
+    id: int
+    label: str
+    path: str
+    started_at: float
+    duration_ms: float
+    samples: Dict[str, int]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'route': self.label,
+            'path': self.path,
+            'started_at': datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+            'duration_ms': self.duration_ms,
+            'samples': sum(self.samples.values())
+        }
+
+
+def collapsed(stacks: Dict[str, int]) -> str:
+    """Stacks in the collapsed format, one ``stack count`` line each."""
+    return ''.join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+
+class SamplingProfiler:
+    """Samples request thread stacks on a background thread."""
+
+    def __init__(self, interval: float = 0.01, slow_request: float = 0.5, max_overhead: float = 0.01,
+                 max_traces: int = 50, max_stacks: int = 5000, all_threads: bool = False):
+        self.interval = interval
+        self.slow_request = slow_request
+        self.max_overhead = max_overhead
+        self.max_stacks = max_stacks
+        # Also sample threads outside requests (mail delivery, analytics
+        # writes), rooted at the thread name
+        self.all_threads = all_threads
+
+        self._active: Dict[int, ActiveRequest] = {}
+        self._stacks: Counter = Counter()
+        self._traces: Deque[Trace] = deque(maxlen=max_traces)
+        self._trace_ids = 0
+        self._labels: Dict[Any, str] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._effective_interval = interval
+        self._sample_cost = 0.0
+        self._samples = 0
+        self._sampling_seconds = 0.0
+        self._started = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        """Start the sampler thread."""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._effective_interval = self.interval
+        self._sample_cost = 0.0
+        self._samples = 0
+        self._sampling_seconds = 0.0
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._active.clear()
+
+    def open(self, label: str, path: str) -> Optional[ActiveRequest]:
+        """A request for ``label`` that no thread is handling yet; None while stopped."""
+        if self._thread is None:
+            return None
+        return ActiveRequest(label, path)
+
+    def close(self, request: Optional[ActiveRequest]):
+        """Finish a request, keeping a trace if it was slow."""
+        if request is None:
+            return
+        duration = time.perf_counter() - request.started
+        if duration < self.slow_request:
+            return
+        with self._lock:
+            self._trace_ids += 1
+            self._traces.append(Trace(self._trace_ids, request.label, request.path, request.started_at,
+                                      round(duration * 1000, 3), dict(request.samples)))
+
+    def begin(self, label: str, path: str):
+        """Mark the current thread as handling a request for ``label``."""
+        request = self.open(label, path)
+        if request is not None:
+            self._active[threading.get_ident()] = request
+
+    def end(self):
+        """Finish the current thread's request, keeping a trace if it was slow."""
+        self.close(self._active.pop(threading.get_ident(), None))
+
+    def call(self, request: ActiveRequest, func: Callable, *args) -> Any:
+        """Run ``func`` on the current thread as part of ``request``.
+
+        A request can span several calls, on any threads; its samples and
+        duration run from ``open`` to ``close``.
+        """
+        ident = threading.get_ident()
+        self._active[ident] = request
+        try:
+            return func(*args)
+        finally:
+            self._active.pop(ident, None)
+
+    def _fold(self, frame: Optional[FrameType], root: str) -> str:
+        labels = self._labels
+        names = []
+        while frame is not None and len(names) < MAX_DEPTH:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+            names.append(label)
+            frame = frame.f_back
+        if frame is not None:
+            names.append(TRUNCATED)
+        names.append(root)
+        return ';'.join(reversed(names))
+
+    def _sample(self, own_ident: int):
+        frames = sys._current_frames()
+        active = self._active.copy()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()} if self.all_threads else {}
+
+        samples = []
+        for ident, frame in frames.items():
+            request = active.get(ident)
+            if request is not None:
+                samples.append((request, self._fold(frame, request.label)))
+            elif self.all_threads and ident != own_ident:
+                samples.append((None, self._fold(frame, f"thread:{thread_names.get(ident, ident)}")))
+        del frames
+
+        with self._lock:
+            for request, stack in samples:
+                if request is not None:
+                    request.samples[stack] += 1
+                if stack not in self._stacks and len(self._stacks) >= self.max_stacks:
+                    stack = f"{stack.split(';', 1)[0]};{OTHER_STACKS}"
+                self._stacks[stack] += 1
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stopping.wait(self._effective_interval):
+            started = time.perf_counter()
+            self._sample(own_ident)
+            cost = time.perf_counter() - started
+
+            self._samples += 1
+            self._sampling_seconds += cost
+            # Wait long enough that sampling stays within the overhead budget
+            self._sample_cost = 0.8 * self._sample_cost + 0.2 * cost if self._samples > 1 else cost
+            self._effective_interval = max(self.interval,
+                                           self._sample_cost * (1 / self.max_overhead - 1))
+
+    def folded(self, trace_id: Optional[int] = None) -> Optional[str]:
+        """Collapsed stacks of every sample, or of one trace (None if it is gone)."""
+        with self._lock:
+            if trace_id is None:
+                return collapsed(self._stacks)
+            for trace in self._traces:
+                if trace.id == trace_id:
+                    return collapsed(trace.samples)
+        return None
+
+    def traces(self) -> List[Dict[str, Any]]:
+        """Summaries of the retained slow-request traces, newest first."""
+        with self._lock:
+            return [trace.summary() for trace in reversed(self._traces)]
+
+    def reset(self):
+        """Discard the collected stacks and traces."""
+        with self._lock:
+            self._stacks.clear()
+            self._traces.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self._started if self.running else 0.0
+        with self._lock:
+            stacks = len(self._stacks)
+            traces = len(self._traces)
+        return {
+            'running': self.running,
+            'interval_ms': self.interval * 1000,
+            'effective_interval_ms': round(self._effective_interval * 1000, 3),
+            'slow_request_ms': self.slow_request * 1000,
+            'samples': self._samples,
+            'sample_cost_us': round(self._sample_cost * 1e6, 1),
+            # Share of wall-clock time spent sampling, against the budget
+            'overhead': round(self._sampling_seconds / elapsed, 5) if elapsed else 0.0,
+            'max_overhead': self.max_overhead,
+            'stacks': stacks,
+            'traces': traces
+        }
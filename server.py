@@ -5,106 +5,264 @@ A Flask-based backend server for handling contact form submissions,
 analytics, and other portfolio functionality.
 """
 
+import argparse
 import os
 import json
-import smtplib
 import logging
+import sys
 from datetime import datetime, timedelta
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from typing import Dict, Any, Optional
-import re
+from typing import TYPE_CHECKING, Dict, Any, List, NamedTuple, Optional, Tuple
 
-from flask import Flask, request, jsonify, render_template_string, send_from_directory, send_file
+from flask import Flask, Response, abort, request, jsonify, render_template_string, send_from_directory, send_file
 from waitress import serve
 from flask_cors import CORS
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+from flask_limiter import ExemptionScope, Limiter
+from flask_limiter.util import get_qualified_name, get_remote_address
+from limits import parse_many
 import sqlite3
 import hashlib
+import hmac
+import time
 import uuid
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('portfolio.log'),
-        logging.StreamHandler()
-    ]
+import build_assets
+import content
+import database
+import exports
+import idempotency
+import images
+import lookups
+import metrics
+import migrations
+import rate_limits
+import rollups
+import structured_logging
+import validation
+from mail_queue import MailQueue
+from smtp_pool import SMTPConnectionPool
+from analytics_pipeline import AnalyticsBuffer
+from cache import create_cache
+from static_cache import StaticAssetCache
+from media import MediaStreamer
+from sampling_profiler import SamplingProfiler
+
+if TYPE_CHECKING:
+    from email.mime.multipart import MIMEMultipart
+
+# Configure logging: request threads only enqueue records, a listener
+# thread writes JSON lines to the rotating log file and text to the console
+LOG_CONFIG = {
+    'file': os.getenv('LOG_FILE', 'portfolio.log'),
+    'level': os.getenv('LOG_LEVEL', 'INFO'),
+    'max_bytes': int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+    'max_age': float(os.getenv('LOG_ROTATE_SECONDS', '86400')),
+    'backup_count': int(os.getenv('LOG_BACKUP_COUNT', '7')),
+    'queue_size': int(os.getenv('LOG_QUEUE_SIZE', '10000')),
+    'static_sample_rate': float(os.getenv('LOG_STATIC_SAMPLE_RATE', '0.05'))
+}
+
+log_handler = structured_logging.configure_logging(
+    LOG_CONFIG['file'],
+    level=LOG_CONFIG['level'],
+    max_bytes=LOG_CONFIG['max_bytes'],
+    max_age=LOG_CONFIG['max_age'],
+    backup_count=LOG_CONFIG['backup_count'],
+    queue_size=LOG_CONFIG['queue_size']
 )
 logger = logging.getLogger(__name__)
+access_logger = logging.getLogger('portfolio.access')
+
+# Static files and media make up most requests; only a sample of their
+# successful responses is logged
+static_access_sampler = structured_logging.AccessSampler(LOG_CONFIG['static_sample_rate'])
+STATIC_ENDPOINTS = frozenset({
+    'serve_index', 'serve_static_files', 'serve_styles', 'serve_js', 'serve_data',
+    'serve_gallery_images', 'serve_gallery_variant', 'serve_audio'
+})
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
 
-# Enable CORS for frontend
-CORS(app, origins=['http://localhost:5000', 'https://leafbloom.online'])
+# Enable CORS for frontend (asgi.py sends the same headers)
+CORS_ORIGINS = ['http://localhost:5000', 'https://leafbloom.online']
+CORS(app, origins=CORS_ORIGINS)
+
+# Request metrics, exposed in the Prometheus text format on /metrics
+METRICS_CONFIG = {
+    'enabled': os.getenv('METRICS_ENABLED', 'True').lower() == 'true',
+    'token': os.getenv('METRICS_TOKEN', '')
+}
+
+metrics_registry = metrics.Registry()
+REQUEST_LATENCY = metrics_registry.histogram(
+    'http_request_duration_seconds', 'Time spent handling a request', ['method', 'route'])
+REQUESTS_TOTAL = metrics_registry.counter(
+    'http_requests_total', 'Requests handled, by status code', ['method', 'route', 'status'])
+REQUEST_SIZE = metrics_registry.histogram(
+    'http_request_size_bytes', 'Request body sizes', ['route'], buckets=metrics.SIZE_BUCKETS)
+RESPONSE_SIZE = metrics_registry.histogram(
+    'http_response_size_bytes', 'Response body sizes, where known up front', ['route'],
+    buckets=metrics.SIZE_BUCKETS)
+RATE_LIMIT_REJECTIONS = metrics_registry.counter(
+    'rate_limit_rejections_total', 'Requests rejected by the rate limiter', ['route'])
+CONTACT_PHASES = metrics_registry.histogram(
+    'contact_form_phase_duration_seconds', 'Time spent in each phase of a contact form submission', ['phase'])
+
+def metrics_route(req=request) -> str:
+    """Route pattern of a request, keeping label values bounded."""
+    rule = req.url_rule
+    return rule.rule if rule is not None else 'unmatched'
+
+# Registered before the limiter's hooks, so rejected requests are timed too.
+# The hooks touch the request proxy once each: every proxy lookup costs
+# about as much as recording a sample.
+@app.before_request
+def start_request_timer():
+    request.environ['metrics.started_at'] = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    req = request._get_current_object()
+    started_at = req.environ.get('metrics.started_at')
+    if started_at is None:
+        return response
+    duration = time.perf_counter() - started_at
+    
+    if METRICS_CONFIG['enabled']:
+        route = metrics_route(req)
+        REQUEST_LATENCY.observe(duration, (req.method, route))
+        REQUESTS_TOTAL.inc((req.method, route, str(response.status_code)))
+        request_size = req.content_length
+        if request_size:
+            REQUEST_SIZE.observe(request_size, (route,))
+        response_size = response.content_length
+        if response_size is not None:
+            RESPONSE_SIZE.observe(response_size, (route,))
+    
+    log_access(req, response, duration)
+    return response
+
+def log_access(req, response, duration: float):
+    """Write the access line for a request, unless it is sampled out."""
+    sampled = req.endpoint in STATIC_ENDPOINTS
+    if sampled and not static_access_sampler.keep(response.status_code):
+        return
+    if not access_logger.isEnabledFor(logging.INFO):
+        return
+    access_logger.info('%s %s %s', req.method, req.path, response.status_code, extra={
+        'method': req.method,
+        'path': req.path,
+        'status': response.status_code,
+        'duration_ms': round(duration * 1000, 3),
+        'response_bytes': response.content_length,
+        'remote_addr': req.remote_addr,
+        'sample_rate': static_access_sampler.rate if sampled else 1.0
+    })
+
+# Opt-in sampling profiler, served as collapsed stacks on /api/admin/profile
+PROFILER_CONFIG = {
+    'enabled': os.getenv('PROFILER_ENABLED', 'False').lower() == 'true',
+    'interval_ms': float(os.getenv('PROFILER_INTERVAL_MS', '10')),
+    'slow_request_ms': float(os.getenv('PROFILER_SLOW_REQUEST_MS', '500')),
+    # Largest share of wall-clock time the sampler may spend sampling
+    'max_overhead': float(os.getenv('PROFILER_MAX_OVERHEAD', '0.01')),
+    'max_traces': int(os.getenv('PROFILER_MAX_TRACES', '50')),
+    'max_stacks': int(os.getenv('PROFILER_MAX_STACKS', '5000')),
+    'all_threads': os.getenv('PROFILER_ALL_THREADS', 'False').lower() == 'true'
+}
+
+profiler = SamplingProfiler(
+    interval=PROFILER_CONFIG['interval_ms'] / 1000,
+    slow_request=PROFILER_CONFIG['slow_request_ms'] / 1000,
+    max_overhead=PROFILER_CONFIG['max_overhead'],
+    max_traces=PROFILER_CONFIG['max_traces'],
+    max_stacks=PROFILER_CONFIG['max_stacks'],
+    all_threads=PROFILER_CONFIG['all_threads']
+)
+
+def begin_request_profile():
+    req = request._get_current_object()
+    profiler.begin(f"{req.method} {metrics_route(req)}", req.path)
+
+def end_request_profile(exc):
+    profiler.end()
+
+# Only registered when enabled, so a disabled profiler costs requests nothing
+if PROFILER_CONFIG['enabled']:
+    app.before_request(begin_request_profile)
+    app.teardown_request(end_request_profile)
+
+# Rate limiting. The SQLite storage is shared by every server process on
+# the host; set RATE_LIMIT_STORAGE_URI=memory:// for a single process.
+RATE_LIMIT_CONFIG = {
+    'storage_uri': os.getenv('RATE_LIMIT_STORAGE_URI', 'sqlite:///ratelimits.db'),
+    'strategy': os.getenv('RATE_LIMIT_STRATEGY', 'sliding-window-counter'),
+    'default_limits': os.getenv('RATE_LIMIT_DEFAULTS', '200 per day; 50 per hour'),
+    'enabled': os.getenv('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+}
 
-# Rate limiting
 limiter = Limiter(
     key_func=get_remote_address,
     app=app,
-    default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://"
+    enabled=RATE_LIMIT_CONFIG['enabled'],
+    storage_uri=RATE_LIMIT_CONFIG['storage_uri'],
+    strategy=RATE_LIMIT_CONFIG['strategy']
 )
 
+DEFAULT_RATE_LIMITS = parse_many(RATE_LIMIT_CONFIG['default_limits'])
+
+# Per-route limits, shared with the ASGI app in asgi.py
+API_RATE_LIMITS = {
+    'handle_contact_form': '5 per minute',
+    'track_analytics': '60 per minute',
+    'track_analytics_batch': '30 per minute',
+    'subscribe_newsletter': '3 per minute',
+    'get_stats': '30 per minute',
+    'get_content': '60 per minute',
+    'admin_list': '300 per minute',
+    'admin_export': '10 per minute'
+}
+
+def rate_limit_identifiers(endpoint: str, ip_address: Optional[str]) -> List[str]:
+    """Counter identifiers of a client at ``endpoint``, built as Flask-Limiter builds them.
+
+    The ASGI app uses them too, so a client has one budget in the shared
+    storage whichever frontend it reaches.
+    """
+    identifiers = [ip_address or '127.0.0.1', endpoint]
+    key_prefix = app.config.get('RATELIMIT_KEY_PREFIX')
+    return [key_prefix, *identifiers] if key_prefix else identifiers
+
+@app.before_request
+def enforce_default_rate_limits():
+    """Apply the default limits to routes without their own, all in one check.
+    
+    Routes marked with ``@limiter.exempt`` (or in an exempt blueprint) are
+    skipped, as Flask-Limiter's own default limit check would.
+    """
+    view = app.view_functions.get(request.endpoint)
+    if not limiter.enabled or view is None or limiter.limit_manager.decorated_limits(get_qualified_name(view)):
+        return None
+    if limiter.limit_manager.exemption_scope(app, request.endpoint, request.blueprint) & ExemptionScope.DEFAULT:
+        return None
+    
+    breached = rate_limits.hit_all(limiter.limiter, DEFAULT_RATE_LIMITS,
+                                   rate_limit_identifiers(request.endpoint, get_remote_address()))
+    if breached is not None:
+        logger.info(f"Rate limit {breached} exceeded at endpoint: {request.endpoint}")
+        abort(429)
+    return None
+
 # Database setup
 def init_database():
     """Initialize SQLite database for storing submissions and analytics."""
-    conn = sqlite3.connect('portfolio.db')
-    cursor = conn.cursor()
-    
-    # Contact submissions table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS contact_submissions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            submission_id TEXT UNIQUE NOT NULL,
-            name TEXT NOT NULL,
-            email TEXT NOT NULL,
-            company TEXT,
-            project_type TEXT,
-            budget TEXT,
-            timeline TEXT,
-            message TEXT NOT NULL,
-            newsletter_signup BOOLEAN DEFAULT FALSE,
-            ip_address TEXT,
-            user_agent TEXT,
-            referrer TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            status TEXT DEFAULT 'pending',
-            response_sent BOOLEAN DEFAULT FALSE
-        )
-    ''')
-    
-    # Analytics table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS analytics (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            event_type TEXT NOT NULL,
-            event_data TEXT,
-            ip_address TEXT,
-            user_agent TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Newsletter subscribers table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS newsletter_subscribers (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE NOT NULL,
-            name TEXT,
-            subscribed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            status TEXT DEFAULT 'active',
-            unsubscribe_token TEXT UNIQUE
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
-    logger.info("Database initialized successfully")
+    conn = database.connect()
+    try:
+        version = migrations.migrate(conn)
+    finally:
+        conn.close()
+    logger.info(f"Database initialized successfully (schema version {version})")
 
 # Email configuration
 EMAIL_CONFIG = {
@@ -112,47 +270,36 @@ EMAIL_CONFIG = {
     'smtp_port': int(os.getenv('SMTP_PORT', '587')),
     'email': os.getenv('EMAIL_ADDRESS', 'moeed@thelegend.dev'),
     'password': os.getenv('EMAIL_PASSWORD', ''),
-    'recipient': os.getenv('RECIPIENT_EMAIL', 'moeed@thelegend.dev')
+    'recipient': os.getenv('RECIPIENT_EMAIL', 'moeed@thelegend.dev'),
+    'use_tls': os.getenv('SMTP_USE_TLS', 'True').lower() == 'true',
+    'pool_size': int(os.getenv('SMTP_POOL_SIZE', '2')),
+    'queue_workers': int(os.getenv('MAIL_QUEUE_WORKERS', '2')),
+    'max_attempts': int(os.getenv('MAIL_MAX_ATTEMPTS', '5'))
 }
 
 def validate_email(email: str) -> bool:
     """Validate email format."""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+    return validation.is_valid_email(email)
 
 def sanitize_input(text: str, max_length: int = None) -> str:
     """Sanitize user input."""
     if not text:
         return ""
-    
-    # Remove HTML tags and scripts
-    text = re.sub(r'<[^>]*>', '', text)
-    text = re.sub(r'javascript:', '', text, flags=re.IGNORECASE)
-    
-    # Trim whitespace
-    text = text.strip()
-    
-    # Limit length
-    if max_length and len(text) > max_length:
-        text = text[:max_length]
-    
-    return text
+    return validation.sanitize_text(text, max_length)
 
-def send_notification_email(submission_data: Dict[str, Any]) -> bool:
-    """Send notification email for new contact form submission."""
-    try:
-        if not EMAIL_CONFIG['password']:
-            logger.warning("Email password not configured, skipping email notification")
-            return False
-        
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = EMAIL_CONFIG['email']
-        msg['To'] = EMAIL_CONFIG['recipient']
-        msg['Subject'] = f"New Portfolio Contact: {submission_data['name']}"
-        
-        # Email body
-        body = f"""
+def validation_error(result: validation.ValidationResult) -> Tuple[Dict[str, Any], int]:
+    """400 response listing every invalid field."""
+    payload = {
+        'success': False,
+        'message': result.message
+    }
+    if result.errors:
+        payload['errors'] = result.errors
+    return payload, 400
+
+def compose_notification_email(submission_data: Dict[str, Any]) -> Dict[str, str]:
+    """Compose the notification email for a new contact form submission."""
+    body = f"""
         New contact form submission received:
         
         Name: {submission_data['name']}
@@ -171,37 +318,17 @@ def send_notification_email(submission_data: Dict[str, Any]) -> bool:
         User Agent: {submission_data.get('user_agent', 'Unknown')}
         Referrer: {submission_data.get('referrer', 'Direct')}
         """
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        # Send email
-        with smtplib.SMTP(EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port']) as server:
-            server.starttls()
-            server.login(EMAIL_CONFIG['email'], EMAIL_CONFIG['password'])
-            server.send_message(msg)
-        
-        logger.info(f"Notification email sent for submission from {submission_data['email']}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Failed to send notification email: {str(e)}")
-        return False
+    
+    return {
+        'kind': 'notification',
+        'recipient': EMAIL_CONFIG['recipient'],
+        'subject': f"New Portfolio Contact: {submission_data['name']}",
+        'body': body
+    }
 
-def send_auto_reply(submission_data: Dict[str, Any]) -> bool:
-    """Send auto-reply email to the person who submitted the form."""
-    try:
-        if not EMAIL_CONFIG['password']:
-            logger.warning("Email password not configured, skipping auto-reply")
-            return False
-        
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = EMAIL_CONFIG['email']
-        msg['To'] = submission_data['email']
-        msg['Subject'] = "Thank you for contacting Moeed ul Hassan - The Legend"
-        
-        # Auto-reply body
-        body = f"""
+def compose_auto_reply(submission_data: Dict[str, Any]) -> Dict[str, str]:
+    """Compose the auto-reply email to the person who submitted the form."""
+    body = f"""
         Dear {submission_data['name']},
         
         Thank you for reaching out! I've received your message and will get back to you within 2 hours.
@@ -227,355 +354,661 @@ def send_auto_reply(submission_data: Dict[str, Any]) -> bool:
         🌐 https://moeedhassan.dev
         📍 Gujrat, Pakistan
         """
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        # Send email
-        with smtplib.SMTP(EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port']) as server:
-            server.starttls()
-            server.login(EMAIL_CONFIG['email'], EMAIL_CONFIG['password'])
-            server.send_message(msg)
-        
-        logger.info(f"Auto-reply sent to {submission_data['email']}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Failed to send auto-reply: {str(e)}")
-        return False
+    
+    return {
+        'kind': 'auto_reply',
+        'recipient': submission_data['email'],
+        'subject': "Thank you for contacting Moeed ul Hassan - The Legend",
+        'body': body
+    }
+
+# Persistent, authenticated SMTP sessions shared by the mail workers
+smtp_pool = SMTPConnectionPool(
+    EMAIL_CONFIG['smtp_server'],
+    EMAIL_CONFIG['smtp_port'],
+    username=EMAIL_CONFIG['email'],
+    password=EMAIL_CONFIG['password'],
+    use_tls=EMAIL_CONFIG['use_tls'],
+    max_size=EMAIL_CONFIG['pool_size']
+)
+
+def build_mime_message(message: Dict[str, Any]) -> 'MIMEMultipart':
+    """Build the MIME message for a queued email."""
+    # Imported on first delivery; most worker lifetimes never send mail
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+    
+    msg = MIMEMultipart()
+    msg['From'] = EMAIL_CONFIG['email']
+    msg['To'] = message['recipient']
+    msg['Subject'] = message['subject']
+    msg.attach(MIMEText(message['body'], 'plain'))
+    return msg
+
+def deliver_emails(messages: List[Dict[str, Any]]) -> List[Optional[str]]:
+    """Deliver a batch of queued emails over one pooled SMTP session."""
+    return smtp_pool.send_many([build_mime_message(message) for message in messages])
+
+# Background delivery for notification and auto-reply emails
+mail_queue = MailQueue(
+    database.DATABASE_PATH,
+    deliver_emails,
+    workers=EMAIL_CONFIG['queue_workers'],
+    max_attempts=EMAIL_CONFIG['max_attempts']
+)
+
+# Analytics configuration
+ANALYTICS_CONFIG = {
+    'queue_size': int(os.getenv('ANALYTICS_QUEUE_SIZE', '10000')),
+    'batch_size': int(os.getenv('ANALYTICS_BATCH_SIZE', '200')),
+    'flush_interval_ms': int(os.getenv('ANALYTICS_FLUSH_INTERVAL_MS', '500')),
+    'max_events_per_request': int(os.getenv('ANALYTICS_MAX_EVENTS_PER_REQUEST', '50'))
+}
+
+# Buffered, batched analytics writes
+analytics_buffer = AnalyticsBuffer(
+    max_queue=ANALYTICS_CONFIG['queue_size'],
+    batch_size=ANALYTICS_CONFIG['batch_size'],
+    flush_interval=ANALYTICS_CONFIG['flush_interval_ms'] / 1000
+)
+
+class ClientInfo(NamedTuple):
+    """Who sent a request, independent of the web framework serving it."""
+    ip_address: Optional[str]
+    user_agent: str
+    referrer: str
+    # Client-chosen key identifying retries of the same submission
+    idempotency_key: Optional[str] = None
 
-def log_analytics_event(event_type: str, event_data: Dict[str, Any] = None):
-    """Log analytics event to database."""
+def request_client() -> ClientInfo:
+    """Client details of the current Flask request."""
+    headers = request.headers
+    return ClientInfo(
+        request.remote_addr,
+        headers.get('User-Agent', ''),
+        headers.get('Referer', ''),
+        headers.get('Idempotency-Key')
+    )
+
+def build_analytics_event(event_type: str, event_data: Dict[str, Any] = None,
+                          client: ClientInfo = None) -> tuple:
+    """Build an analytics row for ``client``, by default the current request."""
+    client = client or request_client()
+    return (
+        event_type,
+        json.dumps(event_data) if event_data else None,
+        client.ip_address,
+        client.user_agent,
+        datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    )
+
+def log_analytics_event(event_type: str, event_data: Dict[str, Any] = None,
+                        client: ClientInfo = None) -> bool:
+    """Queue analytics event for the next batched write."""
     try:
-        conn = sqlite3.connect('portfolio.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO analytics (event_type, event_data, ip_address, user_agent)
-            VALUES (?, ?, ?, ?)
-        ''', (
-            event_type,
-            json.dumps(event_data) if event_data else None,
-            request.remote_addr,
-            request.headers.get('User-Agent', '')
-        ))
-        
-        conn.commit()
-        conn.close()
+        if not analytics_buffer.submit(build_analytics_event(event_type, event_data, client)):
+            logger.warning(f"Analytics buffer full, dropped {event_type} event")
+            return False
+        return True
         
     except Exception as e:
         logger.error(f"Failed to log analytics event: {str(e)}")
+        return False
+
+# In-memory copies of index.html, the source assets and the asset build
+STATIC_CONFIG = {
+    'max_cached_file_size': int(os.getenv('STATIC_CACHE_MAX_FILE_SIZE', str(256 * 1024))),
+    'check_interval': float(os.getenv('STATIC_CACHE_CHECK_INTERVAL', '2'))
+}
+
+static_cache = StaticAssetCache(
+    '.',
+    directories=['styles', 'js', 'data', build_assets.BUILD_DIR],
+    files=['index.html'],
+    max_file_size=STATIC_CONFIG['max_cached_file_size'],
+    check_interval=STATIC_CONFIG['check_interval']
+)
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Range-capable streaming for the audio track and gallery media
+MEDIA_CONFIG = {
+    'chunk_size': int(os.getenv('MEDIA_CHUNK_SIZE', str(64 * 1024))),
+    'max_streams_per_client': int(os.getenv('MEDIA_STREAMS_PER_CLIENT', '2'))
+}
+
+media_streamer = MediaStreamer(
+    chunk_size=MEDIA_CONFIG['chunk_size'],
+    max_streams_per_client=MEDIA_CONFIG['max_streams_per_client']
+)
+
+# Resized gallery derivatives, rendered once and kept in a disk cache
+IMAGE_CONFIG = {
+    'cache_dir': os.getenv('IMAGE_CACHE_DIR', 'image_cache'),
+    'max_cache_bytes': int(os.getenv('IMAGE_CACHE_MAX_BYTES', str(256 * 1024 * 1024))),
+    'workers': int(os.getenv('IMAGE_WORKERS', '2'))
+}
+
+image_service = images.ImageService(
+    cache_dir=IMAGE_CONFIG['cache_dir'],
+    max_cache_bytes=IMAGE_CONFIG['max_cache_bytes'],
+    workers=IMAGE_CONFIG['workers']
+)
+
+def serve_asset(directory: str, filename: str):
+    """Serve a hashed build asset if one matches, otherwise the source file."""
+    rel_path = f"{directory}/{filename}"
+    built_path = f"{build_assets.BUILD_DIR}/{rel_path}"
+    
+    response = (
+        static_cache.respond(request, built_path, IMMUTABLE_CACHE_CONTROL)
+        or static_cache.respond(request, rel_path, 'no-cache')
+    )
+    if response is not None:
+        return response
+    
+    # Not cached (too large or new since the last scan): send from disk
+    if os.path.isfile(built_path):
+        response = send_from_directory(build_assets.BUILD_DIR, rel_path)
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
+    return send_from_directory(directory, filename)
+
+# Datasets parsed from data/*.js, served as JSON and rendered into index.html
+content_store = content.ContentStore('.', check_interval=STATIC_CONFIG['check_interval'])
 
 @app.route('/')
 def serve_index():
-    """Serve the main portfolio page."""
-    return send_file('index.html')
+    """Serve the main portfolio page, prerendered by the asset build or in memory."""
+    return (
+        static_cache.respond(request, f"{build_assets.BUILD_DIR}/{build_assets.INDEX_FILE}", 'no-cache')
+        or prerendered_index()
+        or static_cache.respond(request, 'index.html', 'no-cache')
+        or send_file('index.html')
+    )
+
+def prerendered_index() -> Optional[Response]:
+    """index.html with the content sections rendered, or None if it cannot be built."""
+    try:
+        page = content_store.index()
+    except Exception as e:
+        logger.error(f"Prerendering index.html failed: {str(e)}")
+        return None
+    if page is None:
+        return None
+    
+    body, etag = page
+    response = Response(body, mimetype='text/html')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
 @app.route('/<path:path>')
 def serve_static_files(path):
     """Serve static files (CSS, JS, assets)."""
     return send_from_directory('.', path)
 
+# Response caching
+CACHE_CONFIG = {
+    'backend': os.getenv('CACHE_BACKEND', 'memory'),
+    'max_entries': int(os.getenv('CACHE_MAX_ENTRIES', '256')),
+    'stats_ttl': int(os.getenv('STATS_CACHE_TTL', '30')),
+    'health_ttl': int(os.getenv('HEALTH_CACHE_TTL', '5')),
+    'content_ttl': int(os.getenv('CONTENT_CACHE_TTL', '3600'))
+}
+
+response_cache = create_cache(CACHE_CONFIG['backend'], CACHE_CONFIG['max_entries'])
+
+def load_cached_json(key: str, ttl: int, build) -> Tuple[Optional[Tuple[bytes, str]], Optional[Dict[str, Any]], int]:
+    """Cached ``(body, etag)`` for ``key``, rebuilding it when missing or expired.
+    
+    Returns ``(entry, None, 200)``, or ``(None, payload, status)`` when
+    ``build`` did not succeed; only 200 responses are cached.
+    """
+    entry = response_cache.get(key)
+    if entry is None:
+        # Read before building, so a write that lands mid-build keeps its invalidation
+        generation = response_cache.generation(key)
+        payload, status = build()
+        if status != 200:
+            return None, payload, status
+        body = app.json.dumps(payload).encode('utf-8')
+        entry = (body, hashlib.sha1(body).hexdigest())
+        response_cache.set(key, entry, ttl, generation)
+    return entry, None, 200
+
+def cached_json_response(key: str, ttl: int, build):
+    """Serve a JSON response from cache, rebuilding it when missing or expired.
+    
+    ``build`` returns ``(payload, status)``; only 200 responses are cached.
+    Responses carry an ETag, and clients revalidating with If-None-Match
+    get a 304 without the body.
+    """
+    entry, payload, status = load_cached_json(key, ttl, build)
+    if entry is None:
+        return jsonify(payload), status
+    
+    body, etag = entry
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
 @app.route('/health')
 def health_check():
     """Health check endpoint."""
-    return jsonify({
+    return cached_json_response('health', CACHE_CONFIG['health_ttl'], build_health)
+
+def build_health():
+    """Build the health check payload."""
+    return {
         'status': 'healthy',
         'service': 'Portfolio Backend',
         'version': '1.0.0',
         'timestamp': datetime.utcnow().isoformat()
-    })
+    }, 200
 
-@app.route('/api/contact', methods=['POST'])
-@limiter.limit("5 per minute")
-def handle_contact_form():
-    """Handle contact form submissions."""
+# Responses of recent contact and newsletter requests, by idempotency key
+dedup_index = idempotency.DedupIndex()
+
+def idempotent_request(kind: str, client: ClientInfo, values: Dict[str, Any]):
+    """Key for a submission and the stored response to send instead, if any."""
+    try:
+        key = idempotency.request_key(kind, client.idempotency_key, values)
+    except ValueError as e:
+        return None, ({'success': False, 'message': str(e)}, 400)
+    return key, dedup_index.replay(database.get_connection(), key)
+
+def process_contact_submission(data: Any, client: ClientInfo) -> Tuple[Dict[str, Any], int]:
+    """Process a contact form submission."""
     try:
-        # Get form data
-        data = request.get_json()
+        phases = metrics.PhaseTimer(CONTACT_PHASES)
         
-        if not data:
-            return jsonify({
-                'success': False,
-                'message': 'No data provided'
-            }), 400
-        
-        # Validate required fields
-        required_fields = ['name', 'email', 'message']
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify({
-                    'success': False,
-                    'message': f'{field.title()} is required'
-                }), 400
-        
-        # Validate email format
-        if not validate_email(data['email']):
-            return jsonify({
-                'success': False,
-                'message': 'Invalid email address format'
-            }), 400
+        # Validate and sanitize every field in one pass
+        result = validation.CONTACT_SCHEMA.validate(data)
+        if not result.ok:
+            return validation_error(result)
+        
+        # Repeats of an earlier submission get its response back
+        request_key, replayed = idempotent_request('contact', client, result.values)
+        if replayed:
+            return replayed
         
-        # Sanitize inputs
         submission_data = {
             'submission_id': str(uuid.uuid4()),
-            'name': sanitize_input(data['name'], 100),
-            'email': sanitize_input(data['email'], 255),
-            'company': sanitize_input(data.get('company', ''), 100),
-            'project_type': sanitize_input(data.get('projectType', ''), 50),
-            'budget': sanitize_input(data.get('budget', ''), 50),
-            'timeline': sanitize_input(data.get('timeline', ''), 50),
-            'message': sanitize_input(data['message'], 2000),
-            'newsletter': bool(data.get('newsletter', False)),
+            **result.values,
             'timestamp': datetime.utcnow().isoformat(),
-            'ip_address': request.remote_addr,
-            'user_agent': request.headers.get('User-Agent', ''),
-            'referrer': request.headers.get('Referer', '')
+            'ip_address': client.ip_address,
+            'user_agent': client.user_agent,
+            'referrer': client.referrer
         }
+        phases.lap('validation')
         
-        # Store in database
-        conn = sqlite3.connect('portfolio.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO contact_submissions (
-                submission_id, name, email, company, project_type, budget, 
-                timeline, message, newsletter_signup, ip_address, user_agent, referrer
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            submission_data['submission_id'],
-            submission_data['name'],
-            submission_data['email'],
-            submission_data['company'],
-            submission_data['project_type'],
-            submission_data['budget'],
-            submission_data['timeline'],
-            submission_data['message'],
-            submission_data['newsletter'],
-            submission_data['ip_address'],
-            submission_data['user_agent'],
-            submission_data['referrer']
-        ))
-        
-        conn.commit()
-        conn.close()
+        emails_queued = bool(EMAIL_CONFIG['password'])
+        response_data = {
+            'success': True,
+            'message': 'Your message has been sent successfully! I\'ll get back to you within 2 hours.',
+            'submission_id': submission_data['submission_id']
+        }
         
-        # Send notification emails
-        notification_sent = send_notification_email(submission_data)
-        auto_reply_sent = send_auto_reply(submission_data)
+        # Add email status to response for debugging
+        if not emails_queued:
+            response_data['email_status'] = {
+                'notification_queued': False,
+                'auto_reply_queued': False
+            }
+        
+        # Resolved before the transaction opens, so the lookup caches can keep the ids
+        conn = database.get_connection()
+        client_ids = (
+            lookups.IP_ADDRESSES.id(conn, client.ip_address),
+            lookups.USER_AGENTS.id(conn, client.user_agent),
+            lookups.REFERRERS.id(conn, client.referrer)
+        )
+        
+        # Store in database, together with the response for repeats
+        try:
+            with database.transaction() as cursor:
+                stored = dedup_index.claim(cursor, request_key, response_data, 200)
+                store_contact_submission(cursor, submission_data, client_ids, emails_queued, phases)
+        except idempotency.DuplicateRequest:
+            # A concurrent repeat was stored first
+            return dedup_index.replay(database.get_connection(), request_key)
+        dedup_index.remember(request_key.key, stored)
+        phases.lap('db_commit')
+        
+        if emails_queued:
+            mail_queue.wake()
         
         # Handle newsletter signup
         if submission_data['newsletter']:
             try:
-                conn = sqlite3.connect('portfolio.db')
-                cursor = conn.cursor()
-                
                 # Generate unsubscribe token
                 unsubscribe_token = hashlib.sha256(
                     f"{submission_data['email']}{datetime.utcnow()}".encode()
                 ).hexdigest()
                 
-                cursor.execute('''
-                    INSERT OR IGNORE INTO newsletter_subscribers (email, name, unsubscribe_token)
-                    VALUES (?, ?, ?)
-                ''', (submission_data['email'], submission_data['name'], unsubscribe_token))
-                
-                conn.commit()
-                conn.close()
+                with database.transaction() as cursor:
+                    cursor.execute(
+                        database.INSERT_OR_IGNORE_NEWSLETTER_SUBSCRIBER,
+                        (submission_data['email'], submission_data['name'], unsubscribe_token)
+                    )
+                    rollups.record_subscribers(cursor, cursor.rowcount)
                 
             except Exception as e:
                 logger.error(f"Failed to add newsletter subscriber: {str(e)}")
+            phases.lap('newsletter')
+        
+        # Submission and subscriber counts have changed
+        response_cache.invalidate('stats')
         
         # Log analytics
         log_analytics_event('contact_form_submission', {
             'project_type': submission_data['project_type'],
             'budget': submission_data['budget'],
             'newsletter_signup': submission_data['newsletter']
-        })
+        }, client)
+        phases.lap('analytics')
         
-        response_data = {
-            'success': True,
-            'message': 'Your message has been sent successfully! I\'ll get back to you within 2 hours.',
-            'submission_id': submission_data['submission_id']
-        }
-        
-        # Add email status to response for debugging
-        if not notification_sent or not auto_reply_sent:
-            response_data['email_status'] = {
-                'notification_sent': notification_sent,
-                'auto_reply_sent': auto_reply_sent
-            }
-        
-        return jsonify(response_data), 200
+        return response_data, 200
         
     except Exception as e:
         logger.error(f"Contact form error: {str(e)}")
-        return jsonify({
+        return {
             'success': False,
             'message': 'An error occurred while processing your request. Please try again.'
-        }), 500
+        }, 500
 
-@app.route('/api/analytics', methods=['POST'])
-@limiter.limit("10 per minute")
-def track_analytics():
-    """Track analytics events."""
+def store_contact_submission(cursor: sqlite3.Cursor, submission_data: Dict[str, Any],
+                             client_ids: Tuple[Optional[int], ...], emails_queued: bool,
+                             phases: metrics.PhaseTimer):
+    """Insert a submission and queue its emails in the caller's transaction.
+
+    ``client_ids`` are the lookup ids of the IP address, user agent and referrer.
+    """
+    cursor.execute(database.INSERT_CONTACT_SUBMISSION, (
+        submission_data['submission_id'],
+        submission_data['name'],
+        submission_data['email'],
+        submission_data['company'],
+        submission_data['project_type'],
+        submission_data['budget'],
+        submission_data['timeline'],
+        submission_data['message'],
+        submission_data['newsletter'],
+        *client_ids
+    ))
+    rollups.record_submission(cursor, submission_data['project_type'])
+    phases.lap('db_insert')
+    
+    # Queue notification emails in the same transaction as the submission
+    if emails_queued:
+        for email in (compose_notification_email(submission_data),
+                      compose_auto_reply(submission_data)):
+            mail_queue.enqueue(
+                cursor,
+                email['recipient'],
+                email['subject'],
+                email['body'],
+                kind=email['kind'],
+                submission_id=submission_data['submission_id']
+            )
+            phases.lap(email['kind'])
+    else:
+        logger.warning("Email password not configured, skipping email notifications")
+
+@app.route('/api/contact', methods=['POST'])
+@limiter.limit(API_RATE_LIMITS['handle_contact_form'])
+def handle_contact_form():
+    """Handle contact form submissions."""
+    payload, status = process_contact_submission(request.get_json(silent=True), request_client())
+    return jsonify(payload), status
+
+def process_analytics_event(data: Any, client: ClientInfo) -> Tuple[Dict[str, Any], int]:
+    """Record one analytics event."""
     try:
-        data = request.get_json()
+        result = validation.ANALYTICS_EVENT_SCHEMA.validate(data)
+        if not result.ok:
+            return validation_error(result)
         
-        if not data or not data.get('event_type'):
-            return jsonify({
+        # Queue the analytics event
+        if not log_analytics_event(
+            result.values['event_type'],
+            result.values['event_data'],
+            client
+        ):
+            return {
                 'success': False,
-                'message': 'Event type is required'
-            }), 400
+                'message': 'Analytics is busy. Please try again later.'
+            }, 429
         
-        # Log the analytics event
-        log_analytics_event(
-            sanitize_input(data['event_type'], 50),
-            data.get('event_data', {})
-        )
-        
-        return jsonify({
+        return {
             'success': True,
             'message': 'Analytics event recorded'
-        }), 200
+        }, 200
         
     except Exception as e:
         logger.error(f"Analytics error: {str(e)}")
-        return jsonify({
+        return {
             'success': False,
             'message': 'Failed to record analytics event'
-        }), 500
+        }, 500
 
-@app.route('/api/newsletter/subscribe', methods=['POST'])
-@limiter.limit("3 per minute")
-def subscribe_newsletter():
-    """Handle newsletter subscriptions."""
+@app.route('/api/analytics', methods=['POST'])
+@limiter.limit(API_RATE_LIMITS['track_analytics'])
+def track_analytics():
+    """Track analytics events."""
+    payload, status = process_analytics_event(request.get_json(silent=True), request_client())
+    return jsonify(payload), status
+
+def process_analytics_batch(data: Any, client: ClientInfo) -> Tuple[Dict[str, Any], int]:
+    """Record several analytics events."""
     try:
-        data = request.get_json()
+        events = data.get('events') if isinstance(data, dict) else None
         
-        if not data or not data.get('email'):
-            return jsonify({
+        if not isinstance(events, list) or not events:
+            return {
                 'success': False,
-                'message': 'Email is required'
-            }), 400
+                'message': 'A non-empty list of events is required'
+            }, 400
         
-        email = sanitize_input(data['email'], 255)
-        name = sanitize_input(data.get('name', ''), 100)
+        if len(events) > ANALYTICS_CONFIG['max_events_per_request']:
+            return {
+                'success': False,
+                'message': f"At most {ANALYTICS_CONFIG['max_events_per_request']} events per request"
+            }, 400
         
-        if not validate_email(email):
-            return jsonify({
+        # Invalid events are skipped and counted as rejected
+        rows = []
+        for event in events:
+            result = validation.ANALYTICS_EVENT_SCHEMA.validate(event)
+            if result.ok:
+                rows.append(build_analytics_event(
+                    result.values['event_type'],
+                    result.values['event_data'],
+                    client
+                ))
+        
+        accepted = analytics_buffer.submit_many(rows)
+        if rows and not accepted:
+            return {
                 'success': False,
-                'message': 'Invalid email address format'
-            }), 400
+                'message': 'Analytics is busy. Please try again later.'
+            }, 429
+        
+        return {
+            'success': True,
+            'message': 'Analytics events recorded',
+            'accepted': accepted,
+            'rejected': len(events) - accepted
+        }, 200
+        
+    except Exception as e:
+        logger.error(f"Analytics batch error: {str(e)}")
+        return {
+            'success': False,
+            'message': 'Failed to record analytics events'
+        }, 500
+
+@app.route('/api/analytics/batch', methods=['POST'])
+@limiter.limit(API_RATE_LIMITS['track_analytics_batch'])
+def track_analytics_batch():
+    """Track several analytics events in one request."""
+    payload, status = process_analytics_batch(request.get_json(silent=True), request_client())
+    return jsonify(payload), status
+
+def process_newsletter_subscription(data: Any, client: ClientInfo) -> Tuple[Dict[str, Any], int]:
+    """Subscribe an email address to the newsletter."""
+    try:
+        result = validation.NEWSLETTER_SCHEMA.validate(data)
+        if not result.ok:
+            return validation_error(result)
+        email = result.values['email']
+        name = result.values['name']
+        
+        # Repeats of an earlier subscription get its response back
+        request_key, replayed = idempotent_request('newsletter', client, result.values)
+        if replayed:
+            return replayed
         
         # Generate unsubscribe token
         unsubscribe_token = hashlib.sha256(
             f"{email}{datetime.utcnow()}".encode()
         ).hexdigest()
+        response_data = {
+            'success': True,
+            'message': 'Successfully subscribed to newsletter!'
+        }
         
-        # Store in database
-        conn = sqlite3.connect('portfolio.db')
-        cursor = conn.cursor()
-        
+        # Store in database; the unique email makes an existing subscriber a no-op
         try:
-            cursor.execute('''
-                INSERT INTO newsletter_subscribers (email, name, unsubscribe_token)
-                VALUES (?, ?, ?)
-            ''', (email, name, unsubscribe_token))
-            
-            conn.commit()
-            
-            # Log analytics
-            log_analytics_event('newsletter_subscription', {'email': email})
-            
-            return jsonify({
-                'success': True,
-                'message': 'Successfully subscribed to newsletter!'
-            }), 200
-            
-        except sqlite3.IntegrityError:
-            return jsonify({
+            with database.transaction() as cursor:
+                cursor.execute(
+                    database.INSERT_NEWSLETTER_SUBSCRIBER,
+                    (email, name, unsubscribe_token)
+                )
+                added = cursor.rowcount
+                if added:
+                    stored = dedup_index.claim(cursor, request_key, response_data, 200)
+                    rollups.record_subscribers(cursor, added)
+        except idempotency.DuplicateRequest:
+            return dedup_index.replay(database.get_connection(), request_key)
+        
+        if not added:
+            # Subscribed before, or just now by a concurrent repeat of this request
+            return dedup_index.replay(database.get_connection(), request_key) or ({
                 'success': False,
                 'message': 'Email already subscribed to newsletter'
-            }), 409
+            }, 409)
+        dedup_index.remember(request_key.key, stored)
         
-        finally:
-            conn.close()
+        response_cache.invalidate('stats')
+        
+        # Log analytics
+        log_analytics_event('newsletter_subscription', {'email': email}, client)
+        
+        return response_data, 200
         
     except Exception as e:
         logger.error(f"Newsletter subscription error: {str(e)}")
-        return jsonify({
+        return {
             'success': False,
             'message': 'Failed to subscribe to newsletter'
-        }), 500
+        }, 500
+
+@app.route('/api/newsletter/subscribe', methods=['POST'])
+@limiter.limit(API_RATE_LIMITS['subscribe_newsletter'])
+def subscribe_newsletter():
+    """Handle newsletter subscriptions."""
+    payload, status = process_newsletter_subscription(request.get_json(silent=True), request_client())
+    return jsonify(payload), status
 
 @app.route('/api/stats', methods=['GET'])
-@limiter.limit("30 per minute")
+@limiter.limit(API_RATE_LIMITS['get_stats'])
 def get_stats():
     """Get portfolio statistics."""
+    return cached_json_response('stats', CACHE_CONFIG['stats_ttl'], build_stats)
+
+def build_stats():
+    """Build the statistics payload from the rollup tables."""
     try:
-        conn = sqlite3.connect('portfolio.db')
-        cursor = conn.cursor()
-        
-        # Get contact form submissions count (last 30 days)
-        cursor.execute('''
-            SELECT COUNT(*) FROM contact_submissions 
-            WHERE timestamp > datetime('now', '-30 days')
-        ''')
-        recent_submissions = cursor.fetchone()[0]
-        
-        # Get total submissions
-        cursor.execute('SELECT COUNT(*) FROM contact_submissions')
-        total_submissions = cursor.fetchone()[0]
-        
-        # Get newsletter subscribers count
-        cursor.execute('SELECT COUNT(*) FROM newsletter_subscribers WHERE status = "active"')
-        newsletter_subscribers = cursor.fetchone()[0]
-        
-        # Get popular project types
-        cursor.execute('''
-            SELECT project_type, COUNT(*) as count 
-            FROM contact_submissions 
-            WHERE project_type IS NOT NULL AND project_type != ''
-            GROUP BY project_type 
-            ORDER BY count DESC 
-            LIMIT 5
-        ''')
-        popular_project_types = [
-            {'type': row[0], 'count': row[1]} 
-            for row in cursor.fetchall()
-        ]
-        
-        # Get analytics events count (last 7 days)
-        cursor.execute('''
-            SELECT COUNT(*) FROM analytics 
-            WHERE timestamp > datetime('now', '-7 days')
-        ''')
-        recent_analytics_events = cursor.fetchone()[0]
-        
-        conn.close()
+        stats = rollups.read_stats(database.get_connection())
         
-        return jsonify({
+        return {
             'success': True,
             'stats': {
-                'total_submissions': total_submissions,
-                'recent_submissions': recent_submissions,
-                'newsletter_subscribers': newsletter_subscribers,
-                'recent_analytics_events': recent_analytics_events,
-                'popular_project_types': popular_project_types,
+                **stats,
                 'last_updated': datetime.utcnow().isoformat()
             }
-        }), 200
+        }, 200
         
     except Exception as e:
         logger.error(f"Stats error: {str(e)}")
-        return jsonify({
+        return {
             'success': False,
             'message': 'Failed to retrieve statistics'
-        }), 500
+        }, 500
+
+@app.route('/api/content', methods=['GET'])
+@limiter.limit(API_RATE_LIMITS['get_content'])
+def get_content():
+    """Get every content dataset in one versioned payload."""
+    # Cached per content version, so edited data files are served at once
+    version = content_store.current().version
+    return cached_json_response(f'content:{version}', CACHE_CONFIG['content_ttl'], build_content)
+
+@app.route('/api/content/<dataset>', methods=['GET'])
+@limiter.limit(API_RATE_LIMITS['get_content'])
+def get_content_dataset(dataset):
+    """Get one content dataset; query arguments filter its items by field."""
+    if dataset not in content.DATASETS:
+        return jsonify({
+            'success': False,
+            'message': f'Unknown dataset: {dataset}'
+        }), 404
+    
+    filters = request.args.to_dict()
+    if filters:
+        payload, status = build_content(dataset, filters)
+        return jsonify(payload), status
+    version = content_store.current().version
+    return cached_json_response(f'content:{version}:{dataset}', CACHE_CONFIG['content_ttl'],
+                                lambda: build_content(dataset))
+
+def build_content(dataset: Optional[str] = None, filters: Optional[Dict[str, str]] = None):
+    """Build the payload of one dataset, or of all of them."""
+    try:
+        current = content_store.current()
+        if dataset is None:
+            return {
+                'success': True,
+                'version': current.version,
+                'datasets': {name: current.dataset(name) for name in current.available()}
+            }, 200
+        
+        if dataset not in current.available():
+            return {
+                'success': False,
+                'message': f'Dataset {dataset} is unavailable'
+            }, 503
+        items = current.dataset(dataset)
+        return {
+            'success': True,
+            'version': current.version,
+            'items': content.filter_items(items, filters) if filters else items
+        }, 200
+        
+    except Exception as e:
+        logger.error(f"Content error: {str(e)}")
+        return {
+            'success': False,
+            'message': 'Failed to load content'
+        }, 500
 
 @app.errorhandler(429)
 def ratelimit_handler(e):
     """Handle rate limiting errors."""
+    RATE_LIMIT_REJECTIONS.inc((metrics_route(),))
     return jsonify({
         'success': False,
         'message': 'Rate limit exceeded. Please try again later.'
@@ -589,21 +1022,66 @@ def not_found_handler(e):
         'message': 'Endpoint not found'
     }), 404
 
+@app.errorhandler(405)
+def method_not_allowed_handler(e):
+    """Handle requests with a method the route does not accept."""
+    return jsonify({
+        'success': False,
+        'message': 'Method not allowed'
+    }), 405, {'Allow': ', '.join(e.valid_methods or [])}
+
 @app.route('/styles/<path:filename>')
 def serve_styles(filename):
-    return send_from_directory('styles', filename)
+    return serve_asset('styles', filename)
 
 @app.route('/js/<path:filename>')
 def serve_js(filename):
-    return send_from_directory('js', filename)
+    return serve_asset('js', filename)
 
 @app.route('/data/<path:filename>')
 def serve_data(filename):
-    return send_from_directory('data', filename)
+    return serve_asset('data', filename)
 
 @app.route('/assets/images/gallery/<path:filename>')
 def serve_gallery_images(filename):
-    return send_from_directory('assets/images/gallery', filename)
+    return media_streamer.send(request, 'assets/images/gallery', filename)
+
+@app.route('/images/gallery/<path:filename>')
+def serve_gallery_variant(filename):
+    """Serve a gallery image resized to ?w=<width> in ?fmt=webp|avif|jpeg|auto at ?q=low|medium|high."""
+    if not image_service.enabled:
+        return media_streamer.send(request, images.GALLERY_DIR, filename)
+    
+    params, error = images.parse_variant_args(request.args, image_service.widths)
+    if params is None:
+        return jsonify({'success': False, 'message': error}), 400
+    width, quality = params
+    
+    requested_format = request.args.get('fmt', 'auto')
+    fmt = image_service.negotiate_format(requested_format, request.accept_mimetypes)
+    if fmt is None:
+        return jsonify({
+            'success': False,
+            'message': f"Unsupported format. Use one of: auto, {', '.join(image_service.formats)}"
+        }), 400
+    
+    try:
+        variant = image_service.get(filename, width, fmt, quality)
+    except Exception as e:
+        logger.error(f"Image variant failed for {filename}: {str(e)}")
+        return jsonify({'success': False, 'message': 'Image processing failed'}), 500
+    if variant is None:
+        return jsonify({'success': False, 'message': 'Endpoint not found'}), 404
+    
+    response = send_file(variant.path, mimetype=variant.mimetype, etag=variant.etag,
+                         max_age=86400, conditional=True)
+    if requested_format == 'auto':
+        response.vary.add('Accept')
+    return response
+
+@app.route('/audio/<path:filename>')
+def serve_audio(filename):
+    return media_streamer.send(request, 'audio', filename)
 
 @app.errorhandler(500)
 def internal_error_handler(e):
@@ -615,8 +1093,164 @@ def internal_error_handler(e):
             'message': 'Internal server error'
         }), 500
 
+metrics_registry.gauge('database_connections', 'Open per-thread database connections',
+                       database.open_connection_count)
+metrics_registry.gauge('mail_queue_messages', 'Undelivered queued emails',
+                       lambda: {(status,): count for status, count
+                                in mail_queue.depth(database.get_connection()).items()},
+                       ['status'])
+metrics_registry.gauge('analytics_queue_depth', 'Analytics events waiting to be written',
+                       analytics_buffer.depth)
+metrics_registry.gauge('analytics_events_dropped', 'Analytics events rejected because the buffer was full',
+                       lambda: analytics_buffer.stats()['dropped'])
+metrics_registry.gauge('lookup_cache_entries', 'Strings held in the lookup table id caches',
+                       lambda: {(table.table,): len(table) for table in lookups.TABLES},
+                       ['table'])
+metrics_registry.gauge('idempotency_index_entries', 'Recent submission responses held for repeats',
+                       lambda: len(dedup_index))
+metrics_registry.gauge('log_records_dropped', 'Log records dropped because the log queue was full',
+                       lambda: log_handler.dropped)
+metrics_registry.gauge('media_open_streams', 'Range requests currently streaming',
+                       media_streamer.limiter.open_streams)
+metrics_registry.gauge('image_renders_in_flight', 'Gallery image variants being rendered',
+                       lambda: image_service.stats()['renders_in_flight'])
+metrics_registry.gauge('profiler_overhead_ratio', 'Share of wall-clock time the sampling profiler spends sampling',
+                       lambda: profiler.stats()['overhead'])
+metrics_registry.gauge('profiler_sample_interval_seconds', 'Current sampling interval, after the overhead budget',
+                       lambda: profiler.stats()['effective_interval_ms'] / 1000)
+
+@app.route('/metrics')
+@limiter.exempt
+def serve_metrics():
+    """Expose request and service metrics in the Prometheus text format."""
+    if not METRICS_CONFIG['enabled']:
+        return not_found_handler(None)
+    if METRICS_CONFIG['token'] and request.headers.get('Authorization') != f"Bearer {METRICS_CONFIG['token']}":
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    return Response(metrics_registry.render(), content_type=metrics.CONTENT_TYPE)
+
+# Admin read API, disabled unless ADMIN_TOKEN is set
+ADMIN_CONFIG = {
+    'token': os.getenv('ADMIN_TOKEN', '')
+}
+
+def admin_authorized(req) -> bool:
+    return hmac.compare_digest(req.headers.get('Authorization', ''), f"Bearer {ADMIN_CONFIG['token']}")
+
+def check_admin_request(dataset: Optional[str] = None) -> Optional[Tuple[Dict[str, Any], int]]:
+    """Error response for an admin request that may not proceed, else None."""
+    if not ADMIN_CONFIG['token'] or (dataset is not None and dataset not in exports.DATASETS):
+        return {'success': False, 'message': 'Endpoint not found'}, 404
+    if not admin_authorized(request):
+        return {'success': False, 'message': 'Unauthorized'}, 401
+    return None
+
+@app.route('/api/admin/<dataset>', methods=['GET'])
+@limiter.limit(API_RATE_LIMITS['admin_list'])
+def admin_list(dataset):
+    """One page of submissions, subscribers or analytics events."""
+    rejected = check_admin_request(dataset)
+    if rejected:
+        payload, status = rejected
+        return jsonify(payload), status
+    try:
+        after = exports.parse_cursor(request.args.get('cursor'))
+        limit = exports.parse_limit(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    page = exports.read_page(database.get_connection(), dataset, after, limit)
+    return jsonify({'success': True, **page}), 200
+
+@app.route('/api/admin/<dataset>/export', methods=['GET'])
+@limiter.limit(API_RATE_LIMITS['admin_export'])
+def admin_export(dataset):
+    """Stream a whole dataset as NDJSON (default) or CSV."""
+    rejected = check_admin_request(dataset)
+    if rejected:
+        payload, status = rejected
+        return jsonify(payload), status
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in exports.FORMATS:
+        return jsonify({'success': False, 'message': f"format must be one of: {', '.join(exports.FORMATS)}"}), 400
+    try:
+        after = exports.parse_cursor(request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    filename = f"{dataset}-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.{fmt}"
+    return Response(
+        exports.export(dataset, fmt, after),
+        content_type=exports.FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"', 'Cache-Control': 'no-store'}
+    )
+
+@app.route('/api/admin/profile', methods=['GET', 'DELETE'])
+@limiter.limit(API_RATE_LIMITS['admin_list'])
+def admin_profile():
+    """Sampled stacks in the collapsed flamegraph format; DELETE discards them.
+    
+    ``?trace=<id>`` returns the stacks of one slow request instead.
+    """
+    rejected = check_admin_request()
+    if rejected:
+        payload, status = rejected
+        return jsonify(payload), status
+    if request.method == 'DELETE':
+        profiler.reset()
+        return jsonify({'success': True}), 200
+    
+    trace_id = request.args.get('trace')
+    if trace_id is not None and not (trace_id.isascii() and trace_id.isdigit()):
+        return jsonify({'success': False, 'message': 'trace must be a trace id'}), 400
+    folded = profiler.folded(int(trace_id) if trace_id is not None else None)
+    if folded is None:
+        return jsonify({'success': False, 'message': 'Trace not found'}), 404
+    return Response(folded, content_type='text/plain; charset=utf-8', headers={'Cache-Control': 'no-store'})
+
+@app.route('/api/admin/profile/traces', methods=['GET'])
+@limiter.limit(API_RATE_LIMITS['admin_list'])
+def admin_profile_traces():
+    """Profiler status and the retained slow-request traces."""
+    rejected = check_admin_request()
+    if rejected:
+        payload, status = rejected
+        return jsonify(payload), status
+    return jsonify({'success': True, 'profiler': profiler.stats(), 'traces': profiler.traces()}), 200
+
+def start_background_services():
+    """Start background mail delivery, analytics writes, the static cache and the profiler."""
+    mail_queue.start()
+    analytics_buffer.start()
+    static_cache.start()
+    if PROFILER_CONFIG['enabled']:
+        profiler.start()
+
+def stop_background_services():
+    """Stop the background services and release pooled connections."""
+    profiler.stop()
+    static_cache.stop()
+    image_service.close()
+    analytics_buffer.stop()
+    mail_queue.stop()
+    smtp_pool.close()
+    if isinstance(limiter.storage, rate_limits.SQLiteStorage):
+        limiter.storage.close()
+    database.close_connections()
+
 if __name__ == '__main__':
-    # Initialize database
+    parser = argparse.ArgumentParser(description='Run the portfolio backend server.')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='profile a cold start in a fresh interpreter (import and init time '
+                             'per module), print the report and exit')
+    args = parser.parse_args()
+    
+    if args.profile_startup:
+        import startup_profile
+        startup_profile.main([])
+        sys.exit(0)
+    
+    # Initialize database (a no-op check when the schema is up to date)
     init_database()
     
     # Get configuration from environment
@@ -627,6 +1261,10 @@ if __name__ == '__main__':
     logger.info(f"Starting Portfolio Backend Server on {host}:{port}")
     logger.info(f"Debug mode: {debug}")
     
-    # Start the server
-    serve(app, host=host, port=port)
-
+    start_background_services()
+    
+    # Start the server (use launcher.py to run several worker processes)
+    try:
+        serve(app, host=host, port=port)
+    finally:
+        stop_background_services()
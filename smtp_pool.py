@@ -0,0 +1,210 @@
+"""
+SMTP Connection Pool
+Keeps authenticated SMTP sessions alive between sends so that the TLS
+handshake and login are paid once per session instead of once per message.
+
+For local testing point the pool at a debug server, e.g.
+``python -m aiosmtpd -n -l localhost:1025`` with ``SMTP_USE_TLS=false``;
+login is skipped when the server does not advertise AUTH.
+"""
+
+import logging
+import smtplib
+import socket
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from email.message import Message
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the session itself is unusable, as opposed to a single
+# message being rejected. SMTPException subclasses OSError, so OSError
+# itself must not be listed: a refused recipient would drop the session.
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, socket.timeout)
+
+
+class SMTPConnectionPool:
+    """A bounded pool of persistent, authenticated SMTP sessions.
+
+    Sessions idle for longer than ``noop_after`` seconds are checked with
+    NOOP before reuse, sessions idle for longer than ``idle_timeout`` are
+    closed, and a session that drops mid-batch is reconnected once.
+    """
+
+    def __init__(self, host: str, port: int, username: str = '', password: str = '',
+                 use_tls: bool = True, max_size: int = 2, idle_timeout: float = 120.0,
+                 noop_after: float = 10.0, timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.noop_after = noop_after
+        self.timeout = timeout
+
+        self._idle: Deque[Tuple[smtplib.SMTP, float]] = deque()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._counters = {
+            'connections_opened': 0,
+            'connections_reused': 0,
+            'connections_closed': 0,
+            'noop_checks': 0,
+            'reconnects': 0,
+            'messages_sent': 0,
+            'send_failures': 0
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """Return pool gauges and counters."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['max_size'] = self.max_size
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._in_use
+        return stats
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            server.ehlo()
+            if self.use_tls:
+                server.starttls()
+                server.ehlo()
+            if self.password and server.has_extn('auth'):
+                server.login(self.username, self.password)
+        except Exception:
+            self._close(server)
+            raise
+        self._count('connections_opened')
+        return server
+
+    def _close(self, server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+        self._count('connections_closed')
+
+    def _is_alive(self, server: smtplib.SMTP) -> bool:
+        self._count('noop_checks')
+        try:
+            return server.noop()[0] == 250
+        except OSError:
+            return False
+
+    def _checkout(self) -> smtplib.SMTP:
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                server, last_used = self._idle.pop()
+
+            idle_for = now - last_used
+            if idle_for > self.idle_timeout:
+                self._close(server)
+                continue
+            if idle_for > self.noop_after and not self._is_alive(server):
+                self._close(server)
+                self._count('reconnects')
+                continue
+
+            self._count('connections_reused')
+            return server
+
+        return self._connect()
+
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        """Borrow a live session, returning it to the pool afterwards.
+
+        A session that raised a connection-level error is discarded rather
+        than returned.
+        """
+        self._slots.acquire()
+        server = None
+        healthy = False
+        try:
+            server = self._checkout()
+            with self._lock:
+                self._in_use += 1
+            try:
+                yield server
+                healthy = True
+            except smtplib.SMTPResponseException:
+                healthy = True
+                raise
+            finally:
+                with self._lock:
+                    self._in_use -= 1
+        finally:
+            if server is not None:
+                if healthy:
+                    with self._lock:
+                        self._idle.append((server, time.monotonic()))
+                else:
+                    self._close(server)
+            self._slots.release()
+
+    def send_many(self, messages: List[Message]) -> List[Optional[str]]:
+        """Send several messages over one session.
+
+        Returns one entry per message: ``None`` on success or the error
+        text on failure. If the session drops, it is re-established once and
+        the remaining messages are sent over the new session.
+        """
+        results: List[Optional[str]] = [None] * len(messages)
+        pending = list(range(len(messages)))
+        reconnected = False
+
+        while pending:
+            try:
+                with self.connection() as server:
+                    while pending:
+                        index = pending[0]
+                        try:
+                            server.send_message(messages[index])
+                            self._count('messages_sent')
+                        except CONNECTION_ERRORS:
+                            raise
+                        except smtplib.SMTPException as e:
+                            results[index] = str(e)
+                            self._count('send_failures')
+                        pending.pop(0)
+            except CONNECTION_ERRORS as e:
+                if reconnected:
+                    for index in pending:
+                        results[index] = str(e)
+                    self._count('send_failures', len(pending))
+                    break
+                logger.warning(f"SMTP session lost, reconnecting: {str(e)}")
+                self._count('reconnects')
+                reconnected = True
+            except OSError as e:
+                # Session could not be established (e.g. authentication, DNS)
+                for index in pending:
+                    results[index] = str(e)
+                self._count('send_failures', len(pending))
+                break
+
+        return results
+
+    def close(self):
+        """Close all idle sessions."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return
+                server, _ = self._idle.pop()
+            self._close(server)
@@ -0,0 +1,111 @@
+"""
+SMTP Sink
+A minimal local SMTP server that accepts every message and keeps it in
+memory, so the load tests and the test suite can exercise mail delivery
+without the network. It does not advertise STARTTLS or AUTH; run the
+server with SMTP_USE_TLS=false. Recipients listed in
+``rejected_recipients`` are refused with a 550.
+"""
+
+import socketserver
+import threading
+from typing import Iterable, List, NamedTuple, Tuple
+
+
+class ReceivedMessage(NamedTuple):
+    sender: str
+    recipients: List[str]
+    data: bytes
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+        self.wfile.flush()
+
+    def handle(self):
+        self.reply('220 localhost SMTP sink ready')
+        sender, recipients = '', []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('ascii', 'replace').strip().upper()
+
+            if command.startswith(('EHLO', 'HELO')):
+                self.wfile.write(b'250-localhost\r\n250-PIPELINING\r\n250 8BITMIME\r\n')
+                self.wfile.flush()
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                while True:
+                    line = self.rfile.readline()
+                    if line in (b'.\r\n', b'.\n', b''):
+                        break
+                    # Undo dot-stuffing
+                    lines.append(line[1:] if line.startswith(b'..') else line)
+                self.server.receive(ReceivedMessage(sender, recipients, b''.join(lines)))
+                sender, recipients = '', []
+                self.reply('250 OK')
+            elif command.startswith('RCPT') and self.server.rejects(command):
+                self.reply('550 No such user')
+            elif command.startswith('MAIL'):
+                sender = address_of(line)
+                self.reply('250 OK')
+            elif command.startswith('RCPT'):
+                recipients.append(address_of(line))
+                self.reply('250 OK')
+            elif command == 'RSET':
+                sender, recipients = '', []
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                # NOOP
+                self.reply('250 OK')
+
+
+def address_of(line: bytes) -> str:
+    """The address in a ``MAIL FROM:<...>`` or ``RCPT TO:<...>`` line."""
+    return line.decode('ascii', 'replace').partition(':')[2].strip().split(' ')[0].strip('<>')
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Threaded SMTP server recording the messages it receives."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: Tuple[str, int] = ('127.0.0.1', 0),
+                 rejected_recipients: Iterable[str] = ()):
+        super().__init__(address, SMTPSinkHandler)
+        self.rejected_recipients = {address.upper() for address in rejected_recipients}
+        self.received: List[ReceivedMessage] = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def rejects(self, command: str) -> bool:
+        """Whether an upper-cased ``RCPT TO:<address>`` command is refused."""
+        return command.partition(':')[2].strip().strip('<>') in self.rejected_recipients
+
+    @property
+    def messages(self) -> int:
+        """Number of messages received."""
+        return len(self.received)
+
+    def receive(self, message: ReceivedMessage):
+        with self._lock:
+            self.received.append(message)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='smtp-sink', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
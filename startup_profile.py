@@ -0,0 +1,136 @@
+"""
+Startup Profile
+Measures a cold start of the server in a fresh interpreter: import time
+per module, summed by top-level package from ``python -X importtime``,
+and the time spent in each initialisation step before the first request
+can be served. Background threads (mail delivery, analytics writes) are
+not started, so profiling never sends mail.
+
+Usage::
+
+    python server.py --profile-startup
+    python startup_profile.py [--runs 5] [--top 20] [--json]
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Run in the child interpreter; it imports nothing the server does not
+CHILD_SCRIPT = '''
+import time
+started = time.perf_counter()
+steps = {}
+
+def step(name, func):
+    global started
+    func()
+    now = time.perf_counter()
+    steps[name] = (now - started) * 1000
+    started = now
+
+step('import server', lambda: __import__('server'))
+import server
+step('init_database', server.init_database)
+step('static_cache.load', server.static_cache.load)
+step('content_store.index', server.content_store.index)
+
+import json
+print(%r + json.dumps(steps), flush=True)
+'''
+
+RESULT_MARKER = 'startup-profile:'
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+
+def parse_importtime(output: str) -> Dict[str, float]:
+    """Self import time in ms per top-level package from ``-X importtime`` output."""
+    packages: Dict[str, float] = defaultdict(float)
+    for line in output.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            packages[match.group(4).split('.')[0]] += int(match.group(1)) / 1000
+    return dict(packages)
+
+
+def run_once() -> Dict[str, Any]:
+    """Profile one cold start in a child interpreter."""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD_SCRIPT % RESULT_MARKER],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    process_ms = (time.perf_counter() - started) * 1000
+
+    lines = [line for line in result.stdout.splitlines() if line.startswith(RESULT_MARKER)]
+    if result.returncode != 0 or not lines:
+        raise RuntimeError(f"Startup profile run failed:\n{result.stderr[-2000:]}")
+    steps = json.loads(lines[-1][len(RESULT_MARKER):])
+    return {
+        'ready_ms': sum(steps.values()),
+        'process_ms': process_ms,
+        'imports': parse_importtime(result.stderr),
+        'steps': steps
+    }
+
+
+def profile(runs: int = 3) -> Dict[str, Any]:
+    """Median of ``runs`` cold starts, per package and per step."""
+    samples = [run_once() for _ in range(max(1, runs))]
+
+    def median(values: List[float]) -> float:
+        return round(statistics.median(values), 1)
+
+    packages = {name for sample in samples for name in sample['imports']}
+    return {
+        'runs': len(samples),
+        'ready_ms': median([sample['ready_ms'] for sample in samples]),
+        'process_ms': median([sample['process_ms'] for sample in samples]),
+        'imports': dict(sorted(
+            ((name, median([sample['imports'].get(name, 0.0) for sample in samples])) for name in packages),
+            key=lambda item: item[1], reverse=True
+        )),
+        'steps': {name: median([sample['steps'][name] for sample in samples]) for name in samples[0]['steps']}
+    }
+
+
+def format_report(report: Dict[str, Any], top: int = 20) -> str:
+    imports = list(report['imports'].items())
+    lines = [
+        f"Cold start: {report['ready_ms']:.1f} ms until ready to serve, "
+        f"{report['process_ms']:.1f} ms for the whole process (median of {report['runs']} runs)",
+        '',
+        'Import time by top-level package (self time, ms)'
+    ]
+    lines += [f"  {name:<32} {ms:8.1f}" for name, ms in imports[:top]]
+    if len(imports) > top:
+        rest = imports[top:]
+        lines.append(f"  {f'({len(rest)} more packages)':<32} {sum(ms for _, ms in rest):8.1f}")
+    lines += ['', 'Initialisation steps (ms)']
+    lines += [f"  {name:<32} {ms:8.1f}" for name, ms in report['steps'].items()]
+    return '\n'.join(lines)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='Profile a cold start of the portfolio server.')
+    parser.add_argument('--runs', type=int, default=3, help='cold starts to take the median of (default: %(default)s)')
+    parser.add_argument('--top', type=int, default=20, help='packages to list (default: %(default)s)')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args(argv)
+
+    report = profile(args.runs)
+    print(json.dumps(report, indent=2) if args.json else format_report(report, args.top))
+
+
+if __name__ == '__main__':
+    main()
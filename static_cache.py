@@ -0,0 +1,195 @@
+"""
+Hot Static Asset Cache
+Keeps index.html and the small files under styles/, js/, data/ and the
+asset build directory in memory, together with their precompressed
+variants and precomputed validators, so that serving them (or answering a
+conditional request with 304) never touches the disk. A watcher thread
+polls file mtimes and reloads entries after a redeploy or rebuild.
+"""
+
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from flask import Response
+from werkzeug.http import http_date
+
+logger = logging.getLogger(__name__)
+
+# Suffix of each precompressed variant, in preference order
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+class CachedFile(NamedTuple):
+    body: bytes
+    etag: str
+    last_modified: datetime
+    mimetype: str
+    encoding: Optional[str]
+
+
+class StaticAssetCache:
+    """In-memory copies of small static files, keyed by path and encoding.
+
+    Paths are relative to ``root`` using forward slashes, e.g.
+    ``styles/main.css`` or ``build/js/main.<hash>.js``. Files larger than
+    ``max_file_size`` are not cached and are left to the regular file
+    sending path.
+    """
+
+    def __init__(self, root: str, directories: List[str], files: List[str],
+                 max_file_size: int = 256 * 1024, check_interval: float = 2.0):
+        self.root = root
+        self.directories = directories
+        self.files = files
+        self.max_file_size = max_file_size
+        self.check_interval = check_interval
+
+        self._entries: Dict[Tuple[str, Optional[str]], CachedFile] = {}
+        self._stats: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _discover(self) -> List[str]:
+        paths = [path for path in self.files if os.path.isfile(os.path.join(self.root, path))]
+        for directory in self.directories:
+            for dirpath, _, filenames in os.walk(os.path.join(self.root, directory)):
+                for filename in filenames:
+                    if filename.endswith(tuple(ENCODING_SUFFIXES.values())):
+                        continue
+                    full_path = os.path.join(dirpath, filename)
+                    paths.append(os.path.relpath(full_path, self.root).replace(os.sep, '/'))
+        return paths
+
+    def _load_file(self, rel_path: str, encoding: Optional[str],
+                   mimetype: str) -> Optional[Tuple[CachedFile, Tuple[float, int]]]:
+        suffix = ENCODING_SUFFIXES.get(encoding, '')
+        full_path = os.path.join(self.root, rel_path + suffix)
+        try:
+            stat = os.stat(full_path)
+            if stat.st_size > self.max_file_size:
+                return None
+            with open(full_path, 'rb') as f:
+                body = f.read()
+        except OSError:
+            return None
+
+        entry = CachedFile(
+            body=body,
+            etag=hashlib.sha1(body).hexdigest(),
+            last_modified=datetime.fromtimestamp(int(stat.st_mtime), timezone.utc),
+            mimetype=mimetype,
+            encoding=encoding
+        )
+        return entry, (stat.st_mtime, stat.st_size)
+
+    def load(self):
+        """(Re)load every cacheable file and its precompressed variants."""
+        entries = {}
+        stats = {}
+        for rel_path in self._discover():
+            mimetype = mimetypes.guess_type(rel_path)[0] or 'application/octet-stream'
+            for encoding in (None, *ENCODING_SUFFIXES):
+                loaded = self._load_file(rel_path, encoding, mimetype)
+                if loaded is None:
+                    continue
+                entries[(rel_path, encoding)] = loaded[0]
+                stats[rel_path + ENCODING_SUFFIXES.get(encoding, '')] = loaded[1]
+
+        with self._lock:
+            self._entries = entries
+            self._stats = stats
+        logger.info(f"Static cache loaded {len(entries)} file variants")
+
+    def _changed(self) -> bool:
+        with self._lock:
+            known = dict(self._stats)
+
+        current = {}
+        for rel_path in self._discover():
+            for suffix in ('', *ENCODING_SUFFIXES.values()):
+                try:
+                    stat = os.stat(os.path.join(self.root, rel_path + suffix))
+                except OSError:
+                    continue
+                if stat.st_size <= self.max_file_size:
+                    current[rel_path + suffix] = (stat.st_mtime, stat.st_size)
+        return current != known
+
+    def start(self):
+        """Load the cache and start watching for changed files."""
+        self.load()
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._watch, name='static-cache-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self):
+        while not self._stopping.wait(self.check_interval):
+            try:
+                if self._changed():
+                    self.load()
+            except Exception as e:
+                logger.error(f"Static cache reload failed: {str(e)}")
+
+    def contains(self, rel_path: str) -> bool:
+        with self._lock:
+            return (rel_path, None) in self._entries
+
+    def lookup(self, rel_path: str, accepts: Callable[[str], bool]) -> Optional[CachedFile]:
+        """Best cached variant of ``rel_path`` for the client's accepted encodings."""
+        with self._lock:
+            for encoding in ENCODING_SUFFIXES:
+                entry = self._entries.get((rel_path, encoding))
+                if entry is not None and accepts(encoding):
+                    return entry
+            return self._entries.get((rel_path, None))
+
+    def has_variants(self, rel_path: str) -> bool:
+        with self._lock:
+            return any((rel_path, encoding) in self._entries for encoding in ENCODING_SUFFIXES)
+
+    def respond(self, request, rel_path: str, cache_control: str) -> Optional[Response]:
+        """Build a response for a cached file, or None if it is not cached.
+
+        Conditional requests are answered from the precomputed validators.
+        """
+        entry = self.lookup(rel_path, lambda encoding: bool(request.accept_encodings[encoding]))
+        if entry is None:
+            return None
+
+        not_modified = (
+            request.if_none_match.contains(entry.etag)
+            if request.if_none_match
+            else request.if_modified_since is not None
+            and entry.last_modified <= request.if_modified_since
+        )
+
+        response = Response(
+            b'' if not_modified else entry.body,
+            status=304 if not_modified else 200,
+            mimetype=entry.mimetype
+        )
+        response.set_etag(entry.etag)
+        response.headers['Last-Modified'] = http_date(entry.last_modified)
+        response.headers['Cache-Control'] = cache_control
+        if entry.encoding:
+            response.headers['Content-Encoding'] = entry.encoding
+        if self.has_variants(rel_path):
+            response.vary.add('Accept-Encoding')
+        if not_modified:
+            response.headers.pop('Content-Type', None)
+            response.headers.pop('Content-Length', None)
+        return response
@@ -0,0 +1,157 @@
+"""
+Structured Logging
+Request threads only put log records on a bounded in-memory queue; a
+single listener thread formats them and does all file and console I/O.
+The log file receives one JSON object per line and is rotated when it
+reaches a size limit or an age limit, whichever comes first. When the
+queue is full records are dropped and counted rather than blocking the
+request.
+
+High-volume access lines are sampled before a record is even created
+(see ``AccessSampler``); each sampled line carries its ``sample_rate`` so
+counts can be scaled back up.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, Optional
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed with ``extra``
+STANDARD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, including fields passed with ``extra``."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+            'thread': record.threadName
+        }
+        for key, value in record.__dict__.items():
+            if key not in STANDARD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that never blocks: records are dropped when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now, since they may change after the call
+        # returns, but leave the formatting to the listener thread. This
+        # handler sits on the root logger, the last one to see the record,
+        # so it is updated in place instead of copied.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+
+class SizeAndTimeRotatingFileHandler(RotatingFileHandler):
+    """Rotates when the file exceeds ``max_bytes`` or is older than ``max_age`` seconds.
+
+    Several worker processes may write the same file. A process that finds
+    the file was already rotated by another one reopens it instead of
+    rotating again.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = 0, max_age: float = 0,
+                 backup_count: int = 0, encoding: Optional[str] = 'utf-8'):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding)
+        self.max_age = max_age
+        self.opened_at = time.time()
+
+    def _rotated_elsewhere(self) -> bool:
+        if self.stream is None:
+            return False
+        try:
+            return os.stat(self.baseFilename).st_ino != os.fstat(self.stream.fileno()).st_ino
+        except OSError:
+            return True
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self._rotated_elsewhere():
+            self.stream.close()
+            self.stream = self._open()
+            self.opened_at = time.time()
+            return False
+        if self.max_age and time.time() - self.opened_at >= self.max_age:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        super().doRollover()
+        self.opened_at = time.time()
+
+
+class AccessSampler:
+    """Decides which successful access lines to keep; errors are always kept."""
+
+    def __init__(self, rate: float):
+        self.rate = max(0.0, min(1.0, rate))
+
+    def keep(self, status: int) -> bool:
+        return status >= 400 or self.rate >= 1.0 or random.random() < self.rate
+
+
+def configure_logging(log_file: str, level: str = 'INFO', max_bytes: int = 10 * 1024 * 1024,
+                      max_age: float = 86400, backup_count: int = 7,
+                      queue_size: int = 10000) -> DroppingQueueHandler:
+    """Route every log record through a queue to a background listener.
+
+    Returns the queue handler installed on the root logger; its
+    ``dropped`` count reports records lost to a full queue. The listener
+    is stopped, and the queue flushed, at interpreter exit.
+    """
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+
+    file_handler = SizeAndTimeRotatingFileHandler(log_file, max_bytes=max_bytes, max_age=max_age,
+                                                  backup_count=backup_count)
+    file_handler.setFormatter(JSONFormatter())
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+    return queue_handler
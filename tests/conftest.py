@@ -0,0 +1,45 @@
+import os
+import tempfile
+
+import pytest
+
+# server.py reads its configuration at import time
+SCRATCH = tempfile.mkdtemp(prefix='portfolio-tests-')
+os.environ.setdefault('DATABASE_PATH', os.path.join(SCRATCH, 'portfolio.db'))
+os.environ.setdefault('LOG_FILE', os.path.join(SCRATCH, 'portfolio.log'))
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ.setdefault('RATE_LIMIT_STORAGE_URI', 'memory://')
+
+
+@pytest.fixture(scope='session')
+def server():
+    import server
+
+    server.init_database()
+    return server
+
+
+@pytest.fixture
+def client(server):
+    server.limiter.reset()
+    return server.app.test_client()
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A connection to a freshly migrated database, with the process caches cleared."""
+    import analytics_partitions
+    import database
+    import lookups
+    import migrations
+
+    analytics_partitions.forget_partitions()
+    for table in lookups.TABLES:
+        table.clear_cache()
+    conn = database.connect(str(tmp_path / 'portfolio.db'))
+    migrations.migrate(conn)
+    yield conn
+    conn.close()
+    analytics_partitions.forget_partitions()
+    for table in lookups.TABLES:
+        table.clear_cache()
@@ -0,0 +1,111 @@
+"""
+Parity Runner
+Sends the parity cases to one frontend (``flask`` or ``asgi``) in a fresh
+process and prints every response as JSON. Run by test_asgi_parity.py with
+a scratch database, so each app starts from an empty database, cache and
+rate limiter. Before exiting it waits until the mail queue has delivered
+every queued message. With PARITY_WITHOUT_AIOSMTPLIB set, the ASGI app
+runs as if aiosmtplib were not installed.
+
+Usage::
+
+    python tests/parity_runner.py flask|asgi < cases.json
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asgi
+import database
+import server
+
+# [method, path, body, request headers]
+Case = List[Any]
+
+MAIL_TIMEOUT = 30
+
+# Sent with every case; the Flask test client would otherwise add its own
+DEFAULT_HEADERS = {'Content-Type': 'application/json', 'User-Agent': 'parity-runner'}
+
+
+def mail_delivered() -> bool:
+    conn = database.connect()
+    try:
+        return not any(server.mail_queue.depth(conn).values())
+    finally:
+        conn.close()
+
+
+def run_flask(cases: List[Case]) -> List[Dict[str, Any]]:
+    server.init_database()
+    server.start_background_services()
+    client = server.app.test_client()
+    responses = []
+    try:
+        for method, path, body, headers in cases:
+            response = client.open(path, method=method, data=body.encode('utf-8'),
+                                   headers={**DEFAULT_HEADERS, **headers},
+                                   environ_base={'REMOTE_ADDR': '127.0.0.1'})
+            responses.append({
+                'status': response.status_code,
+                'headers': [[name.lower(), value] for name, value in response.headers],
+                'body': response.get_data(as_text=True)
+            })
+        deadline = time.monotonic() + MAIL_TIMEOUT
+        while not mail_delivered() and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        server.stop_background_services()
+    return responses
+
+
+async def run_asgi(cases: List[Case]) -> List[Dict[str, Any]]:
+    if os.getenv('PARITY_WITHOUT_AIOSMTPLIB'):
+        asgi.aiosmtplib = None
+    app = asgi.PortfolioASGI()
+    await app.startup()
+    responses = []
+    try:
+        for method, path, body, headers in cases:
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': method, 'path': path, 'query_string': b'', 'scheme': 'http',
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                            for name, value in {**DEFAULT_HEADERS, **headers}.items()],
+                'client': ('127.0.0.1', 0)
+            }
+            messages = [{'type': 'http.request', 'body': body.encode('utf-8'), 'more_body': False}]
+            sent = []
+
+            async def receive():
+                return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+            async def send(message):
+                sent.append(message)
+
+            await app(scope, receive, send)
+            responses.append({
+                'status': sent[0]['status'],
+                'headers': [[name.decode('latin-1').lower(), value.decode('latin-1')]
+                            for name, value in sent[0]['headers']],
+                'body': b''.join(message.get('body', b'') for message in sent[1:]).decode('utf-8')
+            })
+        deadline = time.monotonic() + MAIL_TIMEOUT
+        while not mail_delivered() and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+    finally:
+        await app.shutdown()
+    return responses
+
+
+if __name__ == '__main__':
+    frontend = sys.argv[1]
+    cases = json.load(sys.stdin)
+    responses = run_flask(cases) if frontend == 'flask' else asyncio.run(run_asgi(cases))
+    print(json.dumps(responses))
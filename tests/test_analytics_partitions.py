@@ -0,0 +1,77 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+import analytics_partitions
+import rollups
+from analytics_pipeline import AnalyticsBuffer
+
+
+def event(timestamp, event_type='page_view', ip_address='203.0.113.7', user_agent='pytest'):
+    return (event_type, None, ip_address, user_agent, timestamp)
+
+
+def rows(conn):
+    return conn.execute('SELECT id, event_type, timestamp FROM analytics ORDER BY id').fetchall()
+
+
+def test_events_go_to_monthly_partitions(db):
+    with db:
+        analytics_partitions.insert_events(db, [event('2026-09-30 23:59:59'), event('2026-10-01 00:00:00')])
+    assert [p['table'] for p in analytics_partitions.live_partitions(db)] == ['analytics_202609',
+                                                                               'analytics_202610']
+    assert rows(db) == [(1, 'page_view', '2026-09-30 23:59:59'), (2, 'page_view', '2026-10-01 00:00:00')]
+
+
+def test_late_events_do_not_reuse_ids(db):
+    with db:
+        analytics_partitions.insert_events(db, [event('2026-10-01 00:00:00'), event('2026-10-02 00:00:00')])
+    with db:
+        analytics_partitions.insert_events(db, [event('2026-09-15 00:00:00')])
+    ids = [row[0] for row in rows(db)]
+    assert len(ids) == len(set(ids)) == 3
+
+
+def test_partition_rolled_back_with_the_batch_is_created_again(db, monkeypatch):
+    buffer = AnalyticsBuffer()
+    write_rollups = rollups.record_analytics_events
+
+    def fail(cursor, events):
+        raise sqlite3.OperationalError('disk I/O error')
+
+    # A new user agent opens the transaction before the partition is created
+    monkeypatch.setattr(rollups, 'record_analytics_events', fail)
+    buffer._write(db, [event('2026-10-17 12:00:00', user_agent='new agent')])
+    assert not db.in_transaction
+    assert analytics_partitions.live_partitions(db) == []
+
+    monkeypatch.setattr(rollups, 'record_analytics_events', write_rollups)
+    buffer._write(db, [event('2026-10-17 12:00:01', user_agent='new agent')])
+    assert buffer.stats()['failed'] == 1
+    assert buffer.stats()['written'] == 1
+    assert rows(db) == [(1, 'page_view', '2026-10-17 12:00:01')]
+
+
+def test_expired_partitions_are_archived_and_dropped(db, tmp_path):
+    with db:
+        analytics_partitions.insert_events(db, [event('2025-01-10 08:00:00', user_agent='old'),
+                                                event('2025-01-11 08:00:00'),
+                                                event('2026-09-01 08:00:00')])
+    now = datetime(2026, 10, 17)
+    assert analytics_partitions.expired_months(db, 12, now) == ['2025-01']
+
+    archived = analytics_partitions.archive_expired(db, 12, str(tmp_path / 'archive'), now=now)
+    assert [(a['table'], a['rows']) for a in archived] == [('analytics_202501', 2)]
+    assert [row['user_agent'] for row in analytics_partitions.read_archive(archived[0]['path'])] == ['old', 'pytest']
+    assert [p['month'] for p in analytics_partitions.live_partitions(db)] == ['2026-09']
+    assert rows(db) == [(3, 'page_view', '2026-09-01 08:00:00')]
+    with pytest.raises(sqlite3.OperationalError):
+        db.execute('SELECT 1 FROM analytics_202501')
+
+    # Archiving again never overwrites the earlier file
+    with db:
+        analytics_partitions.insert_events(db, [event('2025-01-12 08:00:00')])
+    again = analytics_partitions.archive_expired(db, 12, str(tmp_path / 'archive'), now=now)
+    assert again[0]['path'] != archived[0]['path']
+    assert analytics_partitions.expired_months(db, 12, now) == []
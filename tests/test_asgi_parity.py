@@ -0,0 +1,215 @@
+"""The ASGI app answers every API request exactly as the Flask app does.
+
+Each app runs in its own process against its own fresh database, so
+they share no response cache, rate limiter or rows; statuses, headers
+and bodies are compared in full. Each one delivers its mail to its own
+SMTP sink, and the messages are compared too: the ASGI app sends through
+aiosmtplib when it is installed (the mail test is skipped otherwise),
+and a separate test covers its fallback to the threaded mail queue.
+"""
+
+import email
+import json
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+import asgi
+import server
+from smtp_sink import SMTPSink
+
+RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parity_runner.py')
+
+CONTACT = {'name': 'Parity <b>Check</b>', 'email': 'parity@example.com',
+           'message': 'Hello', 'projectType': 'parity', 'newsletter': True}
+
+# (method, path, JSON payload or raw body[, request headers])
+CASES = [
+    ('GET', '/health', None),
+    ('GET', '/api/stats', None),
+    ('POST', '/api/analytics', {'event_type': 'parity_check', 'event_data': {'frontend': 'parity'}}),
+    ('POST', '/api/analytics', {'event_data': {}}),
+    ('POST', '/api/analytics/batch', {'events': [{'event_type': 'parity_check'}, {'event_data': {}}]}),
+    ('POST', '/api/analytics/batch', {'events': []}),
+    ('POST', '/api/analytics/batch', {'events': [{'event_type': 'parity_check'}] * 51}),
+    ('POST', '/api/contact', CONTACT),
+    # A repeat is answered with the stored response
+    ('POST', '/api/contact', CONTACT),
+    ('POST', '/api/contact', {'name': 'Parity', 'email': 'not-an-email', 'message': 'Hello'}),
+    ('POST', '/api/contact', {'name': 'Parity', 'email': 'parity@example.com'}),
+    ('POST', '/api/contact', None),
+    # The sixth contact request within a minute is over the limit
+    ('POST', '/api/contact', {**CONTACT, 'message': 'Hello again'}),
+    ('POST', '/api/newsletter/subscribe', {'email': 'news@example.com', 'name': 'Parity'}),
+    ('POST', '/api/newsletter/subscribe', {'email': 'news@example.com', 'name': 'Parity'}),
+    ('POST', '/api/newsletter/subscribe', {'email': 'not-an-email'}),
+    ('POST', '/api/newsletter/subscribe', {'email': 'news@example.com'}),
+    ('POST', '/api/newsletter/subscribe', b'{not json'),
+    # Only JSON content types are parsed
+    ('POST', '/api/analytics', {'event_type': 'parity_check'}, {'Content-Type': 'text/plain'}),
+    ('POST', '/api/analytics', {'event_type': 'parity_check'}, {'Content-Type': 'application/ld+json'}),
+    ('GET', '/api/stats', None),
+    ('GET', '/api/does-not-exist', None),
+    ('POST', '/health', None),
+    ('HEAD', '/health', None),
+    ('OPTIONS', '/api/contact', None, {'Origin': 'https://leafbloom.online',
+                                       'Access-Control-Request-Method': 'POST',
+                                       'Access-Control-Request-Headers': 'Content-Type, Idempotency-Key'}),
+    ('POST', '/api/analytics', {'event_type': 'cors'}, {'Origin': 'https://leafbloom.online'}),
+    ('POST', '/api/analytics', {'event_type': 'cors'}, {'Origin': 'https://example.com'})
+]
+
+# Headers that legitimately differ between two otherwise equal responses
+VOLATILE_HEADERS = {'date', 'server'}
+
+# Headers derived from the body, which may hold volatile values
+BODY_HEADERS = {'content-length', 'etag'}
+
+# Values that legitimately differ: generated ids and clock readings
+VOLATILE_KEYS = {'submission_id', 'timestamp', 'last_updated'}
+
+# Mail body lines holding the submission time
+SUBMITTED_AT = re.compile(r'Submitted at: [^\r\n]*')
+
+
+def encode(payload):
+    if payload is None:
+        return ''
+    if isinstance(payload, bytes):
+        return payload.decode('utf-8')
+    return json.dumps(payload)
+
+
+def blank_volatile(value):
+    if isinstance(value, dict):
+        return {key: '<volatile>' if key in VOLATILE_KEYS else blank_volatile(item)
+                for key, item in value.items()}
+    if isinstance(value, list):
+        return [blank_volatile(item) for item in value]
+    return value
+
+
+def comparable(response):
+    headers = {}
+    for name, value in response['headers']:
+        if name == 'allow':
+            # Werkzeug builds it from a set, so the order varies between processes
+            value = sorted(value.split(', '))
+        if name not in VOLATILE_HEADERS:
+            headers[name] = value
+    try:
+        body = blank_volatile(json.loads(response['body']))
+        volatile = body != json.loads(response['body'])
+    except ValueError:
+        body = response['body']
+        # HEAD responses: the GET body they describe is cached with a timestamp
+        volatile = 'etag' in headers
+    if volatile:
+        headers.update((name, '<volatile>') for name in BODY_HEADERS if name in headers)
+    return response['status'], headers, body
+
+
+def comparable_mail(received):
+    """Envelope, headers and text of each message, in delivery order per recipient."""
+    messages = []
+    for sender, recipients, data in received:
+        message = email.message_from_bytes(data)
+        text = ''.join(part.get_payload(decode=True).decode('utf-8')
+                       for part in message.walk() if part.get_content_type() == 'text/plain')
+        messages.append((sender, recipients, message['From'], message['To'], message['Subject'],
+                         SUBMITTED_AT.sub('Submitted at: <volatile>', text)))
+    # Two mail workers may deliver in either order
+    return sorted(messages)
+
+
+def encode_cases(cases):
+    return json.dumps([[method, path, encode(payload), headers[0] if headers else {}]
+                       for method, path, payload, *headers in cases])
+
+
+def run(frontend, cases, scratch, **env):
+    """Responses of ``frontend`` to ``cases``, from a runner process on ``scratch``."""
+    env = {
+        **os.environ,
+        'DATABASE_PATH': str(scratch / f'{frontend}.db'),
+        'LOG_FILE': str(scratch / f'{frontend}.log'),
+        'LOG_LEVEL': 'WARNING',
+        'IMAGE_CACHE_DIR': str(scratch / 'image_cache'),
+        'RATE_LIMIT_STORAGE_URI': 'memory://',
+        'RATE_LIMIT_ENABLED': 'true',
+        'SMTP_USE_TLS': 'false',
+        'EMAIL_PASSWORD': '',
+        **env
+    }
+    completed = subprocess.run([sys.executable, RUNNER, frontend], input=encode_cases(cases), env=env,
+                               capture_output=True, text=True, timeout=120)
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+@pytest.fixture(scope='module')
+def responses(tmp_path_factory):
+    results = {}
+    for frontend in ('flask', 'asgi'):
+        sink = SMTPSink()
+        sink.start()
+        try:
+            # Mail is only queued when a password is configured; the sink
+            # offers no AUTH, so it is never used
+            results[frontend] = run(frontend, CASES, tmp_path_factory.mktemp(frontend),
+                                    SMTP_SERVER='127.0.0.1', SMTP_PORT=str(sink.port), EMAIL_PASSWORD='parity')
+            results[f"{frontend}_mail"] = list(sink.received)
+        finally:
+            sink.stop()
+    return results
+
+
+@pytest.mark.parametrize('index', range(len(CASES)),
+                         ids=[f"{index}-{case[0]} {case[1]}" for index, case in enumerate(CASES)])
+def test_responses_match(responses, index):
+    assert comparable(responses['asgi'][index]) == comparable(responses['flask'][index])
+
+
+def test_rate_limits_apply_alike(responses):
+    contact = [index for index, case in enumerate(CASES) if case[:2] == ('POST', '/api/contact')]
+    for frontend in ('flask', 'asgi'):
+        assert [responses[frontend][index]['status'] for index in contact] == [200, 200, 400, 400, 400, 429]
+
+
+def test_mail_is_delivered_alike(responses):
+    pytest.importorskip('aiosmtplib')
+    mail = comparable_mail(responses['asgi_mail'])
+    # A notification and an auto-reply for the one accepted contact request
+    assert [message[4] for message in mail] == ['New Portfolio Contact: Parity Check',
+                                                'Thank you for contacting Moeed ul Hassan - The Legend']
+    assert mail == comparable_mail(responses['flask_mail'])
+
+
+def test_mail_without_aiosmtplib_goes_through_the_threaded_queue(responses, tmp_path):
+    sink = SMTPSink()
+    sink.start()
+    try:
+        run('asgi', [('POST', '/api/contact', CONTACT)], tmp_path, PARITY_WITHOUT_AIOSMTPLIB='1',
+            SMTP_SERVER='127.0.0.1', SMTP_PORT=str(sink.port), EMAIL_PASSWORD='parity')
+        received = list(sink.received)
+    finally:
+        sink.stop()
+    assert comparable_mail(received) == comparable_mail(responses['flask_mail'])
+
+
+def test_routes_have_the_flask_endpoints():
+    urls = server.app.url_map.bind('localhost')
+    for path, (method, endpoint, handler) in asgi.ROUTES.items():
+        assert urls.match(path, method)[0] == endpoint
+
+
+def test_frontends_share_one_rate_limit_budget(tmp_path):
+    # Three subscriptions a minute, wherever they are sent
+    storage = {'RATE_LIMIT_STORAGE_URI': f"sqlite:///{tmp_path / 'ratelimits.db'}"}
+    subscribe = ('POST', '/api/newsletter/subscribe', {'email': 'budget@example.com'})
+    flask = run('flask', [subscribe] * 2, tmp_path, **storage)
+    asgi_app = run('asgi', [subscribe] * 2, tmp_path, **storage)
+    assert [r['status'] for r in flask + asgi_app] == [200, 200, 200, 429]
@@ -0,0 +1,32 @@
+import content
+
+
+def write(directory, name, source):
+    path = directory / name
+    path.write_text(source)
+    return str(path.relative_to(directory))
+
+
+def test_unparseable_module_keeps_its_script_tag(tmp_path):
+    (tmp_path / 'data').mkdir()
+    sources = [
+        write(tmp_path, 'data/projects.js', 'const projectsData = [];\n'),
+        write(tmp_path, 'data/quotes.js', "const quotesData = [{text: 'q', author: 'a'}];\n"),
+        write(tmp_path, 'data/achievements.js', 'const achievementsData = [{id: 1}, unlocked: false};\n'),
+        write(tmp_path, 'data/gallery.js', 'const galleryData = [];\n'),
+    ]
+    current = content.load(str(tmp_path), sources)
+    assert current.available() == ['projects', 'quotes', 'gallery']
+
+    page = ''.join(f'<script src="{path}"></script>' for path in sources)
+    rendered = content.render_index(page, current)
+    assert '<script src="data/achievements.js"></script>' in rendered
+    assert 'achievementsData' not in rendered
+    assert 'quotesData' in rendered
+
+
+def test_unavailable_dataset_is_503(client):
+    # data/achievements.js does not parse in this tree
+    assert client.get('/api/content/achievements').status_code == 503
+    assert client.get('/api/content/quotes').status_code == 200
+    assert set(client.get('/api/content').get_json()['datasets']) == {'projects', 'quotes', 'gallery'}
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+import images
+
+WIDTHS = [320, 640, 960, 1280, 2560]
+
+
+@pytest.mark.parametrize('args, expected', [
+    ({}, (2560, images.DEFAULT_QUALITY)),
+    ({'w': '1'}, (320, images.DEFAULT_QUALITY)),
+    ({'w': '321'}, (640, images.DEFAULT_QUALITY)),
+    ({'w': '640', 'q': 'low'}, (640, images.QUALITY_PRESETS['low'])),
+    ({'w': '99999', 'q': '61'}, (2560, images.QUALITY_PRESETS['medium'])),
+])
+def test_variant_args_snap_to_the_ladder_and_presets(args, expected):
+    assert images.parse_variant_args(args, WIDTHS) == (expected, '')
+
+
+@pytest.mark.parametrize('args', [{'w': 'wide'}, {'w': '0'}, {'q': 'best'}])
+def test_invalid_variant_args(args):
+    params, error = images.parse_variant_args(args, WIDTHS)
+    assert params is None and error
+
+
+def test_distinct_variants_are_bounded():
+    variants = {images.parse_variant_args({'w': str(w), 'q': str(q)}, WIDTHS)[0]
+                for w in range(1, 3000, 7) for q in range(0, 101, 3)}
+    assert len(variants) == len(WIDTHS) * len(images.QUALITY_PRESETS)
+
+
+def test_width_ladder_comes_from_the_gallery_data(tmp_path):
+    data = tmp_path / 'galleryData.js'
+    data.write_text('const galleryImageSizes = [640, 320];\n')
+    assert images.variant_widths(str(data)) == [320, 640, images.MAX_WIDTH]
+    assert images.variant_widths(str(tmp_path / 'missing.js')) == list(images.DEFAULT_WIDTHS)
+
+
+def test_cache_hits_touch_the_file_at_most_once_per_interval(tmp_path):
+    path = tmp_path / 'ab' / 'abcd.webp'
+    path.parent.mkdir()
+    path.write_bytes(b'image')
+    os.utime(path, (1, 1))
+    service = images.ImageService(cache_dir=str(tmp_path))
+
+    assert service._touch(str(path))
+    touched = os.stat(path).st_mtime
+    assert touched > 1
+    os.utime(path, (2, 2))
+    assert service._touch(str(path))
+    assert os.stat(path).st_mtime == 2
+
+
+SAFARI = 'image/webp,image/png,image/svg+xml,image/*;q=0.8,video/*;q=0.8,*/*;q=0.5'
+CHROME = 'image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8'
+
+
+@pytest.mark.parametrize('accept, expected', [
+    (SAFARI, 'webp'),
+    (CHROME, 'avif'),
+    ('*/*', 'jpeg'),
+    ('image/*', 'jpeg'),
+    ('image/avif;q=0,image/webp', 'webp'),
+])
+def test_negotiate_format_only_picks_formats_the_client_names(accept, expected):
+    service = images.ImageService()
+    service._formats = ['avif', 'webp', 'jpeg']
+
+    assert service.negotiate_format(None, parse_accept_header(accept, MIMEAccept)) == expected
@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+
+import launcher
+
+
+def supervisor():
+    return launcher.Supervisor('127.0.0.1', 0, workers=1, threads=1, graceful_timeout=1,
+                               ready_timeout=1, backlog=1)
+
+
+def exited_worker():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    read_fd, write_fd = os.pipe()
+    os.close(write_fd)
+    worker = launcher.Worker(process, read_fd)
+    worker.wait_ready(0)
+    worker.started_at -= launcher.MIN_WORKER_LIFETIME
+    return worker
+
+
+def test_dead_worker_is_replaced_by_a_ready_one(monkeypatch):
+    sup = supervisor()
+    dead = exited_worker()
+    sup.workers = [dead]
+    replacement = object()
+    monkeypatch.setattr(sup, 'spawn_ready', lambda: replacement)
+
+    def spawn():
+        raise AssertionError('a replacement must be waited on')
+
+    monkeypatch.setattr(sup, 'spawn', spawn)
+
+    sup.reap()
+    assert sup.workers == [replacement]
+
+
+def test_slot_is_kept_when_the_replacement_fails(monkeypatch):
+    sup = supervisor()
+    dead = exited_worker()
+    sup.workers = [dead]
+    attempts = []
+    monkeypatch.setattr(sup, 'spawn_ready', lambda: attempts.append(1))
+    monkeypatch.setattr(launcher.time, 'sleep', lambda seconds: None)
+
+    sup.reap()
+    sup.reap()
+    assert sup.workers == [dead]
+    assert len(attempts) == 2
+
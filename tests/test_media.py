@@ -0,0 +1,38 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from flask import Flask, request
+from werkzeug.http import http_date
+
+from media import MediaStreamer
+
+MTIME = datetime(2024, 5, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def media_file(tmp_path):
+    path = tmp_path / 'track.mp3'
+    path.write_bytes(bytes(range(256)) * 4)
+    os.utime(path, (MTIME.timestamp(), MTIME.timestamp()))
+    return path
+
+
+def send(media_file, **headers):
+    app = Flask(__name__)
+    with app.test_request_context(headers=headers):
+        return MediaStreamer().send(request, str(media_file.parent), media_file.name)
+
+
+@pytest.mark.parametrize('if_range, status', [
+    (MTIME, 206),
+    (MTIME + timedelta(days=1), 200),
+    (MTIME - timedelta(days=1), 200),
+])
+def test_if_range_date_must_match_last_modified_exactly(media_file, if_range, status):
+    response = send(media_file, Range='bytes=0-99', **{'If-Range': http_date(if_range)})
+
+    assert response.status_code == status
+    if status == 206:
+        assert response.headers['Content-Range'] == 'bytes 0-99/1024'
+    response.close()
@@ -0,0 +1,12 @@
+def test_repeated_scrapes_are_never_rate_limited(server, client):
+    # Four scrapes a minute for an hour, well past the default limits
+    statuses = {client.get('/metrics').status_code for _ in range(240)}
+
+    assert statuses == {200}
+
+
+def test_scrape_lists_request_metrics(client):
+    client.get('/health')
+    body = client.get('/metrics').get_data(as_text=True)
+
+    assert 'http_requests_total{method="GET",route="/health",status="200"}' in body
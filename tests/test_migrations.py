@@ -0,0 +1,22 @@
+import analytics_partitions
+import database
+import migrations
+
+
+def test_request_path_queries_use_indexes(db):
+    assert migrations.find_full_scans(db) == []
+
+
+def test_plan_check_covers_the_analytics_writer_and_leaves_no_partition(db):
+    names = {name for name, _ in migrations.request_path_statements()}
+
+    assert {'analytics_partitions.INSERT_EVENT', 'lookups.event_types.select'} <= names
+    migrations.find_full_scans(db)
+    assert analytics_partitions.live_partitions(db) == []
+
+
+def test_plan_check_reports_full_scans(db, monkeypatch):
+    monkeypatch.setattr(database, 'SELECT_SUBMISSIONS_BY_MESSAGE',
+                        'SELECT id FROM contact_submissions WHERE message = ?', raising=False)
+
+    assert migrations.find_full_scans(db) == [('SELECT_SUBMISSIONS_BY_MESSAGE', 'SCAN contact_submissions')]
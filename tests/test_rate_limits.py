@@ -0,0 +1,15 @@
+def test_default_limits_apply_to_undecorated_routes(server, client):
+    hourly = min(limit.amount for limit in server.DEFAULT_RATE_LIMITS)
+    statuses = [client.get('/health').status_code for _ in range(hourly + 1)]
+
+    assert statuses[:hourly] == [200] * hourly
+    assert statuses[-1] == 429
+
+
+def test_exempt_routes_skip_the_default_limits(server):
+    hourly = min(limit.amount for limit in server.DEFAULT_RATE_LIMITS)
+    server.limiter.reset()
+    with server.app.test_request_context('/metrics'):
+        # Raises 429 once the default limits are exhausted
+        for _ in range(hourly + 1):
+            assert server.enforce_default_rate_limits() is None
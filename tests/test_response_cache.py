@@ -0,0 +1,29 @@
+import pytest
+
+import cache
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def response_cache(request, server, monkeypatch):
+    response_cache = cache.create_cache(request.param)
+    response_cache.invalidate('stats')
+    monkeypatch.setattr(server, 'response_cache', response_cache)
+    return response_cache
+
+
+def test_invalidation_during_build_keeps_stale_entry_out(server, response_cache):
+    def build():
+        # A write commits and invalidates while this response is being built
+        response_cache.invalidate('stats')
+        return {'total_submissions': 0}, 200
+
+    entry, _, status = server.load_cached_json('stats', 30, build)
+
+    assert status == 200 and entry is not None
+    assert response_cache.get('stats') is None
+
+
+def test_rebuild_without_invalidation_is_cached(server, response_cache):
+    entry, _, _ = server.load_cached_json('stats', 30, lambda: ({'total_submissions': 1}, 200))
+
+    assert response_cache.get('stats') == entry
@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+import asgi
+from sampling_profiler import SamplingProfiler
+
+
+def test_request_spanning_pool_calls_is_one_trace(monkeypatch):
+    profiler = SamplingProfiler(interval=0.005, slow_request=0.25, max_overhead=0.5)
+    monkeypatch.setattr(asgi.server, 'profiler', profiler)
+
+    async def request():
+        executor = asgi.BoundedExecutor(4, 10)
+        profile = profiler.open('GET /api/stats', '/api/stats')
+        asgi.current_profile.set(profile)
+        try:
+            # Each call is well under the threshold, the request is not
+            for _ in range(3):
+                await executor.run(time.sleep, 0.1)
+        finally:
+            profiler.close(profile)
+            executor.shutdown()
+
+    profiler.start()
+    try:
+        asyncio.run(request())
+    finally:
+        profiler.stop()
+
+    traces = profiler.traces()
+    assert len(traces) == 1
+    assert traces[0]['route'] == 'GET /api/stats'
+    assert traces[0]['duration_ms'] >= 300
+    assert traces[0]['samples'] > 0
+
+
+def test_profile_rejects_non_ascii_trace_ids(server, client, monkeypatch):
+    monkeypatch.setitem(server.ADMIN_CONFIG, 'token', 'secret')
+    auth = {'Authorization': 'Bearer secret'}
+
+    assert client.get('/api/admin/profile?trace=²', headers=auth).status_code == 400
+    assert client.get('/api/admin/profile?trace=12345', headers=auth).status_code == 404
@@ -0,0 +1,57 @@
+from email.message import EmailMessage
+
+import pytest
+
+from smtp_pool import SMTPConnectionPool
+from smtp_sink import SMTPSink
+
+
+def message(recipient):
+    msg = EmailMessage()
+    msg['From'] = 'portfolio@example.com'
+    msg['To'] = recipient
+    msg['Subject'] = 'Test'
+    msg.set_content('Hello')
+    return msg
+
+
+@pytest.fixture
+def sink():
+    server = SMTPSink(rejected_recipients=['bad@example.com'])
+    server.start()
+    yield server
+    server.stop()
+
+
+def test_rejected_recipient_does_not_fail_the_batch(sink):
+    pool = SMTPConnectionPool('127.0.0.1', sink.port, use_tls=False)
+    results = pool.send_many([message('bad@example.com'), message('good1@example.com'),
+                              message('good2@example.com')])
+    pool.close()
+
+    assert results[0] is not None and 'bad@example.com' in results[0]
+    assert results[1:] == [None, None]
+    assert sink.messages == 2
+    stats = pool.stats()
+    assert stats['reconnects'] == 0
+    assert stats['messages_sent'] == 2
+    assert stats['send_failures'] == 1
+
+
+def test_session_is_reused_after_a_rejection(sink):
+    pool = SMTPConnectionPool('127.0.0.1', sink.port, use_tls=False)
+    pool.send_many([message('bad@example.com')])
+    assert pool.send_many([message('good@example.com')]) == [None]
+    pool.close()
+
+    assert pool.stats()['connections_opened'] == 1
+
+
+def test_unreachable_server_fails_every_message():
+    with SMTPSink() as closed:
+        port = closed.port
+    pool = SMTPConnectionPool('127.0.0.1', port, use_tls=False, timeout=2)
+    results = pool.send_many([message('a@example.com'), message('b@example.com')])
+
+    assert all(results)
+    assert pool.stats()['reconnects'] == 1
@@ -0,0 +1,162 @@
+"""
+Request Payload Validation
+Schemas for the contact, newsletter and analytics payloads. Each field's
+cleaning rule is built once when its schema is defined: text fields have
+markup and ``javascript:`` URLs removed by one precompiled pattern, then
+are trimmed and capped, and email addresses are checked against a
+precompiled pattern. Validation visits every field and reports all errors
+together instead of stopping at the first.
+"""
+
+import re
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+TEXT = 'text'
+EMAIL = 'email'
+BOOLEAN = 'boolean'
+JSON = 'json'
+
+TAG = r'<[^>]*>'
+
+# Tags are removed everywhere, and a ``javascript:`` that only appears once
+# the tags are gone (e.g. ``java<b>script:``) is removed with them
+MARKUP_PATTERN = re.compile(
+    '(?:' + f'(?:{TAG})*'.join(re.escape(char) for char in 'javascript:') + f')|{TAG}',
+    re.IGNORECASE
+)
+
+EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+
+def sanitize_text(text: str, max_length: Optional[int] = None) -> str:
+    """Remove markup and ``javascript:`` URLs, trim whitespace and cap the length."""
+    # Without a '<' the pattern can only match a plain "javascript:". The
+    # regex is skipped when that is ruled out cheaply; non-ASCII text
+    # always runs it, as IGNORECASE also folds e.g. U+017F onto 's'.
+    if '<' in text or (':' in text and (not text.isascii() or 'javascript:' in text.lower())):
+        text = MARKUP_PATTERN.sub('', text)
+    text = text.strip()
+    return text[:max_length] if max_length else text
+
+
+def is_valid_email(email: str) -> bool:
+    return EMAIL_PATTERN.fullmatch(email) is not None
+
+
+class Field:
+    """One payload field: where it is read from and how it is cleaned."""
+
+    def __init__(self, name: str, kind: str = TEXT, required: bool = False,
+                 max_length: Optional[int] = None, key: Optional[str] = None,
+                 label: Optional[str] = None, default: Any = ''):
+        self.name = name
+        self.kind = kind
+        self.required = required
+        self.max_length = max_length
+        self.key = key or name
+        self.label = label or name.replace('_', ' ').title()
+        self.default = default
+        self.clean = self._build_cleaner()
+
+    def _build_cleaner(self) -> Callable[[Any], Tuple[Any, Optional[str]]]:
+        """Return ``clean(value) -> (value, error)`` for this field's rules."""
+        label, required, max_length = self.label, self.required, self.max_length
+        missing = f'{label} is required'
+
+        if self.kind == BOOLEAN:
+            return lambda value: (bool(value), None)
+
+        if self.kind == JSON:
+            def clean_json(value):
+                if value is None and required:
+                    return None, missing
+                return value, None
+            return clean_json
+
+        if self.kind == EMAIL:
+            too_long = f'{label} must be at most {max_length} characters'
+
+            def clean_email(value):
+                if not isinstance(value, str):
+                    return None, missing if not value else 'Invalid email address format'
+                value = value.strip()
+                if not value:
+                    return None, missing
+                if max_length and len(value) > max_length:
+                    return None, too_long
+                if EMAIL_PATTERN.fullmatch(value) is None:
+                    return None, 'Invalid email address format'
+                return value, None
+            return clean_email
+
+        not_text = f'{label} must be text'
+
+        def clean_text(value):
+            if not isinstance(value, str):
+                if not value:
+                    return '', missing if required else None
+                return None, not_text
+            value = sanitize_text(value, max_length)
+            if required and not value:
+                return value, missing
+            return value, None
+        return clean_text
+
+
+class ValidationResult(NamedTuple):
+    values: Dict[str, Any]
+    # Payload key -> message for each invalid field
+    errors: Dict[str, str]
+    # The first error, for clients that show a single message
+    message: str
+
+    @property
+    def ok(self) -> bool:
+        return not self.message
+
+
+class Schema:
+    """A set of fields validated together."""
+
+    def __init__(self, *fields: Field, empty_message: str = 'No data provided'):
+        self.fields = fields
+        self.empty_message = empty_message
+
+    def validate(self, data: Any) -> ValidationResult:
+        """Clean every field of ``data``, collecting all field errors."""
+        if not data or not isinstance(data, dict):
+            return ValidationResult({}, {}, self.empty_message)
+
+        values = {}
+        errors = {}
+        for field in self.fields:
+            value, error = field.clean(data.get(field.key, field.default))
+            if error is None:
+                values[field.name] = value
+            else:
+                errors[field.key] = error
+        return ValidationResult(values, errors, next(iter(errors.values()), ''))
+
+
+CONTACT_SCHEMA = Schema(
+    Field('name', required=True, max_length=100),
+    Field('email', EMAIL, required=True, max_length=255),
+    Field('message', required=True, max_length=2000),
+    Field('company', max_length=100),
+    Field('project_type', key='projectType', max_length=50),
+    Field('budget', max_length=50),
+    Field('timeline', max_length=50),
+    Field('newsletter', BOOLEAN, default=False)
+)
+
+NEWSLETTER_SCHEMA = Schema(
+    Field('email', EMAIL, required=True, max_length=255),
+    Field('name', max_length=100),
+    empty_message='Email is required'
+)
+
+ANALYTICS_EVENT_SCHEMA = Schema(
+    Field('event_type', required=True, max_length=50),
+    Field('event_data', JSON, default=None),
+    empty_message='Event type is required'
+)